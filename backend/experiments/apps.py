@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+from django.utils.translation import gettext_lazy as _
+
+
+class ExperimentsConfig(AppConfig):
+    name = 'experiments'
+    verbose_name = _('Experiments')
+
+    def ready(self):
+        from . import signals  # noqa: F401
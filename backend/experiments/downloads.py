@@ -0,0 +1,143 @@
+"""
+Attachment downloads.
+
+Django only authorizes the request and answers conditional requests; with
+``ATTACHMENT_DOWNLOAD_ACCEL_PREFIX`` set, the response is an empty
+``X-Accel-Redirect`` and nginx streams the file from an ``internal``
+location, handling ``Range`` itself. Without it (development, tests) the
+file is streamed from Django, with single byte-range support so clients
+behave the same either way.
+"""
+import os
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe
+
+STREAM_BLOCK_SIZE = 256 * 1024
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def attachment_etag(attachment):
+    if attachment.checksum:
+        return f'"{attachment.checksum}"'
+    uploaded = int(attachment.uploaded_at.timestamp())
+    return f'"{attachment.pk}-{attachment.file_size}-{uploaded}"'
+
+
+def parse_range(header, size):
+    """
+    Return the ``(start, end)`` byte positions, inclusive, of a single-range
+    ``Range`` header.
+
+    Returns ``None`` when the whole file should be sent: no or malformed
+    header, or several ranges, which servers may answer with the full body.
+    """
+    if not header or not header.startswith('bytes=') or ',' in header:
+        return None
+    first, sep, last = header[len('bytes='):].strip().partition('-')
+    if not sep:
+        return None
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+        else:
+            # Suffix range: the last N bytes.
+            start, end = max(size - int(last), 0), size - 1
+    except ValueError:
+        return None
+    if start > end and first and last:
+        return None
+    if start >= size or end < start:
+        raise RangeNotSatisfiable
+    return start, min(end, size - 1)
+
+
+def range_applies(request, etag, last_modified):
+    """
+    Honor ``If-Range``: only serve the range if the file is still the one the
+    client has.
+    """
+    if_range = request.headers.get('If-Range')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def iter_file(path, start, length):
+    with open(path, 'rb') as handle:
+        handle.seek(start)
+        while length > 0:
+            data = handle.read(min(STREAM_BLOCK_SIZE, length))
+            if not data:
+                break
+            length -= len(data)
+            yield data
+
+
+def content_disposition(filename):
+    return f"attachment; filename*=UTF-8''{quote(filename)}"
+
+
+def attachment_response(request, attachment):
+    etag = attachment_etag(attachment)
+    last_modified = int(attachment.uploaded_at.timestamp())
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = file_response(request, attachment, etag, last_modified)
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def file_response(request, attachment, etag, last_modified):
+    content_type = attachment.file_type or 'application/octet-stream'
+    accel_prefix = getattr(settings, 'ATTACHMENT_DOWNLOAD_ACCEL_PREFIX', None)
+
+    if accel_prefix:
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = (
+            accel_prefix.rstrip('/') + '/' + quote(attachment.file.name)
+        )
+        response['Content-Disposition'] = content_disposition(attachment.filename)
+        response['Accept-Ranges'] = 'bytes'
+        return response
+
+    path = attachment.file.path
+    size = os.path.getsize(path)
+    byte_range = None
+    if range_applies(request, etag, last_modified):
+        try:
+            byte_range = parse_range(request.headers.get('Range'), size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+    if byte_range is None:
+        start, end = 0, size - 1
+        response = StreamingHttpResponse(
+            iter_file(path, 0, size), content_type=content_type
+        )
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            iter_file(path, start, end - start + 1), status=206,
+            content_type=content_type
+        )
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Content-Length'] = str(end - start + 1 if size else 0)
+    response['Content-Disposition'] = content_disposition(attachment.filename)
+    response['Accept-Ranges'] = 'bytes'
+    return response
@@ -0,0 +1,102 @@
+"""
+Compact history storage for the experiment rich-text fields.
+
+``HistoricalExperiment`` rows leave out ``HISTORY_TEXT_FIELDS``. Each save
+instead compares those fields against their latest ``ExperimentTextRevision``
+by digest and stores a compressed copy only if they changed. Readers call
+``attach_text()`` to set the historical values on a batch of records;
+``record.instance`` and ``snapshot()`` rebuild one full experiment, text
+included.
+
+Code that reads ``record.description`` or ``record.results`` straight from
+a ``HistoricalExperiment`` queryset must call ``attach_text()`` first: the
+attributes don't exist until then. ``thin_experiment_history`` keeps the two
+tables consistent when it deletes old records.
+"""
+import hashlib
+import zlib
+from bisect import bisect_right
+from collections import defaultdict
+
+from .models import ExperimentTextRevision, HISTORY_TEXT_FIELDS
+
+
+def compress(text):
+    return zlib.compress((text or '').encode('utf-8'), 6)
+
+
+def decompress(data):
+    return zlib.decompress(bytes(data)).decode('utf-8')
+
+
+def digest(text):
+    return hashlib.sha1((text or '').encode('utf-8')).hexdigest()
+
+
+def latest_digest(experiment_id, field):
+    return ExperimentTextRevision.objects.filter(
+        experiment_id=experiment_id, field=field
+    ).order_by('-valid_from').values_list('digest', flat=True).first()
+
+
+def record_text_revisions(experiment, history_date):
+    """Store a revision for every history text field of ``experiment`` that changed."""
+    revisions = []
+    for field in HISTORY_TEXT_FIELDS:
+        value = getattr(experiment, field)
+        value_digest = digest(value)
+        if value_digest == latest_digest(experiment.pk, field):
+            continue
+        revisions.append(ExperimentTextRevision(
+            experiment_id=experiment.pk,
+            field=field,
+            valid_from=history_date,
+            digest=value_digest,
+            data=compress(value),
+        ))
+    ExperimentTextRevision.objects.bulk_create(revisions)
+    return revisions
+
+
+def attach_text(records):
+    """
+    Set the historical ``HISTORY_TEXT_FIELDS`` values on
+    ``HistoricalExperiment`` records.
+
+    Costs two queries per experiment and field: the revision in effect at
+    the oldest record plus the revisions inside the records' date range.
+    """
+    by_experiment = defaultdict(list)
+    for record in records:
+        by_experiment[record.id].append(record)
+
+    for experiment_id, group in by_experiment.items():
+        first = min(record.history_date for record in group)
+        last = max(record.history_date for record in group)
+        for field in HISTORY_TEXT_FIELDS:
+            revisions = ExperimentTextRevision.objects.filter(
+                experiment_id=experiment_id, field=field
+            )
+            timeline = list(
+                revisions.filter(valid_from__lte=first).order_by('-valid_from')[:1]
+            ) + list(
+                revisions.filter(
+                    valid_from__gt=first, valid_from__lte=last
+                ).order_by('valid_from')
+            )
+            starts = [revision.valid_from for revision in timeline]
+            values = {}
+            for record in group:
+                position = bisect_right(starts, record.history_date) - 1
+                if position < 0:
+                    setattr(record, field, '')
+                    continue
+                if position not in values:
+                    values[position] = decompress(timeline[position].data)
+                setattr(record, field, values[position])
+    return records
+
+
+def snapshot(record):
+    """Rebuild the full ``Experiment`` as it was at ``record``."""
+    return record.instance
@@ -0,0 +1,218 @@
+"""
+Write-behind ingestion for ``ExperimentLog``.
+
+Requests append a compact JSON record to a Redis list instead of inserting a
+row, once their transaction commits, so a rolled-back change leaves no log.
+``experiments.tasks.flush_experiment_logs`` drains the list in order with
+``bulk_create``; one flusher runs at a time, so buffered records are
+inserted in the order they were logged. Delivery is at-least-once: a flush
+that dies between inserting and trimming a batch will insert it again.
+Records that cannot be parsed or inserted are moved to ``DEAD_LETTER_KEY``
+instead of blocking the records behind them.
+
+The list lives in the Redis behind ``WRITE_BEHIND_CACHE_ALIAS``, which must
+not evict keys: a buffered record exists nowhere else until it is flushed.
+
+When write-behind is disabled (``EXPERIMENT_LOG_WRITE_BEHIND = False``) or
+Redis/the broker is unreachable, records are written synchronously. Such a
+row can get a lower ``id`` than records logged before it that were still
+waiting in the buffer, so order logs by ``timestamp``, which is taken when
+the action is logged; ``id`` only follows it among buffered records.
+"""
+import json
+import logging
+
+from django.conf import settings
+from django.db import DataError, IntegrityError, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from kombu.exceptions import OperationalError
+from redis.exceptions import RedisError
+
+from users.models import User
+from .models import Experiment, ExperimentLog
+
+logger = logging.getLogger(__name__)
+
+BUFFER_KEY = 'experiments:log_buffer'
+FLUSH_SCHEDULED_KEY = 'experiments:log_flush_scheduled'
+FLUSH_LOCK_KEY = 'experiments:log_flush_lock'
+DEAD_LETTER_KEY = 'experiments:log_dead_letter'
+
+FLUSH_DELAY = 2  # seconds; records logged within this window share one flush
+BATCH_SIZE = 500
+
+
+def get_buffer_connection():
+    from django_redis import get_redis_connection
+    alias = getattr(settings, 'WRITE_BEHIND_CACHE_ALIAS', 'default')
+    return get_redis_connection(alias)
+
+
+def log_experiment_action(experiment_id, user_id, action, details='', ip_address=None):
+    """
+    Record an action on an experiment without writing to the database inline.
+
+    Inside a transaction the record is buffered when it commits; a sync write
+    is part of the transaction.
+    """
+    record = {
+        'e': experiment_id,
+        'u': user_id,
+        'a': action,
+        'd': details,
+        'ip': ip_address,
+        't': timezone.now().isoformat(),
+    }
+
+    if not getattr(settings, 'EXPERIMENT_LOG_WRITE_BEHIND', False):
+        write_now(record)
+        return
+
+    transaction.on_commit(lambda: buffer_record(record))
+
+
+def buffer_record(record):
+    try:
+        connection = get_buffer_connection()
+        connection.rpush(BUFFER_KEY, json.dumps(record, separators=(',', ':')))
+    except (RedisError, NotImplementedError) as exc:
+        logger.warning(
+            'Log buffer unavailable, writing experiment log synchronously: %s', exc
+        )
+        write_now(record)
+        return
+
+    schedule_flush(connection)
+
+
+def schedule_flush(connection):
+    """
+    Queue one flush per ``FLUSH_DELAY`` window; without a broker, flush inline
+    once no transaction is open.
+    """
+    from .tasks import flush_experiment_logs
+
+    try:
+        if not connection.set(FLUSH_SCHEDULED_KEY, 1, nx=True, ex=FLUSH_DELAY * 10):
+            return
+        flush_experiment_logs.apply_async(countdown=FLUSH_DELAY, retry=False)
+    except (OperationalError, RedisError) as exc:
+        logger.warning(
+            'Could not schedule experiment log flush, flushing inline: %s', exc
+        )
+        # The flush trims records of other requests from the list; if it ran
+        # in a transaction that then rolled back, they would be lost.
+        transaction.on_commit(flush_buffer)
+
+
+def build_log(record):
+    return ExperimentLog(
+        experiment_id=record['e'],
+        user_id=record['u'],
+        action=record['a'],
+        details=record['d'],
+        ip_address=record['ip'],
+        timestamp=parse_datetime(record['t']),
+    )
+
+
+def parse_record(item):
+    """The record in a buffered item; raises ``ValueError`` if it is malformed."""
+    try:
+        record = json.loads(item)
+        timestamp = build_log(record).timestamp
+    except (KeyError, TypeError) as exc:
+        raise ValueError(f'Malformed log record: {exc!r}')
+    if timestamp is None:
+        raise ValueError(f'Invalid log timestamp: {record["t"]!r}')
+    return record
+
+
+def write_now(record):
+    build_log(record).save()
+
+
+def write_records(records):
+    """Insert buffered records, dropping those whose experiment or user is gone."""
+    experiment_ids = Experiment.objects.filter(
+        pk__in={record['e'] for record in records}
+    ).values_list('pk', flat=True)
+    user_ids = User.objects.filter(
+        pk__in={record['u'] for record in records}
+    ).values_list('pk', flat=True)
+    experiment_ids, user_ids = set(experiment_ids), set(user_ids)
+
+    logs = [
+        build_log(record)
+        for record in records
+        if record['e'] in experiment_ids and record['u'] in user_ids
+    ]
+    ExperimentLog.objects.bulk_create(logs, batch_size=BATCH_SIZE)
+    return len(logs)
+
+
+def flush_buffer(batch_size=BATCH_SIZE, max_batches=20):
+    """
+    Drain up to ``max_batches`` batches from the buffer. Returns the number of
+    rows written.
+    """
+    try:
+        connection = get_buffer_connection()
+        connection.delete(FLUSH_SCHEDULED_KEY)
+        lock = connection.lock(FLUSH_LOCK_KEY, timeout=60)
+        if not lock.acquire(blocking=False):
+            return 0
+    except (RedisError, NotImplementedError) as exc:
+        logger.warning('Log buffer unavailable, nothing to flush: %s', exc)
+        return 0
+
+    written = 0
+    try:
+        for _ in range(max_batches):
+            raw = connection.lrange(BUFFER_KEY, 0, batch_size - 1)
+            if not raw:
+                break
+            written += flush_batch(connection, raw)
+            # Trim only after the rows are committed.
+            connection.ltrim(BUFFER_KEY, len(raw), -1)
+    finally:
+        lock.release()
+
+    if connection.llen(BUFFER_KEY):
+        schedule_flush(connection)
+    return written
+
+
+def flush_batch(connection, raw):
+    """
+    Write one batch of buffered items; those that cannot be parsed or
+    inserted go to ``DEAD_LETTER_KEY``. Other database errors, such as a lost
+    connection, propagate and leave the batch in the buffer.
+    """
+    parsed = []
+    rejected = []
+    for item in raw:
+        try:
+            parsed.append((item, parse_record(item)))
+        except ValueError as exc:
+            logger.error('Dropping malformed experiment log record: %s', exc)
+            rejected.append(item)
+
+    try:
+        with transaction.atomic():
+            written = write_records([record for _, record in parsed])
+    except (DataError, IntegrityError):
+        # One bad row fails the whole insert; find it by writing them one by one.
+        written = 0
+        for item, record in parsed:
+            try:
+                with transaction.atomic():
+                    written += write_records([record])
+            except (DataError, IntegrityError) as exc:
+                logger.error('Dropping experiment log record %s: %s', item, exc)
+                rejected.append(item)
+
+    if rejected:
+        connection.rpush(DEAD_LETTER_KEY, *rejected)
+    return written
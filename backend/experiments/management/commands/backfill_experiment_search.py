@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from experiments.models import Experiment
+from experiments.search import SEARCH_FIELDS, get_search_backend
+
+
+class Command(BaseCommand):
+    help = (
+        'Build the full-text search document for existing experiments in '
+        'primary-key batches.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Reindex every experiment, not only those without a search vector'
+        )
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        batch_size = options['batch_size']
+
+        queryset = Experiment.objects.only('pk', *SEARCH_FIELDS).order_by('pk')
+        if connection.vendor == 'postgresql' and not options['all']:
+            queryset = queryset.filter(search_vector__isnull=True)
+
+        last_pk = 0
+        total = 0
+        while True:
+            batch = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            with transaction.atomic():
+                total += backend.index(batch)
+            last_pk = batch[-1].pk
+            self.stdout.write(f'Indexed {total} experiments (up to id {last_pk})')
+
+        self.stdout.write(self.style.SUCCESS(f'Done, {total} experiments indexed'))
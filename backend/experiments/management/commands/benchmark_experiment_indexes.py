@@ -0,0 +1,144 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from experiments.models import Experiment, ExperimentStatus, ExperimentPriority
+from users.models import User
+
+SEED_TITLE_PREFIX = 'Benchmark experiment '
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed the experiments table and print EXPLAIN plans for the dashboard '
+        'filters, optionally with and without the hot-filter indexes. '
+        'PostgreSQL only; do not run against production.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Insert this many synthetic experiments first (e.g. 1000000)'
+        )
+        parser.add_argument(
+            '--compare', action='store_true',
+            help=(
+                'Also explain every query with the indexes dropped '
+                '(rolled back afterwards)'
+            )
+        )
+        parser.add_argument(
+            '--analyze', action='store_true',
+            help='Use EXPLAIN ANALYZE and report actual timings'
+        )
+        parser.add_argument(
+            '--cleanup', action='store_true',
+            help='Delete the synthetic experiments and exit'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('This benchmark needs PostgreSQL.')
+
+        if options['cleanup']:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'DELETE FROM {Experiment._meta.db_table} WHERE title LIKE %s',
+                    [SEED_TITLE_PREFIX + '%']
+                )
+                self.stdout.write(f'Deleted {cursor.rowcount} synthetic experiments')
+            return
+
+        if options['seed']:
+            self.seed(options['seed'])
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {Experiment._meta.db_table}')
+
+        if options['compare']:
+            with transaction.atomic():
+                with connection.schema_editor(atomic=False) as schema_editor:
+                    for index in Experiment._meta.indexes:
+                        schema_editor.remove_index(Experiment, index)
+                self.explain_all('without hot-filter indexes', options['analyze'])
+                transaction.set_rollback(True)
+
+        self.explain_all('with hot-filter indexes', options['analyze'])
+
+    def seed(self, count):
+        user_ids = list(User.objects.values_list('id', flat=True)[:50])
+        if not user_ids:
+            raise CommandError('Create at least one user before seeding experiments.')
+
+        statuses = [value for value, _ in ExperimentStatus.choices]
+        priorities = [value for value, _ in ExperimentPriority.choices]
+        table = Experiment._meta.db_table
+
+        self.stdout.write(f'Seeding {count} experiments into {table}...')
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {table} (
+                    title, description, objective, hypothesis, status, priority,
+                    planned_start_date, planned_end_date,
+                    created_by_id, assigned_to_id,
+                    equipment_used, materials_used, results, conclusions,
+                    success_criteria,
+                    created_at, updated_at, is_archived
+                )
+                SELECT
+                    %s || g, '', '', '',
+                    (%s::varchar[])[1 + g %% %s],
+                    (%s::varchar[])[1 + g %% %s],
+                    CURRENT_DATE - (g %% 720),
+                    CURRENT_DATE - (g %% 720) + (g %% 90),
+                    (%s::bigint[])[1 + g %% %s],
+                    CASE WHEN g %% 10 = 0 THEN NULL
+                         ELSE (%s::bigint[])[1 + (g / 7) %% %s] END,
+                    '', '', '', '', '',
+                    now() - g * interval '1 minute', now(),
+                    g %% 7 = 0
+                FROM generate_series(1, %s) AS g
+                """,
+                [
+                    SEED_TITLE_PREFIX,
+                    statuses, len(statuses),
+                    priorities, len(priorities),
+                    user_ids, len(user_ids),
+                    user_ids, len(user_ids),
+                    count,
+                ]
+            )
+
+    def dashboard_queries(self):
+        user_id = Experiment.objects.exclude(assigned_to=None).values_list(
+            'assigned_to', flat=True
+        ).first()
+        live = Experiment.objects.filter(is_archived=False)
+        return [
+            ('latest page', Experiment.objects.order_by('-created_at', '-id')[:20]),
+            ('live by status', live.filter(
+                status=ExperimentStatus.IN_PROGRESS
+            ).order_by('-created_at')[:20]),
+            ('live by assignee and status', live.filter(
+                assigned_to=user_id, status=ExperimentStatus.PLANNED
+            ).order_by('-created_at')[:20]),
+            ('live by priority', live.filter(
+                priority=ExperimentPriority.CRITICAL
+            ).order_by('-created_at')[:20]),
+            ('overdue', live.filter(
+                status=ExperimentStatus.IN_PROGRESS, planned_end_date__lt=date.today()
+            ).order_by('planned_end_date')[:20]),
+            ('archived by status', Experiment.objects.filter(
+                is_archived=True, status=ExperimentStatus.COMPLETED
+            ).order_by('-created_at')[:20]),
+        ]
+
+    def explain_all(self, label, analyze):
+        self.stdout.write(self.style.MIGRATE_HEADING(f'== {label} =='))
+        for name, queryset in self.dashboard_queries():
+            plan = queryset.explain(analyze=analyze)
+            access = 'seq scan' if 'Seq Scan' in plan else 'index scan'
+            self.stdout.write(self.style.SUCCESS(f'-- {name}: {access}'))
+            self.stdout.write(plan)
@@ -0,0 +1,132 @@
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from experiments.models import Experiment, ExperimentTextRevision
+
+HistoricalExperiment = Experiment.history.model
+
+
+def bucket_key(moment, granularity):
+    if granularity == 'day':
+        return moment.date()
+    if granularity == 'week':
+        return moment.isocalendar()[:2]
+    return moment.year, moment.month
+
+
+class Command(BaseCommand):
+    help = (
+        'Thin old experiment history: keep every revision from the last '
+        '--keep-days, and only the last revision per experiment and '
+        '--granularity bucket before that. Text revisions no longer referenced '
+        'by any kept record are removed too.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep-days', type=int, default=90)
+        parser.add_argument(
+            '--granularity', choices=['day', 'week', 'month'], default='day'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=200, help='Experiments per transaction'
+        )
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['keep_days'])
+        old_history = HistoricalExperiment.objects.filter(history_date__lt=cutoff)
+
+        last_id = 0
+        totals = {'history': 0, 'text': 0}
+        while True:
+            experiment_ids = list(
+                old_history.filter(id__gt=last_id).order_by('id')
+                .values_list('id', flat=True).distinct()[:options['batch_size']]
+            )
+            if not experiment_ids:
+                break
+            last_id = experiment_ids[-1]
+
+            with transaction.atomic():
+                history_ids = self.thin_records(
+                    old_history.filter(id__in=experiment_ids), options['granularity']
+                )
+                text_ids = self.unused_text_revisions(
+                    experiment_ids, cutoff, exclude_history=history_ids
+                )
+                if not options['dry_run']:
+                    HistoricalExperiment.objects.filter(
+                        history_id__in=history_ids
+                    ).delete()
+                    ExperimentTextRevision.objects.filter(pk__in=text_ids).delete()
+
+            totals['history'] += len(history_ids)
+            totals['text'] += len(text_ids)
+            self.stdout.write(
+                f'Up to experiment {last_id}: {totals["history"]} history records, '
+                f'{totals["text"]} text revisions'
+            )
+
+        verb = 'Would delete' if options['dry_run'] else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {totals["history"]} history records and '
+            f'{totals["text"]} text revisions'
+        ))
+
+    def thin_records(self, records, granularity):
+        """
+        Return the history ids to drop: all but the last record per experiment
+        and bucket.
+        """
+        keep = {}
+        rows = records.order_by('id', 'history_date', 'history_id').values_list(
+            'history_id', 'id', 'history_date'
+        )
+        drop = []
+        for history_id, experiment_id, history_date in rows:
+            key = (experiment_id, bucket_key(history_date, granularity))
+            if key in keep:
+                drop.append(keep[key])
+            keep[key] = history_id
+        return drop
+
+    def unused_text_revisions(self, experiment_ids, cutoff, exclude_history):
+        """
+        Return ids of pre-cutoff text revisions that no remaining history
+        record resolves to.
+        """
+        dates = defaultdict(list)
+        remaining = HistoricalExperiment.objects.filter(
+            id__in=experiment_ids
+        ).exclude(history_id__in=exclude_history)
+        for experiment_id, history_date in remaining.values_list('id', 'history_date'):
+            dates[experiment_id].append(history_date)
+
+        timelines = defaultdict(list)
+        revisions = ExperimentTextRevision.objects.filter(
+            experiment_id__in=experiment_ids
+        ).order_by('experiment_id', 'field', 'valid_from').values_list(
+            'pk', 'experiment_id', 'field', 'valid_from'
+        )
+        for pk, experiment_id, field, valid_from in revisions:
+            timelines[experiment_id, field].append((valid_from, pk))
+
+        unused = []
+        for (experiment_id, field), timeline in timelines.items():
+            starts = [valid_from for valid_from, _ in timeline]
+            # The newest revision is the baseline the next save is compared against.
+            needed = {len(timeline) - 1}
+            for history_date in dates[experiment_id]:
+                position = bisect_right(starts, history_date) - 1
+                if position >= 0:
+                    needed.add(position)
+            unused.extend(
+                pk for position, (valid_from, pk) in enumerate(timeline)
+                if position not in needed and valid_from < cutoff
+            )
+        return unused
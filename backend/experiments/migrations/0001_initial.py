@@ -0,0 +1,170 @@
+# Generated by Django 4.2.7 on 2026-10-18 13:24
+
+import ckeditor.fields
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import simple_history.models
+import taggit.managers
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('protocols', '0001_initial'),
+        ('taggit', '0005_auto_20220424_2025'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Experiment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=200)),
+                ('description', ckeditor.fields.RichTextField()),
+                ('objective', models.TextField()),
+                ('hypothesis', models.TextField(blank=True)),
+                ('status', models.CharField(choices=[('planned', 'Planned'), ('in_progress', 'In Progress'), ('completed', 'Completed'), ('failed', 'Failed'), ('cancelled', 'Cancelled')], default='planned', max_length=20)),
+                ('priority', models.CharField(choices=[('low', 'Low'), ('medium', 'Medium'), ('high', 'High'), ('critical', 'Critical')], default='medium', max_length=20)),
+                ('planned_start_date', models.DateField()),
+                ('planned_end_date', models.DateField()),
+                ('actual_start_date', models.DateField(blank=True, null=True)),
+                ('actual_end_date', models.DateField(blank=True, null=True)),
+                ('equipment_used', models.TextField(blank=True)),
+                ('materials_used', models.TextField(blank=True)),
+                ('results', ckeditor.fields.RichTextField(blank=True)),
+                ('conclusions', models.TextField(blank=True)),
+                ('success_criteria', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('is_archived', models.BooleanField(default=False)),
+                ('assigned_to', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='assigned_experiments', to=settings.AUTH_USER_MODEL)),
+                ('collaborators', models.ManyToManyField(blank=True, related_name='collaborated_experiments', to=settings.AUTH_USER_MODEL)),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='created_experiments', to=settings.AUTH_USER_MODEL)),
+                ('protocol', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='experiments', to='protocols.protocol')),
+                ('tags', taggit.managers.TaggableManager(blank=True, help_text='A comma-separated list of tags.', through='taggit.TaggedItem', to='taggit.Tag', verbose_name='Tags')),
+            ],
+            options={
+                'verbose_name': 'Experiment',
+                'verbose_name_plural': 'Experiments',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='HistoricalExperiment',
+            fields=[
+                ('id', models.BigIntegerField(auto_created=True, blank=True, db_index=True, verbose_name='ID')),
+                ('title', models.CharField(max_length=200)),
+                ('description', ckeditor.fields.RichTextField()),
+                ('objective', models.TextField()),
+                ('hypothesis', models.TextField(blank=True)),
+                ('status', models.CharField(choices=[('planned', 'Planned'), ('in_progress', 'In Progress'), ('completed', 'Completed'), ('failed', 'Failed'), ('cancelled', 'Cancelled')], default='planned', max_length=20)),
+                ('priority', models.CharField(choices=[('low', 'Low'), ('medium', 'Medium'), ('high', 'High'), ('critical', 'Critical')], default='medium', max_length=20)),
+                ('planned_start_date', models.DateField()),
+                ('planned_end_date', models.DateField()),
+                ('actual_start_date', models.DateField(blank=True, null=True)),
+                ('actual_end_date', models.DateField(blank=True, null=True)),
+                ('equipment_used', models.TextField(blank=True)),
+                ('materials_used', models.TextField(blank=True)),
+                ('results', ckeditor.fields.RichTextField(blank=True)),
+                ('conclusions', models.TextField(blank=True)),
+                ('success_criteria', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(blank=True, editable=False)),
+                ('updated_at', models.DateTimeField(blank=True, editable=False)),
+                ('is_archived', models.BooleanField(default=False)),
+                ('history_id', models.AutoField(primary_key=True, serialize=False)),
+                ('history_date', models.DateTimeField(db_index=True)),
+                ('history_change_reason', models.CharField(max_length=100, null=True)),
+                ('history_type', models.CharField(choices=[('+', 'Created'), ('~', 'Changed'), ('-', 'Deleted')], max_length=1)),
+                ('assigned_to', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('created_by', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('history_user', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('protocol', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='protocols.protocol')),
+            ],
+            options={
+                'verbose_name': 'historical Experiment',
+                'verbose_name_plural': 'historical Experiments',
+                'ordering': ('-history_date', '-history_id'),
+                'get_latest_by': ('history_date', 'history_id'),
+            },
+            bases=(simple_history.models.HistoricalChanges, models.Model),
+        ),
+        migrations.CreateModel(
+            name='ExperimentComment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content', models.TextField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('is_internal', models.BooleanField(default=False)),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='experiment_comments', to=settings.AUTH_USER_MODEL)),
+                ('experiment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='comments', to='experiments.experiment')),
+            ],
+            options={
+                'verbose_name': 'Experiment Comment',
+                'verbose_name_plural': 'Experiment Comments',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ExperimentAttachment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file', models.FileField(upload_to='experiment_attachments/')),
+                ('filename', models.CharField(max_length=255)),
+                ('file_type', models.CharField(max_length=100)),
+                ('file_size', models.PositiveIntegerField()),
+                ('uploaded_at', models.DateTimeField(auto_now_add=True)),
+                ('description', models.CharField(blank=True, max_length=500)),
+                ('experiment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attachments', to='experiments.experiment')),
+                ('uploaded_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='uploaded_attachments', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Experiment Attachment',
+                'verbose_name_plural': 'Experiment Attachments',
+                'ordering': ['-uploaded_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ExperimentStep',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('step_number', models.PositiveIntegerField()),
+                ('title', models.CharField(max_length=200)),
+                ('description', models.TextField()),
+                ('expected_duration', models.DurationField(blank=True, null=True)),
+                ('actual_duration', models.DurationField(blank=True, null=True)),
+                ('is_completed', models.BooleanField(default=False)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('notes', models.TextField(blank=True)),
+                ('experiment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='steps', to='experiments.experiment')),
+            ],
+            options={
+                'verbose_name': 'Experiment Step',
+                'verbose_name_plural': 'Experiment Steps',
+                'ordering': ['step_number'],
+                'unique_together': {('experiment', 'step_number')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ExperimentLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(max_length=100)),
+                ('details', models.TextField(blank=True)),
+                ('timestamp', models.DateTimeField(auto_now_add=True)),
+                ('ip_address', models.GenericIPAddressField(blank=True, null=True)),
+                ('experiment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='logs', to='experiments.experiment')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='experiment_logs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Experiment Log',
+                'verbose_name_plural': 'Experiment Logs',
+                'ordering': ['-timestamp'],
+                'indexes': [models.Index(fields=['experiment', '-timestamp', '-id'], name='explog_exp_ts_id_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 4.2.7 on 2026-10-18 13:24
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class AddIndex(AddIndexConcurrently):
+    """
+    CREATE INDEX CONCURRENTLY on PostgreSQL, so the table stays writable
+    while the index builds; a plain CREATE INDEX on the SQLite dev database.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            return super().database_forwards(
+                app_label, schema_editor, from_state, to_state
+            )
+        return migrations.AddIndex.database_forwards(
+            self, app_label, schema_editor, from_state, to_state
+        )
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            return super().database_backwards(
+                app_label, schema_editor, from_state, to_state
+            )
+        return migrations.AddIndex.database_backwards(
+            self, app_label, schema_editor, from_state, to_state
+        )
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ('experiments', '0001_initial'),
+    ]
+
+    operations = [
+        AddIndex(
+            model_name='experiment',
+            index=models.Index(
+                fields=['-created_at', '-id'], name='exp_created_id_idx'
+            ),
+        ),
+        AddIndex(
+            model_name='experiment',
+            index=models.Index(
+                condition=models.Q(('is_archived', False)),
+                fields=['status', '-created_at'],
+                name='exp_live_status_created_idx',
+            ),
+        ),
+        AddIndex(
+            model_name='experiment',
+            index=models.Index(
+                condition=models.Q(('is_archived', False)),
+                fields=['assigned_to', 'status', '-created_at'],
+                name='exp_live_assignee_idx',
+            ),
+        ),
+        AddIndex(
+            model_name='experiment',
+            index=models.Index(
+                condition=models.Q(('is_archived', False)),
+                fields=['priority', '-created_at'],
+                name='exp_live_priority_idx',
+            ),
+        ),
+        AddIndex(
+            model_name='experiment',
+            index=models.Index(
+                condition=models.Q(('is_archived', False)),
+                fields=['status', 'planned_end_date'],
+                name='exp_live_status_due_idx',
+            ),
+        ),
+    ]
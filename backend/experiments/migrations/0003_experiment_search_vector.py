@@ -0,0 +1,99 @@
+# Generated by Django 4.2.7 on 2026-10-18 13:25
+
+import re
+from html import unescape
+
+import django.contrib.postgres.search
+from django.db import migrations, transaction
+from django.utils.html import strip_tags
+
+BACKFILL_BATCH_SIZE = 500
+
+# Frozen copies of experiments.search as of this migration, so later changes
+# to that module can't change what this migration does.
+SEARCH_CONFIG = 'english'
+
+_whitespace = re.compile(r'\s+')
+
+
+def html_to_text(value):
+    return _whitespace.sub(' ', unescape(strip_tags(value or ''))).strip()
+
+
+def document_parts(experiment):
+    body = ' '.join(filter(None, [
+        html_to_text(experiment.description),
+        html_to_text(experiment.results),
+    ]))
+    return experiment.title or '', experiment.objective or '', body
+
+
+def backfill_search_vectors(apps, schema_editor):
+    # The FTS5 table used on SQLite is filled by backfill_experiment_search.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    from django.contrib.postgres.search import SearchVector
+    from django.db.models import Value
+
+    Experiment = apps.get_model('experiments', 'Experiment')
+    db_alias = schema_editor.connection.alias
+    queryset = Experiment.objects.using(db_alias).filter(
+        search_vector__isnull=True
+    ).only('pk', 'title', 'objective', 'description', 'results').order_by('pk')
+
+    # One short transaction per batch, so the table is never locked for the
+    # whole backfill.
+    last_pk = 0
+    while True:
+        batch = list(queryset.filter(pk__gt=last_pk)[:BACKFILL_BATCH_SIZE])
+        if not batch:
+            break
+        rows = []
+        for experiment in batch:
+            title, objective, body = document_parts(experiment)
+            rows.append(Experiment(pk=experiment.pk, search_vector=(
+                SearchVector(Value(title), weight='A', config=SEARCH_CONFIG) +
+                SearchVector(Value(objective), weight='B', config=SEARCH_CONFIG) +
+                SearchVector(Value(body), weight='C', config=SEARCH_CONFIG)
+            )))
+        with transaction.atomic(using=db_alias):
+            Experiment.objects.using(db_alias).bulk_update(rows, ['search_vector'])
+        last_pk = batch[-1].pk
+
+
+def create_search_index(apps, schema_editor):
+    # GIN is PostgreSQL-only; SQLite searches through the FTS5 fallback instead.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    # CONCURRENTLY keeps the table writable while the index builds.
+    schema_editor.execute(
+        'CREATE INDEX CONCURRENTLY IF NOT EXISTS exp_search_vector_gin '
+        'ON experiments_experiment USING gin (search_vector)'
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX CONCURRENTLY IF EXISTS exp_search_vector_gin')
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ('experiments', '0002_experiment_hot_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='experiment',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.RunPython(backfill_search_vectors, migrations.RunPython.noop),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
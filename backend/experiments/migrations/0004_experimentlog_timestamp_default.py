@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-18 13:29
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('experiments', '0003_experiment_search_vector'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='experimentlog',
+            name='timestamp',
+            field=models.DateTimeField(
+                default=django.utils.timezone.now, editable=False
+            ),
+        ),
+    ]
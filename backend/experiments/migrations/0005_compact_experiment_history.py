@@ -0,0 +1,111 @@
+# Generated by Django 4.2.7 on 2026-10-18 13:31
+
+import hashlib
+import zlib
+
+import ckeditor.fields
+from django.db import migrations, models
+
+TEXT_FIELDS = ('description', 'results')
+BATCH_SIZE = 500
+
+
+def move_history_text(apps, schema_editor):
+    """
+    Turn the full copies in the historical table into change-only compressed
+    revisions.
+    """
+    HistoricalExperiment = apps.get_model('experiments', 'HistoricalExperiment')
+    ExperimentTextRevision = apps.get_model('experiments', 'ExperimentTextRevision')
+
+    records = HistoricalExperiment.objects.order_by(
+        'id', 'history_date', 'history_id'
+    ).values_list('id', 'history_date', *TEXT_FIELDS)
+    previous = {}
+    pending = []
+    for experiment_id, history_date, *values in records.iterator(chunk_size=2000):
+        for field, value in zip(TEXT_FIELDS, values):
+            value = value or ''
+            digest = hashlib.sha1(value.encode('utf-8')).hexdigest()
+            if previous.get((experiment_id, field)) == digest:
+                continue
+            previous[(experiment_id, field)] = digest
+            pending.append(ExperimentTextRevision(
+                experiment_id=experiment_id,
+                field=field,
+                valid_from=history_date,
+                digest=digest,
+                data=zlib.compress(value.encode('utf-8'), 6),
+            ))
+        if len(pending) >= BATCH_SIZE:
+            ExperimentTextRevision.objects.bulk_create(pending)
+            pending = []
+    ExperimentTextRevision.objects.bulk_create(pending)
+
+
+def restore_history_text(apps, schema_editor):
+    HistoricalExperiment = apps.get_model('experiments', 'HistoricalExperiment')
+    ExperimentTextRevision = apps.get_model('experiments', 'ExperimentTextRevision')
+
+    for field in TEXT_FIELDS:
+        revisions = ExperimentTextRevision.objects.filter(field=field).order_by(
+            'experiment_id', 'valid_from'
+        )
+        for revision in revisions.iterator(chunk_size=BATCH_SIZE):
+            HistoricalExperiment.objects.filter(
+                id=revision.experiment_id,
+                history_date__gte=revision.valid_from,
+            ).update(**{field: zlib.decompress(bytes(revision.data)).decode('utf-8')})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('experiments', '0004_experimentlog_timestamp_default'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExperimentTextRevision',
+            fields=[
+                ('id', models.BigAutoField(
+                    auto_created=True, primary_key=True, serialize=False,
+                    verbose_name='ID'
+                )),
+                ('experiment_id', models.BigIntegerField()),
+                ('field', models.CharField(max_length=20)),
+                ('valid_from', models.DateTimeField()),
+                ('digest', models.CharField(max_length=40)),
+                ('data', models.BinaryField()),
+            ],
+            options={
+                'verbose_name': 'Experiment Text Revision',
+                'verbose_name_plural': 'Experiment Text Revisions',
+                'ordering': ['-valid_from'],
+                'indexes': [models.Index(
+                    fields=['experiment_id', 'field', '-valid_from'],
+                    name='exptext_lookup_idx'
+                )],
+            },
+        ),
+        # A default lets the columns be re-added when migrating backwards.
+        migrations.AlterField(
+            model_name='historicalexperiment',
+            name='description',
+            field=ckeditor.fields.RichTextField(default=''),
+        ),
+        migrations.AlterField(
+            model_name='historicalexperiment',
+            name='results',
+            field=ckeditor.fields.RichTextField(blank=True, default=''),
+        ),
+        migrations.RunPython(move_history_text, restore_history_text),
+        migrations.RemoveField(
+            model_name='historicalexperiment',
+            name='description',
+        ),
+        migrations.RemoveField(
+            model_name='historicalexperiment',
+            name='results',
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 4.2.7 on 2026-10-18 13:35
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('experiments', '0005_compact_experiment_history'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='experimentattachment',
+            name='checksum',
+            field=models.CharField(
+                blank=True, help_text='See experiments.uploads for the format',
+                max_length=80
+            ),
+        ),
+        migrations.AlterField(
+            model_name='experimentattachment',
+            name='file_size',
+            field=models.PositiveBigIntegerField(),
+        ),
+        migrations.CreateModel(
+            name='AttachmentUpload',
+            fields=[
+                ('id', models.UUIDField(
+                    default=uuid.uuid4, editable=False, primary_key=True,
+                    serialize=False
+                )),
+                ('filename', models.CharField(max_length=255)),
+                ('file_type', models.CharField(blank=True, max_length=100)),
+                ('description', models.CharField(blank=True, max_length=500)),
+                ('file_size', models.PositiveBigIntegerField()),
+                ('offset', models.PositiveBigIntegerField(default=0)),
+                ('part_digests', models.JSONField(default=list, editable=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('experiment', models.ForeignKey(
+                    on_delete=django.db.models.deletion.CASCADE,
+                    related_name='attachment_uploads', to='experiments.experiment'
+                )),
+                ('uploaded_by', models.ForeignKey(
+                    on_delete=django.db.models.deletion.CASCADE,
+                    related_name='attachment_uploads', to=settings.AUTH_USER_MODEL
+                )),
+            ],
+            options={
+                'verbose_name': 'Attachment Upload',
+                'verbose_name_plural': 'Attachment Uploads',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
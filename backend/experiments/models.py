@@ -1,9 +1,13 @@
+import uuid
+
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from taggit.managers import TaggableManager
 from simple_history.models import HistoricalRecords
 from ckeditor.fields import RichTextField
+from django.contrib.postgres.search import SearchVectorField
 
 User = get_user_model()
 
@@ -23,6 +27,143 @@ class ExperimentPriority(models.TextChoices):
     CRITICAL = 'critical', _('Critical')
 
 
+class DaysBetween(models.Func):
+    """Whole days from the second date expression to the first, as an integer."""
+    arity = 2
+    template = '(%(expressions)s)'
+    arg_joiner = ' - '
+    output_field = models.IntegerField()
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler, connection,
+            template='CAST(julianday(%(expressions)s) AS INTEGER)',
+            arg_joiner=') - julianday(',
+            **extra_context
+        )
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler, connection,
+            template='DATEDIFF(%(expressions)s)',
+            arg_joiner=', ',
+            **extra_context
+        )
+
+
+# Rich-text fields kept out of the historical table; their revisions are
+# stored compressed, and only when they change, in ExperimentTextRevision.
+HISTORY_TEXT_FIELDS = ('description', 'results')
+
+
+class CompactTextHistoricalRecords(HistoricalRecords):
+    """
+    ``HistoricalRecords`` for a model whose ``HISTORY_TEXT_FIELDS`` are
+    excluded from the historical table and kept as ``ExperimentTextRevision``
+    rows instead (see experiments.history).
+
+    Plain simple_history fills excluded fields from the live row, so
+    ``record.instance`` (and the admin's revert) would show today's text.
+    Here ``instance`` rebuilds the text as it was at the record.
+    """
+
+    def get_extra_fields(self, model, fields):
+        extra_fields = super().get_extra_fields(model, fields)
+        get_instance = extra_fields['instance'].fget
+
+        def instance(record):
+            from .history import attach_text
+
+            if not all(hasattr(record, field) for field in HISTORY_TEXT_FIELDS):
+                attach_text([record])
+            result = get_instance(record)
+            for field in HISTORY_TEXT_FIELDS:
+                setattr(result, field, getattr(record, field))
+            return result
+
+        extra_fields['instance'] = property(instance)
+        return extra_fields
+
+
+class ExperimentQuerySet(models.QuerySet):
+    def with_list_related(self):
+        """
+        Load everything the experiment list/detail serializers touch.
+
+        Foreign keys are joined, many-to-many relations are prefetched and
+        step counts are annotated, so a page costs a fixed number of queries
+        (main query + collaborators + tags) regardless of its size.
+        """
+        return self.select_related(
+            'created_by',
+            'assigned_to',
+            'protocol',
+        ).prefetch_related(
+            'collaborators',
+            'tags',
+        ).annotate(
+            step_count=models.Count('steps', distinct=True),
+            completed_step_count=models.Count(
+                'steps',
+                filter=models.Q(steps__is_completed=True),
+                distinct=True
+            ),
+        )
+
+    def overdue(self):
+        """
+        Live in-progress experiments past their planned end date (see
+        ``Experiment.is_overdue``). Archived ones are left out, which also
+        lets PostgreSQL use the partial ``exp_live_status_due_idx``.
+        """
+        return self.filter(
+            is_archived=False,
+            status=ExperimentStatus.IN_PROGRESS,
+            planned_end_date__lt=timezone.now().date()
+        )
+
+    def with_overdue(self):
+        """
+        Annotate ``annotated_is_overdue`` so it can be filtered, sorted and
+        aggregated. Matches ``overdue()``: archived experiments are never
+        overdue.
+        """
+        return self.annotate(
+            annotated_is_overdue=models.Case(
+                models.When(
+                    is_archived=False,
+                    status=ExperimentStatus.IN_PROGRESS,
+                    planned_end_date__lt=timezone.now().date(),
+                    then=models.Value(True)
+                ),
+                default=models.Value(False),
+                output_field=models.BooleanField()
+            )
+        )
+
+    def with_duration(self):
+        """
+        Annotate ``annotated_duration_days`` with the same rules as
+        ``Experiment.duration_days``.
+        """
+        return self.annotate(
+            annotated_duration_days=models.Case(
+                models.When(
+                    actual_start_date__isnull=False,
+                    actual_end_date__isnull=False,
+                    then=DaysBetween('actual_end_date', 'actual_start_date')
+                ),
+                models.When(
+                    planned_start_date__isnull=False,
+                    planned_end_date__isnull=False,
+                    then=DaysBetween('planned_end_date', 'planned_start_date')
+                ),
+                default=None,
+                output_field=models.IntegerField()
+            )
+        )
+
+
 class Experiment(models.Model):
     title = models.CharField(max_length=200)
     description = RichTextField()
@@ -90,19 +231,56 @@ class Experiment(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     is_archived = models.BooleanField(default=False)
     
-    # History tracking
-    history = HistoricalRecords()
+    # Full-text search document, maintained by experiments.search
+    search_vector = SearchVectorField(null=True, editable=False)
+    
+    # History tracking; the rich-text fields are stored as compressed revisions.
+    # Deliberately not switchable by a setting: which columns the historical
+    # table has is part of the schema (migration 0005 moved the text out), so
+    # plain HistoricalRecords would need a different migration history.
+    history = CompactTextHistoricalRecords(
+        excluded_fields=['search_vector', *HISTORY_TEXT_FIELDS]
+    )
+    
+    objects = ExperimentQuerySet.as_manager()
     
     class Meta:
         verbose_name = _('Experiment')
         verbose_name_plural = _('Experiments')
         ordering = ['-created_at']
+        indexes = [
+            # Default list order and keyset pagination walk
+            models.Index(fields=['-created_at', '-id'], name='exp_created_id_idx'),
+            # Dashboard filters only ever look at live experiments
+            models.Index(
+                fields=['status', '-created_at'],
+                condition=models.Q(is_archived=False),
+                name='exp_live_status_created_idx'
+            ),
+            models.Index(
+                fields=['assigned_to', 'status', '-created_at'],
+                condition=models.Q(is_archived=False),
+                name='exp_live_assignee_idx'
+            ),
+            models.Index(
+                fields=['priority', '-created_at'],
+                condition=models.Q(is_archived=False),
+                name='exp_live_priority_idx'
+            ),
+            models.Index(
+                fields=['status', 'planned_end_date'],
+                condition=models.Q(is_archived=False),
+                name='exp_live_status_due_idx'
+            ),
+        ]
     
     def __str__(self):
         return self.title
     
     @property
     def duration_days(self):
+        if 'annotated_duration_days' in self.__dict__:
+            return self.annotated_duration_days
         if self.actual_start_date and self.actual_end_date:
             return (self.actual_end_date - self.actual_start_date).days
         elif self.planned_start_date and self.planned_end_date:
@@ -111,12 +289,127 @@ class Experiment(models.Model):
     
     @property
     def is_overdue(self):
+        if 'annotated_is_overdue' in self.__dict__:
+            return self.annotated_is_overdue
+        if self.is_archived:
+            return False
         if self.status == ExperimentStatus.IN_PROGRESS and self.planned_end_date:
-            from django.utils import timezone
             return timezone.now().date() > self.planned_end_date
         return False
 
 
+class ExperimentTextRevision(models.Model):
+    """
+    A zlib-compressed value of one of ``HISTORY_TEXT_FIELDS``.
+
+    A row is written only when the field's content changes. The value a
+    historical record had is the latest revision at or before its
+    ``history_date``; see experiments.history. Like the historical table,
+    revisions reference the experiment by plain id so they outlive it.
+    """
+    experiment_id = models.BigIntegerField()
+    field = models.CharField(max_length=20)
+    valid_from = models.DateTimeField()
+    digest = models.CharField(max_length=40)
+    data = models.BinaryField()
+    
+    class Meta:
+        verbose_name = _('Experiment Text Revision')
+        verbose_name_plural = _('Experiment Text Revisions')
+        ordering = ['-valid_from']
+        indexes = [
+            models.Index(
+                fields=['experiment_id', 'field', '-valid_from'],
+                name='exptext_lookup_idx'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.field} of experiment {self.experiment_id} from {self.valid_from}"
+
+
+# Renumbering parks the affected steps above this value first, so no
+# intermediate state ever collides with unique_together(experiment, step_number).
+STEP_NUMBER_OFFSET = 1000000
+
+
+class ExperimentStepQuerySet(models.QuerySet):
+    def _park_and_renumber(self, experiment, steps, new_number):
+        """
+        Renumber ``steps`` in two UPDATEs regardless of how many rows move.
+
+        The rows are first moved out of the way by ``STEP_NUMBER_OFFSET`` and
+        then given ``new_number``, an expression over the parked value.
+        """
+        if not steps.update(step_number=models.F('step_number') + STEP_NUMBER_OFFSET):
+            return 0
+        return self.filter(
+            experiment=experiment,
+            step_number__gte=STEP_NUMBER_OFFSET
+        ).update(step_number=new_number)
+
+    def shift(self, experiment, start, delta):
+        """Add ``delta`` to the number of every step from ``start`` onwards."""
+        steps = self.filter(experiment=experiment, step_number__gte=start)
+        return self._park_and_renumber(
+            experiment, steps, models.F('step_number') - STEP_NUMBER_OFFSET + delta
+        )
+
+    def move(self, step, position):
+        """Move ``step`` to ``position``, sliding the steps in between by one."""
+        current = step.step_number
+        if position == current:
+            return
+        if position < current:
+            low, high, delta = position, current, 1
+        else:
+            low, high, delta = current, position, -1
+        steps = self.filter(
+            experiment=step.experiment_id, step_number__range=(low, high)
+        )
+        self._park_and_renumber(step.experiment_id, steps, models.Case(
+            models.When(pk=step.pk, then=models.Value(position)),
+            default=models.F('step_number') - STEP_NUMBER_OFFSET + delta
+        ))
+        step.step_number = position
+
+    def replace_all(self, experiment, items, fields):
+        """
+        Make ``items`` the complete, ordered step list of ``experiment``.
+
+        Each item is a dict of step ``fields``; items with an ``id`` update
+        that step, the others create new ones, and steps not listed are
+        deleted. Positions follow list order starting at 1. Runs a fixed
+        number of statements: select, delete, park, bulk update, bulk create.
+        """
+        existing = {step.pk: step for step in self.filter(experiment=experiment)}
+        keep = [item['id'] for item in items if item.get('id') is not None]
+        self.filter(experiment=experiment).exclude(pk__in=keep).delete()
+        self.filter(experiment=experiment).update(
+            step_number=models.F('step_number') + STEP_NUMBER_OFFSET
+        )
+
+        to_update = []
+        to_create = []
+        for position, item in enumerate(items, start=1):
+            values = {field: item[field] for field in fields if field in item}
+            step = existing.get(item.get('id'))
+            if step is None:
+                to_create.append(
+                    self.model(experiment=experiment, step_number=position, **values)
+                )
+                continue
+            for field, value in values.items():
+                setattr(step, field, value)
+            step.step_number = position
+            to_update.append(step)
+
+        if to_update:
+            self.bulk_update(to_update, ['step_number', *fields])
+        self.bulk_create(to_create)
+        return sorted(to_update + to_create, key=lambda step: step.step_number)
+
+
 class ExperimentStep(models.Model):
     experiment = models.ForeignKey(
         Experiment,
@@ -132,6 +425,8 @@ class ExperimentStep(models.Model):
     completed_at = models.DateTimeField(null=True, blank=True)
     notes = models.TextField(blank=True)
     
+    objects = ExperimentStepQuerySet.as_manager()
+    
     class Meta:
         verbose_name = _('Experiment Step')
         verbose_name_plural = _('Experiment Steps')
@@ -176,7 +471,12 @@ class ExperimentAttachment(models.Model):
     file = models.FileField(upload_to='experiment_attachments/')
     filename = models.CharField(max_length=255)
     file_type = models.CharField(max_length=100)
-    file_size = models.PositiveIntegerField()
+    file_size = models.PositiveBigIntegerField()
+    checksum = models.CharField(
+        max_length=80,
+        blank=True,
+        help_text=_('See experiments.uploads for the format')
+    )
     uploaded_by = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -199,6 +499,49 @@ class ExperimentAttachment(models.Model):
         super().save(*args, **kwargs)
 
 
+class AttachmentUpload(models.Model):
+    """
+    An attachment upload in progress.
+
+    Chunks are appended to a part file at ``offset``; ``part_digests`` holds
+    the SHA-256 of every accepted chunk, in order. Once ``offset`` reaches
+    ``file_size`` the part file becomes an ``ExperimentAttachment`` and this
+    row is deleted.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    experiment = models.ForeignKey(
+        Experiment,
+        on_delete=models.CASCADE,
+        related_name='attachment_uploads'
+    )
+    uploaded_by = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='attachment_uploads'
+    )
+    filename = models.CharField(max_length=255)
+    file_type = models.CharField(max_length=100, blank=True)
+    description = models.CharField(max_length=500, blank=True)
+    file_size = models.PositiveBigIntegerField()
+    offset = models.PositiveBigIntegerField(default=0)
+    part_digests = models.JSONField(default=list, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = _('Attachment Upload')
+        verbose_name_plural = _('Attachment Uploads')
+        ordering = ['-created_at']
+
+    def __str__(self):
+        progress = f"{self.offset}/{self.file_size}"
+        return f"{self.filename} ({progress}) - {self.experiment_id}"
+
+    @property
+    def is_complete(self):
+        return self.offset >= self.file_size
+
+
 class ExperimentLog(models.Model):
     experiment = models.ForeignKey(
         Experiment,
@@ -212,13 +555,20 @@ class ExperimentLog(models.Model):
     )
     action = models.CharField(max_length=100)
     details = models.TextField(blank=True)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Set when the action happens, not when the row is written: rows may be
+    # inserted later in batches by experiments.logs.
+    timestamp = models.DateTimeField(default=timezone.now, editable=False)
     ip_address = models.GenericIPAddressField(null=True, blank=True)
     
     class Meta:
         verbose_name = _('Experiment Log')
         verbose_name_plural = _('Experiment Logs')
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(
+                fields=['experiment', '-timestamp', '-id'], name='explog_exp_ts_id_idx'
+            ),
+        ]
     
     def __str__(self):
         return f"{self.action} by {self.user.username} on {self.experiment.title}"
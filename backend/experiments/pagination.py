@@ -0,0 +1,174 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination over ``(ordering column, pk)``.
+
+    Each page is fetched with ``WHERE (col, pk) < (last_col, last_pk)`` and a
+    ``LIMIT``, so the cost of a page does not depend on how deep it is and no
+    ``COUNT(*)`` is issued. The primary key breaks ties, which keeps the
+    order stable when many rows share a timestamp.
+
+    Views choose the column through a ``keyset_ordering`` attribute, e.g.
+    ``'-timestamp'``. The column must be non-nullable and should be covered
+    by an index on ``(column, id)``. The order is fixed by the view, so an
+    ``?ordering=`` parameter that asks for a different one is rejected.
+    """
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    ordering = '-created_at'
+    invalid_cursor_message = 'Invalid cursor'
+    invalid_ordering_message = (
+        'Cursor pagination is ordered by {ordering}; ordering cannot be changed'
+    )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+
+        ordering = getattr(view, 'keyset_ordering', self.ordering)
+        self.field = ordering.lstrip('-')
+        descending = ordering.startswith('-')
+        self.check_ordering(request, ordering)
+
+        cursor = self.decode_cursor(request, queryset.model)
+        reverse = bool(cursor and cursor['reverse'])
+        walk_descending = descending != reverse
+
+        if cursor:
+            lookup = 'lt' if walk_descending else 'gt'
+            # The leading ``<=``/``>=`` on the column alone gives the planner
+            # an index range to start the scan at; the OR only breaks ties.
+            queryset = queryset.filter(
+                Q(**{f'{self.field}__{lookup}e': cursor['value']}),
+                Q(**{f'{self.field}__{lookup}': cursor['value']}) |
+                Q(**{self.field: cursor['value'], f'pk__{lookup}': cursor['pk']}),
+            )
+
+        if walk_descending:
+            queryset = queryset.order_by(f'-{self.field}', '-pk')
+        else:
+            queryset = queryset.order_by(self.field, 'pk')
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = cursor is not None
+
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def encode_cursor(self, obj, reverse):
+        value = getattr(obj, self.field)
+        if hasattr(value, 'isoformat'):
+            value = value.isoformat()
+        payload = json.dumps([value, obj.pk, int(reverse)], separators=(',', ':'))
+        token = base64.urlsafe_b64encode(payload.encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+    def check_ordering(self, request, ordering):
+        requested = request.query_params.get(api_settings.ORDERING_PARAM)
+        if requested and requested.replace(' ', '') != ordering:
+            raise ValidationError(
+                {'ordering': self.invalid_ordering_message.format(ordering=ordering)}
+            )
+
+    def decode_cursor(self, request, model):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            value, pk, reverse = json.loads(base64.urlsafe_b64decode(token.encode()))
+            value = model._meta.get_field(self.field).to_python(value)
+            pk = model._meta.pk.to_python(pk)
+        except (TypeError, ValueError, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        if value is None or pk is None:
+            raise NotFound(self.invalid_cursor_message)
+        return {'value': value, 'pk': pk, 'reverse': bool(reverse)}
+
+
+class OptionalKeysetPagination(KeysetPagination):
+    """
+    Page-number pagination by default, keyset pagination on request.
+
+    Clients opt in with ``?pagination=cursor`` and then follow the
+    ``next``/``previous`` links, which carry a ``cursor`` parameter. Existing
+    callers that rely on ``count`` and ``?page=`` keep working unchanged.
+    """
+    mode_query_param = 'pagination'
+    mode_value = 'cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_keyset(request):
+            self.fallback = None
+            return super().paginate_queryset(queryset, request, view)
+        self.fallback = PageNumberPagination()
+        return self.fallback.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.fallback is not None:
+            return self.fallback.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def use_keyset(self, request):
+        return (
+            self.cursor_query_param in request.query_params or
+            request.query_params.get(self.mode_query_param) == self.mode_value
+        )
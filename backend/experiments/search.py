@@ -0,0 +1,184 @@
+"""
+Full-text search over experiments.
+
+PostgreSQL keeps a weighted ``tsvector`` in ``Experiment.search_vector``
+(GIN-indexed, see migration 0003). Other backends, i.e. the SQLite databases
+used by ``settings_test`` and ``settings_dev``, fall back to an FTS5 virtual
+table keyed by the experiment id. Both backends index the same plain-text
+document: CKEditor HTML is stripped before indexing.
+"""
+import re
+from html import unescape
+
+from django.contrib.postgres.search import (
+    SearchHeadline, SearchQuery, SearchRank, SearchVector
+)
+from django.db import connection
+from django.db.models import F, Func, TextField, Value
+from django.db.models.functions import Concat
+from django.utils.html import escape, strip_tags
+
+SEARCH_CONFIG = 'english'
+
+# Fields that feed the search document; saves touching none of them skip reindexing.
+SEARCH_FIELDS = ('title', 'objective', 'description', 'results')
+
+# The database wraps matches in control characters; render_headline() escapes
+# the snippet and only then swaps them for markup.
+HIGHLIGHT_START = '\x02'
+HIGHLIGHT_STOP = '\x03'
+
+_whitespace = re.compile(r'\s+')
+
+
+def html_to_text(value):
+    """Turn CKEditor HTML into plain, single-spaced text."""
+    return _whitespace.sub(' ', unescape(strip_tags(value or ''))).strip()
+
+
+def render_headline(snippet):
+    """Escape a raw database snippet and turn the match markers into ``<mark>`` tags."""
+    return escape(unescape(snippet or '')).replace(
+        HIGHLIGHT_START, '<mark>'
+    ).replace(HIGHLIGHT_STOP, '</mark>')
+
+
+def document_parts(experiment):
+    """Return the (title, objective, body) triple that gets indexed."""
+    body = ' '.join(filter(None, [
+        html_to_text(experiment.description),
+        html_to_text(experiment.results),
+    ]))
+    return experiment.title or '', experiment.objective or '', body
+
+
+class PostgresSearchBackend:
+    def vector(self, experiment):
+        title, objective, body = document_parts(experiment)
+        return (
+            SearchVector(Value(title), weight='A', config=SEARCH_CONFIG) +
+            SearchVector(Value(objective), weight='B', config=SEARCH_CONFIG) +
+            SearchVector(Value(body), weight='C', config=SEARCH_CONFIG)
+        )
+
+    def index(self, experiments):
+        from .models import Experiment
+
+        experiments = list(experiments)
+        if len(experiments) == 1:
+            experiment = experiments[0]
+            Experiment.objects.filter(pk=experiment.pk).update(
+                search_vector=self.vector(experiment)
+            )
+            return 1
+
+        # Fresh instances so the callers' objects don't end up holding expressions.
+        rows = [Experiment(pk=e.pk, search_vector=self.vector(e)) for e in experiments]
+        Experiment.objects.bulk_update(rows, ['search_vector'])
+        return len(rows)
+
+    def remove(self, pks):
+        # The vector lives on the experiment row and goes away with it.
+        pass
+
+    def search(self, query, limit, offset=0):
+        from .models import Experiment
+
+        search_query = SearchQuery(query, config=SEARCH_CONFIG, search_type='websearch')
+        plain_text = Concat(
+            F('objective'), Value(' '),
+            self.strip_html('description'), Value(' '),
+            self.strip_html('results'),
+            output_field=TextField()
+        )
+        hits = Experiment.objects.filter(
+            search_vector=search_query
+        ).annotate(
+            rank=SearchRank(F('search_vector'), search_query),
+            headline=SearchHeadline(
+                plain_text,
+                search_query,
+                config=SEARCH_CONFIG,
+                start_sel=HIGHLIGHT_START,
+                stop_sel=HIGHLIGHT_STOP,
+                max_fragments=2,
+            ),
+        ).order_by('-rank', '-pk').values_list('pk', 'rank', 'headline')
+        return [
+            (pk, rank, render_headline(headline))
+            for pk, rank, headline in hits[offset:offset + limit]
+        ]
+
+    @staticmethod
+    def strip_html(field_name):
+        return Func(
+            F(field_name), Value('<[^>]+>'), Value(' '), Value('g'),
+            function='regexp_replace',
+            output_field=TextField()
+        )
+
+
+class SQLiteSearchBackend:
+    """FTS5 fallback so search works against the SQLite test and dev databases."""
+    table = 'experiments_experiment_fts'
+
+    def ensure_table(self, cursor):
+        cursor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} '
+            f"USING fts5(title, objective, body, tokenize='porter unicode61')"
+        )
+
+    def index(self, experiments):
+        rows = [(e.pk, *document_parts(e)) for e in experiments]
+        if not rows:
+            return 0
+        with connection.cursor() as cursor:
+            self.ensure_table(cursor)
+            cursor.executemany(
+                f'DELETE FROM {self.table} WHERE rowid = %s',
+                [(row[0],) for row in rows]
+            )
+            cursor.executemany(
+                f'INSERT INTO {self.table} (rowid, title, objective, body) '
+                f'VALUES (%s, %s, %s, %s)',
+                rows
+            )
+        return len(rows)
+
+    def remove(self, pks):
+        with connection.cursor() as cursor:
+            self.ensure_table(cursor)
+            cursor.executemany(
+                f'DELETE FROM {self.table} WHERE rowid = %s', [(pk,) for pk in pks]
+            )
+
+    def search(self, query, limit, offset=0):
+        match = self.match_expression(query)
+        if not match:
+            return []
+        with connection.cursor() as cursor:
+            self.ensure_table(cursor)
+            # bm25() is "lower is better"; negate it so both backends rank descending.
+            cursor.execute(
+                f'SELECT rowid, -bm25({self.table}, 10.0, 4.0, 1.0) AS rank, '
+                f"snippet({self.table}, -1, %s, %s, '…', 16) "
+                f'FROM {self.table} WHERE {self.table} MATCH %s '
+                f'ORDER BY rank DESC, rowid DESC LIMIT %s OFFSET %s',
+                [HIGHLIGHT_START, HIGHLIGHT_STOP, match, limit, offset]
+            )
+            return [
+                (pk, rank, render_headline(snippet))
+                for pk, rank, snippet in cursor.fetchall()
+            ]
+
+    @staticmethod
+    def match_expression(query):
+        # Quote every term so user input can't be parsed as FTS5 query syntax.
+        terms = [term.replace('"', '""') for term in query.split()]
+        return ' '.join(f'"{term}"' for term in terms if term)
+
+
+def get_search_backend():
+    if connection.vendor == 'postgresql':
+        return PostgresSearchBackend()
+    return SQLiteSearchBackend()
@@ -0,0 +1,236 @@
+import os
+
+from django.urls import reverse
+from rest_framework import serializers
+from taggit.serializers import TagListSerializerField, TaggitSerializer
+
+from protocols.models import Protocol
+from users.models import User
+from .models import (
+    AttachmentUpload, Experiment, ExperimentAttachment, ExperimentLog, ExperimentStep
+)
+from .uploads import chunk_size, max_file_size
+
+
+class ExperimentUserSerializer(serializers.ModelSerializer):
+    """
+    Compact user representation for embedding in experiment payloads.
+
+    Only reads columns of the user row itself, so it never triggers the
+    per-row ``profile`` lookup that ``users.serializers.UserSerializer`` does.
+    """
+    full_name = serializers.SerializerMethodField()
+
+    class Meta:
+        model = User
+        fields = ['id', 'username', 'full_name', 'role']
+        read_only_fields = fields
+
+    def get_full_name(self, obj):
+        return obj.get_full_name()
+
+
+class ExperimentProtocolSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Protocol
+        fields = ['id', 'name']
+        read_only_fields = fields
+
+
+class ExperimentListSerializer(serializers.ModelSerializer):
+    """
+    Read serializer for experiment lists.
+
+    Expects a queryset built with ``Experiment.objects.with_list_related()``;
+    every field below is served from the joined row, the prefetch cache or
+    an annotation.
+    """
+    created_by = ExperimentUserSerializer(read_only=True)
+    assigned_to = ExperimentUserSerializer(read_only=True)
+    collaborators = ExperimentUserSerializer(many=True, read_only=True)
+    protocol = ExperimentProtocolSerializer(read_only=True)
+    tags = TagListSerializerField(read_only=True)
+    step_count = serializers.IntegerField(read_only=True)
+    completed_step_count = serializers.IntegerField(read_only=True)
+    is_overdue = serializers.BooleanField(read_only=True)
+    duration_days = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Experiment
+        fields = [
+            'id', 'title', 'objective', 'status', 'priority',
+            'planned_start_date', 'planned_end_date',
+            'actual_start_date', 'actual_end_date',
+            'created_by', 'assigned_to', 'collaborators', 'protocol', 'tags',
+            'step_count', 'completed_step_count', 'is_overdue', 'duration_days',
+            'created_at', 'updated_at', 'is_archived'
+        ]
+        read_only_fields = fields
+
+
+class ExperimentDetailSerializer(ExperimentListSerializer):
+    class Meta(ExperimentListSerializer.Meta):
+        fields = ExperimentListSerializer.Meta.fields + [
+            'description', 'hypothesis', 'equipment_used', 'materials_used',
+            'results', 'conclusions', 'success_criteria'
+        ]
+        read_only_fields = fields
+
+
+class ExperimentSearchResultSerializer(ExperimentListSerializer):
+    rank = serializers.FloatField(read_only=True)
+    headline = serializers.CharField(read_only=True)
+
+    class Meta(ExperimentListSerializer.Meta):
+        fields = ExperimentListSerializer.Meta.fields + ['rank', 'headline']
+        read_only_fields = fields
+
+
+class ExperimentWriteSerializer(TaggitSerializer, serializers.ModelSerializer):
+    assigned_to = serializers.PrimaryKeyRelatedField(
+        queryset=User.objects.all(), allow_null=True, required=False
+    )
+    collaborators = serializers.PrimaryKeyRelatedField(
+        queryset=User.objects.all(), many=True, required=False
+    )
+    protocol = serializers.PrimaryKeyRelatedField(
+        queryset=Protocol.objects.all(), allow_null=True, required=False
+    )
+    tags = TagListSerializerField(required=False)
+
+    class Meta:
+        model = Experiment
+        fields = [
+            'id', 'title', 'description', 'objective', 'hypothesis',
+            'status', 'priority',
+            'planned_start_date', 'planned_end_date',
+            'actual_start_date', 'actual_end_date',
+            'assigned_to', 'collaborators', 'protocol', 'tags',
+            'equipment_used', 'materials_used',
+            'results', 'conclusions', 'success_criteria', 'is_archived'
+        ]
+        read_only_fields = ['id']
+
+    def validate(self, attrs):
+        start = attrs.get(
+            'planned_start_date', getattr(self.instance, 'planned_start_date', None)
+        )
+        end = attrs.get(
+            'planned_end_date', getattr(self.instance, 'planned_end_date', None)
+        )
+        if start and end and end < start:
+            raise serializers.ValidationError(
+                "Planned end date can't be before the start date"
+            )
+        return attrs
+
+
+class ExperimentLogSerializer(serializers.ModelSerializer):
+    user = ExperimentUserSerializer(read_only=True)
+
+    class Meta:
+        model = ExperimentLog
+        fields = ['id', 'user', 'action', 'details', 'timestamp', 'ip_address']
+        read_only_fields = fields
+
+
+class ExperimentHistorySerializer(serializers.ModelSerializer):
+    history_user = ExperimentUserSerializer(read_only=True)
+
+    class Meta:
+        model = Experiment.history.model
+        fields = [
+            'history_id', 'history_date', 'history_type', 'history_change_reason',
+            'history_user', 'title', 'status', 'priority',
+            'planned_start_date', 'planned_end_date',
+            'actual_start_date', 'actual_end_date', 'is_archived'
+        ]
+        read_only_fields = fields
+
+
+class ExperimentHistoryDetailSerializer(ExperimentHistorySerializer):
+    """
+    Full snapshot; expects the text fields attached by
+    ``experiments.history.attach_text``.
+    """
+    description = serializers.CharField(read_only=True)
+    results = serializers.CharField(read_only=True)
+
+    class Meta(ExperimentHistorySerializer.Meta):
+        fields = ExperimentHistorySerializer.Meta.fields + [
+            'objective', 'hypothesis', 'description', 'results',
+            'equipment_used', 'materials_used', 'conclusions', 'success_criteria'
+        ]
+        read_only_fields = fields
+
+
+class ExperimentStepSerializer(serializers.ModelSerializer):
+    step_number = serializers.IntegerField(min_value=1, required=False)
+
+    class Meta:
+        model = ExperimentStep
+        fields = [
+            'id', 'step_number', 'title', 'description',
+            'expected_duration', 'actual_duration',
+            'is_completed', 'completed_at', 'notes'
+        ]
+        read_only_fields = ['id']
+
+
+class ExperimentStepBulkSerializer(ExperimentStepSerializer):
+    """One entry of a full ordered step list; ``id`` refers to an existing step."""
+    id = serializers.IntegerField(required=False)
+
+    class Meta(ExperimentStepSerializer.Meta):
+        read_only_fields = []
+
+
+class ExperimentAttachmentSerializer(serializers.ModelSerializer):
+    uploaded_by = ExperimentUserSerializer(read_only=True)
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ExperimentAttachment
+        fields = [
+            'id', 'download_url', 'filename', 'file_type', 'file_size', 'checksum',
+            'description', 'uploaded_by', 'uploaded_at'
+        ]
+        read_only_fields = fields
+
+    def get_download_url(self, obj):
+        url = reverse(
+            'experiments:experiment-attachment-download',
+            kwargs={'pk': obj.experiment_id, 'attachment_pk': obj.pk}
+        )
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+
+class AttachmentUploadSerializer(serializers.ModelSerializer):
+    """An upload in progress; ``offset`` is where the next chunk starts."""
+    file_size = serializers.IntegerField(min_value=1)
+    chunk_size = serializers.SerializerMethodField()
+
+    class Meta:
+        model = AttachmentUpload
+        fields = [
+            'id', 'filename', 'file_type', 'description', 'file_size',
+            'offset', 'chunk_size', 'created_at', 'updated_at'
+        ]
+        read_only_fields = ['id', 'offset', 'created_at', 'updated_at']
+
+    def get_chunk_size(self, obj):
+        return chunk_size()
+
+    def validate_filename(self, value):
+        value = os.path.basename(value.replace('\\', '/')).strip()
+        if not value:
+            raise serializers.ValidationError('Invalid filename')
+        return value
+
+    def validate_file_size(self, value):
+        if value > max_file_size():
+            raise serializers.ValidationError(
+                f'Files may be at most {max_file_size()} bytes'
+            )
+        return value
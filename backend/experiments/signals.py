@@ -0,0 +1,29 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from simple_history.signals import post_create_historical_record
+
+from .history import record_text_revisions
+from .models import Experiment
+from .search import SEARCH_FIELDS, get_search_backend
+
+
+@receiver(post_save, sender=Experiment)
+def update_search_document(sender, instance, update_fields=None, **kwargs):
+    """Reindex the experiment when one of its searchable fields may have changed."""
+    if update_fields is not None and not set(update_fields) & set(SEARCH_FIELDS):
+        return
+    get_search_backend().index([instance])
+
+
+@receiver(post_delete, sender=Experiment)
+def remove_search_document(sender, instance, **kwargs):
+    get_search_backend().remove([instance.pk])
+
+
+@receiver(post_create_historical_record, sender=Experiment.history.model)
+def store_text_revisions(sender, instance, history_date, **kwargs):
+    """
+    Keep the rich-text fields left out of the historical row, compressed and
+    only on change.
+    """
+    record_text_revisions(instance, history_date)
@@ -0,0 +1,16 @@
+from celery import shared_task
+
+from .logs import flush_buffer
+from .uploads import discard_stale_uploads
+
+
+@shared_task(ignore_result=True)
+def flush_experiment_logs():
+    """Drain the write-behind ExperimentLog buffer into the database."""
+    return flush_buffer()
+
+
+@shared_task(ignore_result=True)
+def cleanup_stale_uploads():
+    """Remove abandoned attachment uploads and their part files."""
+    return discard_stale_uploads()
@@ -0,0 +1,232 @@
+"""
+Resumable, chunked attachment uploads.
+
+A client opens an ``AttachmentUpload`` with the final file size and then
+sends the file as raw ``application/octet-stream`` chunks, each tagged with
+the ``Upload-Offset`` it starts at. A chunk is streamed into a file of its
+own under ``ATTACHMENT_UPLOAD_TEMP_DIR`` and hashed while it is written, so
+it is never held in memory and no lock is held while the client sends it.
+Only then is the upload row locked, the offset checked again and the chunk
+appended to the part file, a local copy. An interrupted upload resumes from
+the offset the server reports; whatever part of a broken chunk did arrive is
+kept.
+
+A running SHA-256 can't be carried between requests that land on different
+workers, so the attachment checksum is a hash list: the SHA-256 of the
+concatenated raw chunk digests, stored as ``<hex>-<chunk count>`` (the S3
+multipart ETag scheme). Clients that want end-to-end verification send
+``Upload-Checksum: sha256 <base64 digest>`` with each chunk.
+
+The last chunk turns the part file into the attachment by hard-linking it
+into storage, which is why the temp dir defaults to a directory inside
+``MEDIA_ROOT``.
+"""
+import glob
+import hashlib
+import os
+import shutil
+import tempfile
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from .models import AttachmentUpload, ExperimentAttachment
+
+READ_SIZE = 1024 * 1024
+
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+DEFAULT_MAX_CHUNK_SIZE = 16 * 1024 * 1024
+DEFAULT_MAX_SIZE = 50 * 1024 * 1024 * 1024
+DEFAULT_EXPIRY_HOURS = 24
+
+
+class ChecksumMismatch(Exception):
+    pass
+
+
+Chunk = namedtuple('Chunk', ['path', 'size', 'digest'])
+
+
+def chunk_size():
+    """Chunk size advertised to clients."""
+    return getattr(settings, 'ATTACHMENT_UPLOAD_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+
+
+def max_chunk_size():
+    return getattr(settings, 'ATTACHMENT_UPLOAD_MAX_CHUNK_SIZE', DEFAULT_MAX_CHUNK_SIZE)
+
+
+def max_file_size():
+    return getattr(settings, 'ATTACHMENT_UPLOAD_MAX_SIZE', DEFAULT_MAX_SIZE)
+
+
+def temp_dir():
+    return getattr(
+        settings, 'ATTACHMENT_UPLOAD_TEMP_DIR',
+        os.path.join(settings.MEDIA_ROOT, 'attachment_uploads')
+    )
+
+
+def part_path(upload):
+    return os.path.join(temp_dir(), f'{upload.pk.hex}.part')
+
+
+def start_upload(**fields):
+    upload = AttachmentUpload.objects.create(**fields)
+    os.makedirs(temp_dir(), exist_ok=True)
+    open(part_path(upload), 'wb').close()
+    return upload
+
+
+def receive_chunk(upload, stream, length, expected_digest=None):
+    """
+    Stream up to ``length`` bytes from ``stream`` into a chunk file of their
+    own. Nothing shared is touched, so callers hold no lock.
+
+    Returns a ``Chunk``, or ``None`` if nothing arrived. The caller removes
+    the chunk file with ``discard_chunk``.
+    """
+    os.makedirs(temp_dir(), exist_ok=True)
+    fd, path = tempfile.mkstemp(
+        prefix=f'{upload.pk.hex}.', suffix='.chunk', dir=temp_dir()
+    )
+    sha = hashlib.sha256()
+    written = 0
+    try:
+        with os.fdopen(fd, 'wb') as chunk:
+            try:
+                while written < length:
+                    data = stream.read(min(READ_SIZE, length - written))
+                    if not data:
+                        break
+                    chunk.write(data)
+                    sha.update(data)
+                    written += len(data)
+            except OSError:
+                # Client went away mid-chunk; keep what arrived.
+                pass
+    except BaseException:
+        os.remove(path)
+        raise
+
+    digest = sha.digest()
+    mismatch = written < length or digest != expected_digest
+    if expected_digest is not None and mismatch:
+        os.remove(path)
+        raise ChecksumMismatch
+    if not written:
+        os.remove(path)
+        return None
+    return Chunk(path, written, digest)
+
+
+def append_chunk(upload, chunk):
+    """
+    Append a received chunk to the part file at ``upload.offset``.
+
+    Callers hold a row lock on ``upload``.
+    """
+    with open(part_path(upload), 'r+b') as part, open(chunk.path, 'rb') as source:
+        # Drop the tail of an earlier chunk that was written but never recorded.
+        part.truncate(upload.offset)
+        part.seek(upload.offset)
+        shutil.copyfileobj(source, part, READ_SIZE)
+        part.flush()
+        os.fsync(part.fileno())
+
+    upload.offset += chunk.size
+    upload.part_digests.append(chunk.digest.hex())
+    upload.save(update_fields=['offset', 'part_digests', 'updated_at'])
+
+
+def discard_chunk(chunk):
+    if chunk is None:
+        return
+    try:
+        os.remove(chunk.path)
+    except FileNotFoundError:
+        pass
+
+
+def combined_checksum(part_digests):
+    joined = b''.join(bytes.fromhex(value) for value in part_digests)
+    return f'{hashlib.sha256(joined).hexdigest()}-{len(part_digests)}'
+
+
+def store_part(upload):
+    """Move the part file into attachment storage and return its storage name."""
+    source = part_path(upload)
+    field = ExperimentAttachment._meta.get_field('file')
+    name = field.generate_filename(None, upload.filename)
+
+    try:
+        default_storage.path(name)
+    except NotImplementedError:
+        # Remote storage: it has to be copied after all.
+        with open(source, 'rb') as part:
+            name = default_storage.save(name, File(part))
+        os.remove(source)
+        return name
+
+    while True:
+        name = default_storage.get_available_name(name)
+        path = default_storage.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            # Unlike a rename, link() never replaces a file that appeared meanwhile.
+            os.link(source, path)
+        except FileExistsError:
+            continue
+        break
+    os.remove(source)
+    if settings.FILE_UPLOAD_PERMISSIONS is not None:
+        os.chmod(path, settings.FILE_UPLOAD_PERMISSIONS)
+    return name
+
+
+def finish_upload(upload):
+    """Turn a complete upload into an ``ExperimentAttachment``."""
+    attachment = ExperimentAttachment.objects.create(
+        experiment_id=upload.experiment_id,
+        file=store_part(upload),
+        filename=upload.filename,
+        file_type=upload.file_type,
+        file_size=upload.file_size,
+        checksum=combined_checksum(upload.part_digests),
+        uploaded_by_id=upload.uploaded_by_id,
+        description=upload.description,
+    )
+    upload.delete()
+    return attachment
+
+
+def discard_upload(upload):
+    # Chunk files are left behind only by requests that died mid-way.
+    pattern = os.path.join(temp_dir(), f'{upload.pk.hex}.*.chunk')
+    for path in [part_path(upload), *glob.glob(pattern)]:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+    upload.delete()
+
+
+def discard_stale_uploads(max_age=None):
+    """
+    Remove uploads that haven't received a chunk within ``max_age``. Returns
+    how many.
+    """
+    if max_age is None:
+        max_age = timedelta(hours=getattr(
+            settings, 'ATTACHMENT_UPLOAD_EXPIRY_HOURS', DEFAULT_EXPIRY_HOURS
+        ))
+    stale = AttachmentUpload.objects.filter(updated_at__lt=timezone.now() - max_age)
+    count = 0
+    for upload in stale.iterator():
+        discard_upload(upload)
+        count += 1
+    return count
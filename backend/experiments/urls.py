@@ -0,0 +1,62 @@
+from django.urls import path, include
+from rest_framework.routers import SimpleRouter
+from . import views
+
+app_name = 'experiments'
+
+router = SimpleRouter()
+router.register('experiments', views.ExperimentViewSet, basename='experiment')
+
+urlpatterns = [
+    path(
+        'experiments/<int:pk>/logs/',
+        views.ExperimentLogListView.as_view(),
+        name='experiment-logs'
+    ),
+    path(
+        'experiments/<int:pk>/history/',
+        views.ExperimentHistoryListView.as_view(),
+        name='experiment-history'
+    ),
+    path(
+        'experiments/<int:pk>/history/<int:history_id>/',
+        views.ExperimentHistoryDetailView.as_view(),
+        name='experiment-history-detail'
+    ),
+    path(
+        'experiments/<int:pk>/steps/',
+        views.ExperimentStepListView.as_view(),
+        name='experiment-steps'
+    ),
+    path(
+        'experiments/<int:pk>/steps/<int:step_pk>/',
+        views.ExperimentStepDetailView.as_view(),
+        name='experiment-step-detail'
+    ),
+    path(
+        'experiments/<int:pk>/attachments/',
+        views.ExperimentAttachmentListView.as_view(),
+        name='experiment-attachments'
+    ),
+    path(
+        'experiments/<int:pk>/attachments/<int:attachment_pk>/',
+        views.ExperimentAttachmentDetailView.as_view(),
+        name='experiment-attachment-detail'
+    ),
+    path(
+        'experiments/<int:pk>/attachments/<int:attachment_pk>/download/',
+        views.ExperimentAttachmentDownloadView.as_view(),
+        name='experiment-attachment-download'
+    ),
+    path(
+        'experiments/<int:pk>/attachments/uploads/',
+        views.AttachmentUploadListView.as_view(),
+        name='experiment-attachment-uploads'
+    ),
+    path(
+        'experiments/<int:pk>/attachments/uploads/<uuid:upload_id>/',
+        views.AttachmentUploadDetailView.as_view(),
+        name='experiment-attachment-upload-detail'
+    ),
+    path('', include(router.urls)),
+]
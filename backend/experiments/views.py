@@ -0,0 +1,573 @@
+import base64
+import binascii
+from collections import OrderedDict
+
+from rest_framework import viewsets, generics, permissions, status
+from rest_framework.decorators import action
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from django.db import transaction
+from django.db.models import Max
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework.filters import SearchFilter, OrderingFilter
+
+from users.lockout import client_ip
+from users.permissions import CanCreateExperiments, IsExperimentMemberOrModerator
+from .downloads import attachment_response
+from .history import attach_text
+from .logs import log_experiment_action
+from .models import (
+    AttachmentUpload, Experiment, ExperimentAttachment, ExperimentLog, ExperimentStep
+)
+from .pagination import OptionalKeysetPagination
+from .search import get_search_backend
+from .serializers import (
+    ExperimentListSerializer, ExperimentDetailSerializer, ExperimentWriteSerializer,
+    ExperimentSearchResultSerializer,
+    ExperimentLogSerializer, ExperimentHistorySerializer,
+    ExperimentHistoryDetailSerializer,
+    ExperimentStepSerializer, ExperimentStepBulkSerializer,
+    ExperimentAttachmentSerializer, AttachmentUploadSerializer
+)
+from .uploads import (
+    ChecksumMismatch, append_chunk, discard_chunk, discard_upload, finish_upload,
+    max_chunk_size, receive_chunk, start_upload
+)
+
+
+def log_action(request, experiment_id, action, details=''):
+    log_experiment_action(
+        experiment_id,
+        request.user.pk,
+        action,
+        details=details,
+        ip_address=client_ip(request)
+    )
+
+
+STEP_FIELDS = [
+    'title', 'description', 'expected_duration', 'actual_duration',
+    'is_completed', 'completed_at', 'notes'
+]
+
+
+class ExperimentViewSet(viewsets.ModelViewSet):
+    """
+    Experiments CRUD.
+
+    Reads go through ``Experiment.objects.with_list_related()``, so list and
+    detail responses cost a constant number of queries per request. Writes
+    need ``CanCreateExperiments``, and an existing experiment can only be
+    changed or deleted by its creator, assignee or collaborators, or by a
+    moderator.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filterset_fields = [
+        'status', 'priority', 'assigned_to', 'created_by', 'protocol', 'is_archived'
+    ]
+    search_fields = ['title', 'objective']
+    ordering_fields = [
+        'created_at', 'updated_at', 'planned_start_date', 'planned_end_date',
+        'priority', 'status', 'annotated_duration_days'
+    ]
+    ordering = ['-created_at']
+    pagination_class = OptionalKeysetPagination
+    keyset_ordering = '-created_at'
+
+    def get_queryset(self):
+        return Experiment.objects.with_list_related().with_duration().with_overdue()
+
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return ExperimentListSerializer
+        if self.action in ['create', 'update', 'partial_update']:
+            return ExperimentWriteSerializer
+        return ExperimentDetailSerializer
+
+    def get_permissions(self):
+        if self.request.method in permissions.SAFE_METHODS:
+            return super().get_permissions()
+        return [
+            permissions.IsAuthenticated(),
+            CanCreateExperiments(),
+            IsExperimentMemberOrModerator(),
+        ]
+
+    def perform_create(self, serializer):
+        experiment = serializer.save(created_by=self.request.user)
+        log_action(self.request, experiment.pk, 'created')
+
+    def perform_update(self, serializer):
+        experiment = serializer.save()
+        changed = ', '.join(sorted(serializer.validated_data))
+        log_action(self.request, experiment.pk, 'updated', changed)
+
+    @action(detail=False, methods=['get'])
+    def overdue(self, request):
+        """In-progress experiments past their planned end date, most overdue first."""
+        queryset = self.get_queryset().overdue().order_by('planned_end_date', 'pk')
+        page = self.paginate_queryset(queryset)
+        serializer = ExperimentListSerializer(
+            page, many=True, context=self.get_serializer_context()
+        )
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """Ranked full-text search with highlighted snippets: ``?q=...&page=N``."""
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response(
+                {'error': 'Query parameter q is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        paginator = PageNumberPagination()
+        page_size = paginator.get_page_size(request)
+        try:
+            page_number = max(int(request.query_params.get('page', 1)), 1)
+        except ValueError:
+            page_number = 1
+        offset = (page_number - 1) * page_size
+
+        hits = get_search_backend().search(query, limit=page_size + 1, offset=offset)
+        has_next = len(hits) > page_size
+        hits = hits[:page_size]
+
+        experiments = self.get_queryset().in_bulk([pk for pk, _, _ in hits])
+        results = []
+        for pk, rank, headline in hits:
+            experiment = experiments.get(pk)
+            if experiment is None:
+                continue
+            experiment.rank = rank
+            experiment.headline = headline
+            results.append(experiment)
+
+        url = request.build_absolute_uri()
+        if page_number == 1:
+            previous_link = None
+        elif page_number == 2:
+            previous_link = remove_query_param(url, 'page')
+        else:
+            previous_link = replace_query_param(url, 'page', page_number - 1)
+
+        next_link = None
+        if has_next:
+            next_link = replace_query_param(url, 'page', page_number + 1)
+        serializer = ExperimentSearchResultSerializer(
+            results, many=True, context={'request': request}
+        )
+        return Response(OrderedDict([
+            ('next', next_link),
+            ('previous', previous_link),
+            ('results', serializer.data),
+        ]))
+
+
+class ExperimentLogListView(generics.ListAPIView):
+    """Activity log of one experiment, newest first."""
+    serializer_class = ExperimentLogSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = OptionalKeysetPagination
+    keyset_ordering = '-timestamp'
+
+    def get_queryset(self):
+        experiment = get_object_or_404(
+            Experiment.objects.only('pk'), pk=self.kwargs['pk']
+        )
+        return ExperimentLog.objects.filter(
+            experiment=experiment
+        ).select_related('user').order_by('-timestamp', '-id')
+
+
+class ExperimentHistoryListView(generics.ListAPIView):
+    """Revision history of one experiment, newest first."""
+    serializer_class = ExperimentHistorySerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = OptionalKeysetPagination
+    keyset_ordering = '-history_date'
+
+    def get_queryset(self):
+        experiment = get_object_or_404(
+            Experiment.objects.only('pk'), pk=self.kwargs['pk']
+        )
+        return experiment.history.select_related('history_user').order_by(
+            '-history_date', '-history_id'
+        )
+
+
+class ExperimentHistoryDetailView(generics.RetrieveAPIView):
+    """One revision of an experiment, rebuilt with its rich-text fields."""
+    serializer_class = ExperimentHistoryDetailSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_object(self):
+        record = get_object_or_404(
+            Experiment.history.select_related('history_user'),
+            id=self.kwargs['pk'],
+            history_id=self.kwargs['history_id']
+        )
+        attach_text([record])
+        return record
+
+
+class ExperimentStepMixin:
+    """
+    Shared plumbing for the step endpoints.
+
+    Every write locks the parent experiment row first, so concurrent edits of
+    the same step list are serialized instead of racing on step numbers.
+    """
+    serializer_class = ExperimentStepSerializer
+    pagination_class = None
+
+    def get_permissions(self):
+        if self.request.method in permissions.SAFE_METHODS:
+            return [permissions.IsAuthenticated()]
+        return [permissions.IsAuthenticated(), CanCreateExperiments()]
+
+    def get_queryset(self):
+        return ExperimentStep.objects.filter(experiment_id=self.kwargs['pk'])
+
+    def lock_experiment(self):
+        return get_object_or_404(
+            Experiment.objects.select_for_update().only('pk'), pk=self.kwargs['pk']
+        )
+
+    def refresh_step_number(self, step):
+        """
+        Re-read ``step_number`` once the experiment is locked; the value loaded
+        before the lock may be stale if another request renumbered the steps.
+        """
+        try:
+            step.refresh_from_db(fields=['step_number'])
+        except ExperimentStep.DoesNotExist:
+            raise Http404
+
+    def last_step_number(self, experiment):
+        return ExperimentStep.objects.filter(experiment=experiment).aggregate(
+            last=Max('step_number')
+        )['last'] or 0
+
+
+class ExperimentStepListView(ExperimentStepMixin, generics.ListCreateAPIView):
+    """
+    Steps of one experiment.
+
+    ``POST`` takes one step (inserted at ``step_number``, appended by default)
+    or a list of steps to append. ``PUT`` takes the full ordered list: entries
+    with an ``id`` are updated and renumbered, entries without one are
+    created, and steps left out are deleted.
+    """
+
+    def get_queryset(self):
+        get_object_or_404(Experiment.objects.only('pk'), pk=self.kwargs['pk'])
+        return super().get_queryset()
+
+    def create(self, request, *args, **kwargs):
+        many = isinstance(request.data, list)
+        serializer = self.get_serializer(data=request.data, many=many)
+        serializer.is_valid(raise_exception=True)
+
+        with transaction.atomic():
+            experiment = self.lock_experiment()
+            last = self.last_step_number(experiment)
+            if many:
+                steps = ExperimentStep.objects.bulk_create([
+                    ExperimentStep(
+                        experiment=experiment,
+                        step_number=last + offset,
+                        **{field: item[field] for field in STEP_FIELDS if field in item}
+                    )
+                    for offset, item in enumerate(serializer.validated_data, start=1)
+                ])
+                data = ExperimentStepSerializer(steps, many=True).data
+                log_action(request, experiment.pk, 'steps_added', f'{len(steps)} steps')
+            else:
+                position = serializer.validated_data.get('step_number')
+                if position is None or position > last:
+                    position = last + 1
+                else:
+                    ExperimentStep.objects.shift(experiment, position, 1)
+                step = serializer.save(experiment=experiment, step_number=position)
+                data = serializer.data
+                log_action(
+                    request, experiment.pk, 'step_added',
+                    f'Step {step.step_number}: {step.title}'
+                )
+
+        return Response(data, status=status.HTTP_201_CREATED)
+
+    def put(self, request, *args, **kwargs):
+        serializer = ExperimentStepBulkSerializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        items = serializer.validated_data
+
+        ids = [item['id'] for item in items if item.get('id') is not None]
+        if len(ids) != len(set(ids)):
+            return Response(
+                {'error': 'Duplicate step ids'}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        with transaction.atomic():
+            experiment = self.lock_experiment()
+            found = self.get_queryset().filter(pk__in=ids).values_list('pk', flat=True)
+            unknown = set(ids) - set(found)
+            if unknown:
+                return Response(
+                    {'error': f'Steps not found: {sorted(unknown)}'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            steps = ExperimentStep.objects.replace_all(experiment, items, STEP_FIELDS)
+            log_action(request, experiment.pk, 'steps_replaced', f'{len(steps)} steps')
+
+        return Response(ExperimentStepSerializer(steps, many=True).data)
+
+
+class ExperimentStepDetailView(
+    ExperimentStepMixin, generics.RetrieveUpdateDestroyAPIView
+):
+    """A single step; changing ``step_number`` moves it within the list."""
+    lookup_url_kwarg = 'step_pk'
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            experiment = self.lock_experiment()
+            # Always, so serializer.save() doesn't write a stale number back.
+            self.refresh_step_number(serializer.instance)
+            position = serializer.validated_data.pop('step_number', None)
+            if position is not None:
+                position = min(position, self.last_step_number(experiment))
+                ExperimentStep.objects.move(serializer.instance, position)
+            step = serializer.save()
+            log_action(
+                self.request, experiment.pk, 'step_updated',
+                f'Step {step.step_number}: {step.title}'
+            )
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            experiment = self.lock_experiment()
+            self.refresh_step_number(instance)
+            number = instance.step_number
+            instance.delete()
+            ExperimentStep.objects.shift(experiment, number + 1, -1)
+            log_action(
+                self.request, experiment.pk, 'step_deleted',
+                f'Step {number}: {instance.title}'
+            )
+
+
+class ExperimentAttachmentMixin:
+    def get_permissions(self):
+        if self.request.method in permissions.SAFE_METHODS:
+            return [permissions.IsAuthenticated()]
+        return [permissions.IsAuthenticated(), CanCreateExperiments()]
+
+    def get_experiment(self):
+        return get_object_or_404(Experiment.objects.only('pk'), pk=self.kwargs['pk'])
+
+
+class ExperimentAttachmentListView(ExperimentAttachmentMixin, generics.ListAPIView):
+    """Attachments of one experiment; new ones arrive through the upload endpoints."""
+    serializer_class = ExperimentAttachmentSerializer
+    pagination_class = None
+
+    def get_queryset(self):
+        return ExperimentAttachment.objects.filter(
+            experiment=self.get_experiment()
+        ).select_related('uploaded_by')
+
+
+class ExperimentAttachmentDetailView(
+    ExperimentAttachmentMixin, generics.RetrieveDestroyAPIView
+):
+    serializer_class = ExperimentAttachmentSerializer
+    lookup_url_kwarg = 'attachment_pk'
+
+    def get_queryset(self):
+        return ExperimentAttachment.objects.filter(
+            experiment_id=self.kwargs['pk']
+        ).select_related('uploaded_by')
+
+    def perform_destroy(self, instance):
+        instance.file.delete(save=False)
+        instance.delete()
+        log_action(
+            self.request, instance.experiment_id, 'attachment_deleted',
+            instance.filename
+        )
+
+
+class ExperimentAttachmentDownloadView(
+    ExperimentAttachmentMixin, generics.GenericAPIView
+):
+    """
+    The file of an attachment.
+
+    Supports ``Range`` and conditional requests; in production the transfer
+    itself is handed to nginx (see ``experiments.downloads``).
+    """
+    lookup_url_kwarg = 'attachment_pk'
+
+    def get_queryset(self):
+        return ExperimentAttachment.objects.filter(experiment_id=self.kwargs['pk'])
+
+    def get(self, request, *args, **kwargs):
+        return attachment_response(request, self.get_object())
+
+
+class AttachmentUploadListView(ExperimentAttachmentMixin, generics.CreateAPIView):
+    """
+    Start a resumable upload.
+
+    ``POST`` the ``filename``, ``file_size`` and optional ``file_type`` and
+    ``description``; the response carries the upload ``id`` and the
+    ``chunk_size`` to send the file in.
+    """
+    serializer_class = AttachmentUploadSerializer
+
+    def perform_create(self, serializer):
+        serializer.instance = start_upload(
+            experiment=self.get_experiment(),
+            uploaded_by=self.request.user,
+            **serializer.validated_data
+        )
+
+
+class AttachmentUploadDetailView(ExperimentAttachmentMixin, generics.GenericAPIView):
+    """
+    One upload in progress.
+
+    ``GET`` reports the ``offset`` to resume from. ``PUT`` appends a chunk:
+    the raw bytes as the request body, the position in ``Upload-Offset`` and
+    optionally ``Upload-Checksum: sha256 <base64>``. A chunk that does not
+    start at the current offset gets ``409`` with the offset to resume from.
+    The chunk completing the file returns the new attachment with ``201``.
+    ``DELETE`` abandons the upload.
+
+    The chunk is received before the upload row is locked; the lock is only
+    held to check the offset again and append the chunk.
+    """
+    serializer_class = AttachmentUploadSerializer
+    lookup_url_kwarg = 'upload_id'
+
+    def get_permissions(self):
+        return [permissions.IsAuthenticated(), CanCreateExperiments()]
+
+    def get_queryset(self):
+        return AttachmentUpload.objects.filter(
+            experiment_id=self.kwargs['pk'],
+            uploaded_by=self.request.user
+        )
+
+    def get(self, request, *args, **kwargs):
+        return Response(self.get_serializer(self.get_object()).data)
+
+    def put(self, request, *args, **kwargs):
+        try:
+            offset = int(request.headers['Upload-Offset'])
+            length = int(request.headers.get('Content-Length') or 0)
+        except (KeyError, ValueError):
+            return Response(
+                {'error': 'Upload-Offset and Content-Length headers are required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if length < 0:
+            return Response(
+                {'error': 'Content-Length must not be negative'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if length > max_chunk_size():
+            return Response(
+                {'error': f'Chunks may be at most {max_chunk_size()} bytes'},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+            )
+
+        expected_digest = None
+        if 'Upload-Checksum' in request.headers:
+            algorithm, _, value = request.headers['Upload-Checksum'].partition(' ')
+            try:
+                expected_digest = base64.b64decode(value, validate=True)
+            except binascii.Error:
+                algorithm = None
+            if algorithm != 'sha256':
+                return Response(
+                    {'error': 'Upload-Checksum must be "sha256 <base64 digest>"'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+        uploads = self.get_queryset().filter(pk=self.kwargs['upload_id'])
+        upload = uploads.first()
+        error = self.check_chunk(upload, offset, length)
+        if error is not None:
+            return error
+
+        try:
+            chunk = receive_chunk(upload, request.stream, length, expected_digest)
+        except ChecksumMismatch:
+            return Response(
+                {'error': 'Chunk checksum mismatch', 'offset': upload.offset},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            with transaction.atomic():
+                # Another request may have moved the upload on meanwhile.
+                upload = uploads.select_for_update().first()
+                error = self.check_chunk(upload, offset, chunk.size if chunk else 0)
+                if error is not None:
+                    return error
+                if chunk is not None:
+                    append_chunk(upload, chunk)
+                if not upload.is_complete:
+                    return Response(self.get_serializer(upload).data)
+
+                attachment = finish_upload(upload)
+                log_action(
+                    request, attachment.experiment_id, 'attachment_added',
+                    attachment.filename
+                )
+        finally:
+            discard_chunk(chunk)
+
+        serializer = ExperimentAttachmentSerializer(
+            attachment, context=self.get_serializer_context()
+        )
+        return Response(
+            serializer.data,
+            status=status.HTTP_201_CREATED
+        )
+
+    def check_chunk(self, upload, offset, length):
+        if upload is None:
+            return Response(
+                {'error': 'Upload not found'}, status=status.HTTP_404_NOT_FOUND
+            )
+        if offset != upload.offset:
+            return Response(
+                {
+                    'error': 'Chunk does not start at the upload offset',
+                    'offset': upload.offset,
+                },
+                status=status.HTTP_409_CONFLICT
+            )
+        if offset + length > upload.file_size:
+            return Response(
+                {
+                    'error': 'Chunk runs past the declared file size',
+                    'offset': upload.offset,
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return None
+
+    def delete(self, request, *args, **kwargs):
+        with transaction.atomic():
+            discard_upload(self.get_object())
+        return Response(status=status.HTTP_204_NO_CONTENT)
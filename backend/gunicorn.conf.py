@@ -1,14 +1,39 @@
 # Gunicorn configuration file
+import gc
 import multiprocessing
 import os
+import time
 
 # Server socket
 bind = "0.0.0.0:8000"
 backlog = 2048
 
 # Worker processes
-workers = multiprocessing.cpu_count() * 2 + 1
-worker_class = "sync"
+# ASGI profile: GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker with
+# labjournal.asgi_prod:application. An async worker keeps many I/O-bound
+# requests in flight, so it needs fewer processes than sync workers.
+# Threaded profile: GUNICORN_WORKER_CLASS=gthread. Each worker serves
+# GUNICORN_THREADS requests at once from one database pool (see
+# labjournal/pooled_postgresql), so adding threads doesn't add Postgres
+# connections beyond DB_POOL_MAX_SIZE per worker.
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "sync")
+if worker_class == "sync":
+    workers = multiprocessing.cpu_count() * 2 + 1
+else:
+    workers = multiprocessing.cpu_count() + 1
+workers = int(os.environ.get("GUNICORN_WORKERS", workers))
+threads = int(os.environ.get("GUNICORN_THREADS", 4 if worker_class == "gthread" else 1))
+# Database pool size per worker. Sync and gthread workers need no more
+# connections than threads that can use them. Under uvicorn every in-flight
+# request that touches the ORM runs it in its own thread and holds a
+# connection meanwhile, so the pool matches the requests expected to be in
+# flight at once. Set DB_POOL_MAX_SIZE lower to cap Postgres connections at
+# the cost of checkout waits; the /ready/ probe brings its own connection.
+if "uvicorn" in worker_class.lower():
+    db_pool_size = int(os.environ.get("GUNICORN_ASYNC_DB_CONNECTIONS", 10))
+else:
+    db_pool_size = threads
+os.environ.setdefault("DB_POOL_MAX_SIZE", str(db_pool_size))
 worker_connections = 1000
 max_requests = 1000
 max_requests_jitter = 50
@@ -59,3 +84,69 @@ statsd_prefix = "gunicorn"
 # Health check
 health_check_uri = "/health/"
 health_check_timeout = 10
+
+# Metrics
+# Every worker writes its Prometheus samples to files in this directory and
+# /metrics/ adds them up (labjournal/metrics.py). It has to be set before
+# the application is imported; on_starting empties it, so counters start
+# at zero with the server.
+prometheus_multiproc_dir = os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR", "/dev/shm/labjournal-metrics"
+)
+os.makedirs(prometheus_multiproc_dir, exist_ok=True)
+
+
+def on_starting(server):
+    for name in os.listdir(prometheus_multiproc_dir):
+        if name.endswith(".db"):
+            os.remove(os.path.join(prometheus_multiproc_dir, name))
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
+
+
+# Pre-fork warmup
+# With preload_app the master builds Django's lazily built caches once
+# (labjournal/warmup.py) and freezes its heap, so every worker, including
+# those forked again after max_requests, starts warm and shares those pages
+# instead of copying them. GUNICORN_WARMUP=0 turns it off, to compare the
+# memory and first-request latency every worker logs.
+warmup = os.environ.get("GUNICORN_WARMUP", "1") != "0"
+
+
+def when_ready(server):
+    if preload_app and warmup:
+        from labjournal.warmup import warm_up
+        warm_up()
+        gc.collect()
+        gc.freeze()
+
+
+def pre_fork(server, worker):
+    # Also freeze what the master allocated since the last fork.
+    if preload_app and warmup:
+        gc.freeze()
+
+
+def post_worker_init(worker):
+    from labjournal.warmup import memory_usage
+    worker.log.info("Worker %s started, memory %s kB", worker.pid, memory_usage())
+
+
+def pre_request(worker, req):
+    if not hasattr(worker, "first_request_started"):
+        worker.first_request_started = time.perf_counter()
+
+
+def post_request(worker, req, environ, resp):
+    if getattr(worker, "first_request_logged", False):
+        return
+    worker.first_request_logged = True
+    from labjournal.warmup import memory_usage
+    elapsed_ms = (time.perf_counter() - worker.first_request_started) * 1000
+    worker.log.info(
+        "Worker %s first request %s took %.1f ms, memory %s kB",
+        worker.pid, req.path, elapsed_ms, memory_usage(),
+    )
@@ -0,0 +1,62 @@
+"""
+ASGI config for labjournal production.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Served by gunicorn with uvicorn workers (see gunicorn.conf.py). The
+read-heavy user endpoints are async views here, so one worker can wait on
+many database and cache calls at once; everything else runs as under WSGI.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
+"""
+
+import asyncio
+import os
+import sys
+
+# Add the project directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Set the Django settings module for production
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'labjournal.settings_prod')
+# Switches on the async views and drops sync-only middleware (see settings)
+os.environ['ASGI_SERVER'] = 'True'
+
+from django.core.asgi import get_asgi_application
+
+django_application = get_asgi_application()
+
+from labjournal.health import HEALTH_PATH, READY_PATH, readiness
+
+HEALTH_START = {
+    'type': 'http.response.start',
+    'status': 200,
+    'headers': [(b'content-type', b'text/plain'), (b'content-length', b'2')],
+}
+HEALTH_BODY = {'type': 'http.response.body', 'body': b'OK'}
+
+
+async def application(scope, receive, send):
+    """Answer the liveness and readiness probes without going through Django."""
+    if scope['type'] == 'http':
+        path = scope['path']
+        if path == HEALTH_PATH:
+            await send(HEALTH_START)
+            await send(HEALTH_BODY)
+            return
+        if path == READY_PATH:
+            if readiness.result is None:
+                await asyncio.to_thread(readiness.wait_for_first_result)
+            code, body = readiness.response()
+            await send({
+                'type': 'http.response.start',
+                'status': code,
+                'headers': [
+                    (b'content-type', b'application/json'),
+                    (b'content-length', str(len(body)).encode()),
+                    (b'cache-control', b'no-store'),
+                ],
+            })
+            await send({'type': 'http.response.body', 'body': body})
+            return
+    await django_application(scope, receive, send)
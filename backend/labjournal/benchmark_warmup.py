@@ -0,0 +1,158 @@
+"""
+Compare gunicorn workers with and without the pre-fork warmup.
+
+Starts the server from ``gunicorn.conf.py`` once with ``GUNICORN_WARMUP=0``
+and once with ``GUNICORN_WARMUP=1``, sends every worker its first request
+and prints, per worker, the memory it logged at start and after that
+request (see ``labjournal/warmup.py``) and how long the request took::
+
+    python -m labjournal.benchmark_warmup --workers 3 --path /api/users/
+
+Run it from ``backend/`` with the settings the server would use. Each run
+binds its own port and Prometheus directory, so it can run next to a live
+server; the database and caches are not touched unless the path does.
+"""
+import argparse
+import ast
+import os
+import re
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from statistics import mean
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STARTED = re.compile(r'Worker (\d+) started, memory (\{.*\}) kB')
+FIRST_REQUEST = re.compile(
+    r'Worker (\d+) first request \S+ took ([\d.]+) ms, memory (\{.*\}) kB'
+)
+
+COLUMNS = (
+    ('pid', 'pid'),
+    ('first request ms', 'first_ms'),
+    ('rss start', 'rss_start'),
+    ('rss after', 'rss_after'),
+    ('private after', 'private_after'),
+    ('pss after', 'pss_after'),
+)
+
+
+def parse_workers(log):
+    """Per-worker memory and first-request latency from the server log."""
+    workers = {}
+    for match in STARTED.finditer(log):
+        memory = ast.literal_eval(match.group(2))
+        workers[match.group(1)] = {
+            'pid': int(match.group(1)), 'rss_start': memory.get('rss'),
+        }
+    for match in FIRST_REQUEST.finditer(log):
+        memory = ast.literal_eval(match.group(3))
+        workers.setdefault(match.group(1), {'pid': int(match.group(1))}).update(
+            first_ms=float(match.group(2)),
+            rss_after=memory.get('rss'),
+            private_after=memory.get('private'),
+            pss_after=memory.get('pss'),
+        )
+    return workers
+
+
+def request(url):
+    try:
+        with urllib.request.urlopen(url, timeout=10) as response:
+            response.read()
+    except urllib.error.HTTPError:
+        # Any status will do; the request went through the whole stack.
+        pass
+
+
+def wait_for(log_path, pattern, count, timeout, while_waiting=None):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with open(log_path) as log:
+            if len(pattern.findall(log.read())) >= count:
+                return True
+        if while_waiting is not None:
+            while_waiting()
+        else:
+            time.sleep(0.2)
+    return False
+
+
+def run(warmup, options):
+    port = options.port + int(warmup)
+    url = f'http://127.0.0.1:{port}{options.path}'
+    with tempfile.TemporaryDirectory() as scratch:
+        log_path = os.path.join(scratch, 'gunicorn.log')
+        metrics_dir = os.path.join(scratch, 'metrics')
+        os.mkdir(metrics_dir)
+        env = dict(
+            os.environ,
+            GUNICORN_WARMUP=str(int(warmup)),
+            PROMETHEUS_MULTIPROC_DIR=metrics_dir,
+        )
+        command = [
+            sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py',
+            '--bind', f'127.0.0.1:{port}', '--workers', str(options.workers),
+            '--pid', os.path.join(scratch, 'gunicorn.pid'), options.app,
+        ]
+        with open(log_path, 'w') as log:
+            server = subprocess.Popen(
+                command, cwd=BASE_DIR, env=env, stdout=log, stderr=subprocess.STDOUT
+            )
+            try:
+                if not wait_for(log_path, STARTED, options.workers, options.timeout):
+                    with open(log_path) as output:
+                        raise RuntimeError(f'Workers did not start:\n{output.read()}')
+                # One request at a time, so first requests don't compete for
+                # CPU; idle workers take turns accepting until each had one.
+                wait_for(
+                    log_path, FIRST_REQUEST, options.workers, options.timeout,
+                    while_waiting=lambda: request(url)
+                )
+            finally:
+                server.send_signal(signal.SIGTERM)
+                server.wait(timeout=30)
+        with open(log_path) as output:
+            return parse_workers(output.read())
+
+
+def print_table(title, workers):
+    print(title)
+    print('  '.join(f'{header:>16}' for header, _ in COLUMNS))
+    rows = sorted(workers.values(), key=lambda worker: worker['pid'])
+    for worker in rows:
+        print('  '.join(f'{str(worker.get(key, "-")):>16}' for _, key in COLUMNS))
+    means = []
+    for _, key in COLUMNS[1:]:
+        values = [worker[key] for worker in rows if worker.get(key) is not None]
+        means.append(f'{mean(values):.1f}' if values else '-')
+    print('  '.join(f'{value:>16}' for value in ['mean', *means]))
+    print()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, default=3)
+    parser.add_argument('--path', default='/api/users/')
+    parser.add_argument('--app', default='labjournal.wsgi:application')
+    parser.add_argument(
+        '--port', type=int, default=8765,
+        help='Port of the run without warmup; the other run uses the next one'
+    )
+    parser.add_argument('--timeout', type=float, default=60.0)
+    options = parser.parse_args(argv)
+
+    print(f'{options.workers} workers, first request: GET {options.path}; memory in kB')
+    print()
+    for warmup in (False, True):
+        workers = run(warmup, options)
+        print_table(f'GUNICORN_WARMUP={int(warmup)}', workers)
+
+
+if __name__ == '__main__':
+    main()
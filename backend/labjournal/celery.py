@@ -41,12 +41,6 @@ app.conf.update(
     worker_max_tasks_per_child=1000,
     worker_disable_rate_limits=False,
     
-    # Result backend
-    result_expires=3600,  # 1 hour
-    result_backend_transport_options={
-        'master_name': 'mymaster',
-    },
-    
     # Beat schedule
     beat_schedule={
         'cleanup-old-files': {
@@ -65,6 +59,18 @@ app.conf.update(
             'task': 'users.tasks.cleanup_expired_sessions',
             'schedule': 3600.0,  # Every hour
         },
+        'flush-experiment-logs': {
+            'task': 'experiments.tasks.flush_experiment_logs',
+            'schedule': 60.0,  # Every minute, safety net for the write-behind buffer
+        },
+        'flush-user-sessions': {
+            'task': 'users.tasks.flush_user_sessions',
+            'schedule': 60.0,  # Every minute, session logins and activity
+        },
+        'cleanup-stale-attachment-uploads': {
+            'task': 'experiments.tasks.cleanup_stale_uploads',
+            'schedule': 3600.0,  # Every hour
+        },
     },
     
     # Task time limits
@@ -103,8 +109,9 @@ app.conf.update(
     
     # Result backend
     result_persistent=True,
-    result_expires=3600,
+    result_expires=3600,  # 1 hour
     result_backend_transport_options={
+        'master_name': 'mymaster',
         'retry_policy': {
             'timeout': 5.0
         }
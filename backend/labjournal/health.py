@@ -0,0 +1,139 @@
+"""
+Liveness and readiness probes, answered by ``wsgi_prod.py`` and
+``asgi_prod.py`` in front of Django and all middleware.
+
+``/health/`` is liveness: the process answers, nothing else is checked.
+
+``/ready/`` is readiness: the database, the Redis cache and the Celery
+broker each answered within the last ``READINESS_CACHE_TTL`` seconds. The
+checks run in a background thread; a probe request only reads the last
+results, starting a refresh when they have gone stale, so load balancer
+polling costs no I/O on the request path. Results older than
+``READINESS_MAX_AGE`` (a refresh is hanging) count as not ready.
+"""
+import json
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+logger = logging.getLogger(__name__)
+
+HEALTH_PATH = '/health/'
+READY_PATH = '/ready/'
+
+DEFAULT_CACHE_TTL = 5  # seconds
+DEFAULT_MAX_AGE = 30  # seconds
+DEFAULT_FIRST_CHECK_WAIT = 5  # seconds
+
+
+def check_database():
+    # A connection of its own rather than the thread's: with a connection
+    # pool the check would otherwise queue behind requests for a free one.
+    connection = connections.create_connection(DEFAULT_DB_ALIAS)
+    connection.use_pool = False
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+    finally:
+        connection.close()
+
+
+def check_cache():
+    from django_redis import get_redis_connection
+    get_redis_connection('default').ping()
+
+
+def check_broker():
+    from labjournal.celery import app
+    with app.connection_for_write() as connection:
+        connection.ensure_connection(max_retries=1, interval_start=0, timeout=2)
+
+
+CHECKS = {
+    'database': check_database,
+    'cache': check_cache,
+    'broker': check_broker,
+}
+
+
+class ReadinessProbe:
+    """
+    Last results of ``checks``, refreshed in a background thread when stale.
+    """
+
+    def __init__(self, checks):
+        self.checks = checks
+        self.lock = threading.Lock()
+        self.first_result = threading.Event()
+        self.result = None
+        self.checked_at = 0.0
+        self.refreshing = False
+
+    def refresh(self):
+        results = {}
+        try:
+            for name, check in self.checks.items():
+                started = time.perf_counter()
+                try:
+                    check()
+                    results[name] = {'ok': True}
+                except Exception as exc:
+                    logger.warning('Readiness check %s failed: %s', name, exc)
+                    results[name] = {
+                        'ok': False, 'error': str(exc) or type(exc).__name__
+                    }
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                results[name]['latency_ms'] = round(elapsed_ms, 2)
+        finally:
+            with self.lock:
+                if len(results) == len(self.checks):
+                    self.result = results
+                    self.checked_at = time.monotonic()
+                self.refreshing = False
+            self.first_result.set()
+
+    def current(self):
+        """
+        The last results and their age in seconds; starts a refresh if they
+        are stale.
+        """
+        ttl = getattr(settings, 'READINESS_CACHE_TTL', DEFAULT_CACHE_TTL)
+        with self.lock:
+            age = time.monotonic() - self.checked_at
+            if (self.result is None or age >= ttl) and not self.refreshing:
+                self.refreshing = True
+                threading.Thread(
+                    target=self.refresh, name='readiness-probe', daemon=True
+                ).start()
+            return self.result, age
+
+    def wait_for_first_result(self):
+        """
+        Block until the first checks finish, so a new worker's first probe
+        isn't a guess.
+        """
+        if self.result is None:
+            self.current()
+            self.first_result.wait(getattr(
+                settings, 'READINESS_FIRST_CHECK_WAIT', DEFAULT_FIRST_CHECK_WAIT
+            ))
+
+    def response(self):
+        """``(status code, JSON body)`` for the ``/ready/`` probe."""
+        result, age = self.current()
+        if result is None:
+            return 503, b'{"status":"starting"}'
+        fresh = age < getattr(settings, 'READINESS_MAX_AGE', DEFAULT_MAX_AGE)
+        ready = fresh and all(check['ok'] for check in result.values())
+        body = {
+            'status': 'ready' if ready else ('unavailable' if fresh else 'stale'),
+            'age_ms': round(age * 1000),
+            'checks': result,
+        }
+        return (200 if ready else 503), json.dumps(body, separators=(',', ':')).encode()
+
+
+readiness = ReadinessProbe(CHECKS)
@@ -0,0 +1,204 @@
+"""
+Per-layer request latency, for finding fixed per-request overhead.
+
+With ``REQUEST_TIMING`` on, every WSGI wrapper in ``wsgi_prod.py`` (see
+``WSGILayers``) and every entry of ``MIDDLEWARE`` (``LayerTimer`` is put in
+front of each one by ``settings_prod``) is timed on every request. A
+layer's time is its own: the time until it returns minus the time spent in
+the layers inside it. The innermost layer, ``view``, covers URL resolution
+and the view itself.
+
+Timings are observed in the ``labjournal_request_layer_seconds``
+Prometheus histogram, by layer, and the time requests wait for a pooled
+database connection (see ``labjournal/pooled_postgresql``) in
+``labjournal_db_pool_wait_seconds``, by database alias. Both are served
+with the other process metrics at ``/metrics/`` (see
+``labjournal/metrics.py``), added up across gunicorn workers.
+
+Independently of ``REQUEST_TIMING``, ``report_layers`` logs the WSGI and
+middleware stack at startup and warns about layers that run twice and
+about Django middleware used as a WSGI wrapper.
+"""
+import inspect
+import logging
+import os
+import time
+from collections import Counter
+
+from asgiref.sync import (
+    AsyncToSync, SyncToAsync, iscoroutinefunction, markcoroutinefunction
+)
+from django.conf import settings
+from prometheus_client import Histogram
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+
+from users.permissions import IsAdminUser
+
+logger = logging.getLogger(__name__)
+
+TIMINGS_KEY = 'labjournal.layer_timings'
+
+# Upper bounds in seconds, as Prometheus histogram buckets.
+BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25,
+    0.5, 1.0, 2.5, float('inf')
+)
+
+LAYER_LATENCY = Histogram(
+    'labjournal_request_layer_seconds',
+    'Time spent in each layer of the request stack, without the layers inside it.',
+    ['layer'],
+    buckets=BUCKETS,
+)
+POOL_WAIT = Histogram(
+    'labjournal_db_pool_wait_seconds',
+    'Time spent waiting for a pooled database connection, by database alias.',
+    ['alias'],
+    buckets=BUCKETS,
+)
+
+
+def start_layer(timings, name):
+    timings.append([name, 0.0])
+    return len(timings) - 1, time.perf_counter()
+
+
+def end_layer(timings, index, started, outermost):
+    timings[index][1] = time.perf_counter() - started
+    if not outermost:
+        return
+    # Each layer's time includes the next one's; keep only its own.
+    for position, (name, seconds) in enumerate(timings):
+        inner = timings[position + 1][1] if position + 1 < len(timings) else 0.0
+        LAYER_LATENCY.labels(name).observe(max(seconds - inner, 0.0))
+
+
+def layer_name(layer):
+    """Dotted path of the class or function behind a middleware or WSGI layer."""
+    layer = inspect.unwrap(layer)
+    if isinstance(layer, SyncToAsync):
+        layer = inspect.unwrap(layer.func)
+    elif isinstance(layer, AsyncToSync):
+        layer = inspect.unwrap(layer.awaitable)
+    handlers = ('_get_response', '_get_response_async')
+    if inspect.ismethod(layer) and layer.__name__ in handlers:
+        return 'view'
+    if inspect.isfunction(layer) or inspect.ismethod(layer):
+        return f'{layer.__module__}.{layer.__qualname__.split(".<locals>")[0]}'
+    return f'{type(layer).__module__}.{type(layer).__qualname__}'
+
+
+class LayerTimer:
+    """
+    Time the middleware after this one in ``MIDDLEWARE``, down to the view.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.layer = layer_name(get_response)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timings, outermost = self.timings(request)
+        index, started = start_layer(timings, self.layer)
+        try:
+            return self.get_response(request)
+        finally:
+            end_layer(timings, index, started, outermost)
+
+    async def __acall__(self, request):
+        timings, outermost = self.timings(request)
+        index, started = start_layer(timings, self.layer)
+        try:
+            return await self.get_response(request)
+        finally:
+            end_layer(timings, index, started, outermost)
+
+    @staticmethod
+    def timings(request):
+        # Under WSGI, META is the environ the WSGI layers started the list in.
+        timings = request.META.get(TIMINGS_KEY)
+        if timings is None:
+            timings = request.META[TIMINGS_KEY] = []
+            return timings, True
+        return timings, False
+
+
+def timed_wsgi(application, name):
+    def timed_application(environ, start_response):
+        timings = environ.get(TIMINGS_KEY)
+        outermost = timings is None
+        if outermost:
+            timings = environ[TIMINGS_KEY] = []
+        index, started = start_layer(timings, name)
+        try:
+            return application(environ, start_response)
+        finally:
+            end_layer(timings, index, started, outermost)
+    return timed_application
+
+
+class WSGILayers:
+    """
+    Builds the WSGI wrapper stack of ``wsgi_prod.py``, innermost first.
+
+    ``push`` each wrapper built around ``application``; with
+    ``REQUEST_TIMING`` on, each layer is timed.
+    """
+
+    def __init__(self, application):
+        self.names = []
+        self.django_middleware = []
+        self.application = None
+        self.push(application)
+
+    def push(self, application, name=None):
+        name = name or layer_name(application)
+        self.names.append(name)
+        if self.application is not None and hasattr(application, 'get_response'):
+            # Django middleware is called with a request, not (environ, start_response).
+            self.django_middleware.append(name)
+        if getattr(settings, 'REQUEST_TIMING', False):
+            application = timed_wsgi(application, name)
+        self.application = application
+        return application
+
+
+def report_layers(wsgi_layers):
+    """
+    Log the request stack, outermost first, and warn about layers that run
+    twice. Returns the warnings.
+    """
+    timer = f'{__name__}.LayerTimer'
+    middleware = [path for path in settings.MIDDLEWARE if path != timer]
+    stack = list(reversed(wsgi_layers.names)) + middleware
+    logger.info('Request layers, outermost first: %s', ', '.join(stack))
+
+    problems = []
+    for name, count in Counter(stack).items():
+        if count > 1:
+            problems.append(f'{name} runs {count} times per request')
+    for name in wsgi_layers.django_middleware:
+        problems.append(
+            f'{name} is Django middleware wrapped around the WSGI application'
+        )
+    for problem in problems:
+        logger.warning('Request stack: %s', problem)
+    return problems
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def pool_status(request):
+    """
+    This worker's database pool counters (admin only). Checkout waits of all
+    workers are in ``labjournal_db_pool_wait_seconds`` at ``/metrics/``.
+    """
+    from labjournal.pooled_postgresql.base import pool_stats
+    return Response({'pid': os.getpid(), 'pools': pool_stats()})
@@ -0,0 +1,230 @@
+"""
+Prometheus metrics, scraped by the ``django`` and ``labjournal`` jobs of
+``monitoring/prometheus.yml``.
+
+``/metrics/`` serves what every process records as it works:
+
+- ``labjournal_request_latency_seconds``: latency through Django by view,
+  method and status, recorded by ``RequestMetrics``
+- ``labjournal_request_db_queries`` and ``labjournal_request_db_query_seconds``:
+  database queries and the time spent in them per request, by view
+- ``django_cache_get_total`` and ``django_cache_get_hits_total``: cache
+  reads and hits, from django_prometheus' cache backend; their ratio is
+  the hit ratio
+- ``labjournal_request_layer_seconds`` and ``labjournal_db_pool_wait_seconds``:
+  time per WSGI layer and middleware with ``REQUEST_TIMING`` on, and time
+  spent waiting for a pooled connection (see ``labjournal/instrumentation.py``)
+
+Under gunicorn every worker writes its samples to files in
+``PROMETHEUS_MULTIPROC_DIR`` (set by ``gunicorn.conf.py``) and the view
+adds up all of them, so whichever worker answers a scrape reports the
+whole server.
+
+``/api/metrics/`` serves gauges read when scraped: Celery queue depth and
+domain counts such as experiments by status. They are computed fresh from
+the broker and the database, so they need no aggregation across workers.
+If a source is unreachable its gauges are left out and
+``labjournal_metrics_source_up`` is 0 for it.
+"""
+import logging
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db import connections
+from django.db.models import Count
+from django.http import HttpResponse
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Histogram, generate_latest
+)
+from prometheus_client.core import GaugeMetricFamily
+
+from experiments.models import Experiment, ExperimentStatus
+from users.models import User, UserRole, UserSession
+
+from .instrumentation import BUCKETS
+
+logger = logging.getLogger(__name__)
+
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, float('inf'))
+
+REQUEST_LATENCY = Histogram(
+    'labjournal_request_latency_seconds',
+    'Request latency through Django, by view, method and status.',
+    ['view', 'method', 'status'],
+    buckets=BUCKETS,
+)
+REQUEST_QUERIES = Histogram(
+    'labjournal_request_db_queries',
+    'Database queries per request, by view.',
+    ['view'],
+    buckets=QUERY_COUNT_BUCKETS,
+)
+REQUEST_QUERY_TIME = Histogram(
+    'labjournal_request_db_query_seconds',
+    'Time spent in database queries per request, by view.',
+    ['view'],
+    buckets=BUCKETS,
+)
+
+
+class QueryCounter:
+    """``execute_wrapper`` that counts and times the queries it sees."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - started
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match is not None else '<unresolved>'
+
+
+class RequestMetrics:
+    """
+    Record each request's latency and database queries, by view.
+
+    Goes first in ``MIDDLEWARE``. Under ASGI the ORM runs on other threads,
+    so only latency is recorded there.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        counter = QueryCounter()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(counter))
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+        view = view_name(request)
+        REQUEST_LATENCY.labels(
+            view, request.method, response.status_code
+        ).observe(elapsed)
+        REQUEST_QUERIES.labels(view).observe(counter.count)
+        REQUEST_QUERY_TIME.labels(view).observe(counter.seconds)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        elapsed = time.perf_counter() - started
+        REQUEST_LATENCY.labels(
+            view_name(request), request.method, response.status_code
+        ).observe(elapsed)
+        return response
+
+
+def celery_queues(app):
+    queues = {app.conf.task_default_queue}
+    for route in (app.conf.task_routes or {}).values():
+        if isinstance(route, dict) and 'queue' in route:
+            queues.add(route['queue'])
+    return sorted(queues)
+
+
+def collect_celery():
+    from labjournal.celery import app
+    depth = GaugeMetricFamily(
+        'labjournal_celery_queue_length', 'Messages waiting in each Celery queue.',
+        labels=['queue']
+    )
+    with app.connection_for_read() as connection:
+        connection.ensure_connection(max_retries=1, interval_start=0, timeout=2)
+        channel = connection.default_channel
+        for queue in celery_queues(app):
+            try:
+                declared = channel.queue_declare(queue=queue, passive=True)
+                messages = declared.message_count
+            except connection.channel_errors:
+                # Not declared yet: no worker has consumed from it and nothing
+                # was sent.
+                messages = 0
+            depth.add_metric([queue], messages)
+    return [depth]
+
+
+def collect_domain():
+    experiments = GaugeMetricFamily(
+        'labjournal_experiments', 'Experiments that are not archived, by status.',
+        labels=['status']
+    )
+    counts = dict(
+        Experiment.objects.filter(is_archived=False)
+        .values_list('status').annotate(count=Count('id')).order_by()
+    )
+    for experiment_status in ExperimentStatus.values:
+        experiments.add_metric([experiment_status], counts.get(experiment_status, 0))
+
+    overdue = GaugeMetricFamily(
+        'labjournal_experiments_overdue',
+        'In-progress experiments past their planned end date.'
+    )
+    overdue.add_metric([], Experiment.objects.overdue().count())
+
+    users = GaugeMetricFamily(
+        'labjournal_users', 'Active users, by role.', labels=['role']
+    )
+    counts = dict(
+        User.objects.filter(is_active=True)
+        .values_list('role').annotate(count=Count('id')).order_by()
+    )
+    for role in UserRole.values:
+        users.add_metric([role], counts.get(role, 0))
+
+    sessions = GaugeMetricFamily(
+        'labjournal_user_sessions_active', 'Active user sessions.'
+    )
+    sessions.add_metric([], UserSession.objects.filter(is_active=True).count())
+    return [experiments, overdue, users, sessions]
+
+
+class ApplicationCollector:
+    """Gauges computed at scrape time, one group per source."""
+
+    sources = {
+        'broker': collect_celery,
+        'database': collect_domain,
+    }
+
+    def collect(self):
+        up = GaugeMetricFamily(
+            'labjournal_metrics_source_up', 'Whether a metrics source could be read.',
+            labels=['source']
+        )
+        for source, collect in self.sources.items():
+            try:
+                families = collect()
+            except Exception as exc:
+                logger.warning('Metrics source %s unavailable: %s', source, exc)
+                up.add_metric([source], 0)
+                continue
+            up.add_metric([source], 1)
+            yield from families
+        yield up
+
+
+def application_metrics(request):
+    """Celery queue depth and domain gauges, in the Prometheus text format"""
+    registry = CollectorRegistry(auto_describe=False)
+    registry.register(ApplicationCollector())
+    return HttpResponse(
+        generate_latest(registry), content_type=CONTENT_TYPE_LATEST
+    )
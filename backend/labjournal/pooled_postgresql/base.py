@@ -0,0 +1,175 @@
+"""
+PostgreSQL backend whose connections come from a per-process psycopg pool.
+
+With ``ENGINE = 'labjournal.pooled_postgresql'`` and ``CONN_MAX_AGE = 0``,
+Django still opens a connection on a thread's first query and closes it
+when the request (or Celery task) finishes, but opening takes an idle
+connection from the process's ``psycopg_pool.ConnectionPool`` and closing
+hands it back. The threads of a gthread worker share at most
+``max_size`` connections, however many of them there are; a thread that
+finds them all in use waits up to ``timeout`` seconds.
+
+``OPTIONS['pool']`` takes ``DEFAULT_POOL_OPTIONS``' keys. With ``check``,
+every checkout first tests the connection, so one the server dropped is
+replaced instead of failing the request. How long checkouts wait goes to
+the ``labjournal.instrumentation.POOL_WAIT`` histogram.
+
+Each process opens its own pool on first use, so pools are never shared
+across a fork. A wrapper with ``use_pool = False`` opens a plain connection
+of its own instead, for callers such as the readiness probe that must not
+wait behind requests for a pooled one.
+"""
+import os
+import threading
+import time
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.postgresql import base, creation
+from django.db.backends.postgresql.psycopg_any import IsolationLevel, is_psycopg3
+from django.utils.asyncio import async_unsafe
+
+if not is_psycopg3:
+    raise ImproperlyConfigured('labjournal.pooled_postgresql requires psycopg 3.')
+
+try:
+    from psycopg_pool import ConnectionPool
+except ImportError as e:
+    raise ImproperlyConfigured('Error loading psycopg_pool module: %s' % e)
+
+DEFAULT_POOL_OPTIONS = {
+    'min_size': 1,
+    'max_size': 4,
+    'timeout': 10,  # seconds a checkout waits for a free connection
+    'max_idle': 300,  # seconds before an idle connection above min_size is closed
+    'max_lifetime': 1800,  # seconds before a connection is replaced
+    'check': True,  # test each connection on checkout
+}
+
+# alias -> (pid, pool)
+pools = {}
+pools_lock = threading.Lock()
+
+
+def get_pool(alias, conn_params, options):
+    """This process's pool for ``alias``, opened on first use."""
+    pid = os.getpid()
+    with pools_lock:
+        owner, pool = pools.get(alias, (None, None))
+        if owner == pid:
+            return pool
+        # A pool inherited through fork has lost its worker threads; the
+        # parent's connections are left alone.
+        pool = ConnectionPool(
+            kwargs=conn_params,
+            min_size=options['min_size'],
+            max_size=options['max_size'],
+            timeout=options['timeout'],
+            max_idle=options['max_idle'],
+            max_lifetime=options['max_lifetime'],
+            check=ConnectionPool.check_connection if options['check'] else None,
+            name=f'{alias}-{pid}',
+            open=True,
+        )
+        pools[alias] = (pid, pool)
+        return pool
+
+
+def owns(alias, pool):
+    return pools.get(alias) == (os.getpid(), pool)
+
+
+def close_pool(alias):
+    with pools_lock:
+        owner, pool = pools.pop(alias, (None, None))
+    if owner == os.getpid():
+        pool.close()
+
+
+def pool_stats():
+    """Counters of this process's pools (``ConnectionPool.get_stats()``), by alias."""
+    pid = os.getpid()
+    return {
+        alias: pool.get_stats()
+        for alias, (owner, pool) in list(pools.items()) if owner == pid
+    }
+
+
+def record_wait(alias, seconds):
+    from labjournal.instrumentation import POOL_WAIT
+    POOL_WAIT.labels(alias).observe(seconds)
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+    """
+    Closes the pool around creating and dropping the test database, so no
+    idle connection blocks the drop or outlives the switch of ``NAME``.
+    """
+
+    def _create_test_db(self, *args, **kwargs):
+        close_pool(self.connection.alias)
+        return super()._create_test_db(*args, **kwargs)
+
+    def _destroy_test_db(self, *args, **kwargs):
+        close_pool(self.connection.alias)
+        return super()._destroy_test_db(*args, **kwargs)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.settings_dict['CONN_MAX_AGE']:
+            # A persistent connection would never go back to the pool.
+            raise ImproperlyConfigured(
+                f"DATABASES['{self.alias}'] uses labjournal.pooled_postgresql and "
+                f"needs CONN_MAX_AGE = 0."
+            )
+        # The pool the open connection came from.
+        self.pool = None
+        self.use_pool = True
+
+    def pool_options(self):
+        return {**DEFAULT_POOL_OPTIONS, **self.settings_dict['OPTIONS'].get('pool', {})}
+
+    def get_connection_params(self):
+        conn_params = super().get_connection_params()
+        conn_params.pop('pool', None)
+        return conn_params
+
+    @async_unsafe
+    def get_new_connection(self, conn_params):
+        if not self.use_pool:
+            return super().get_new_connection(conn_params)
+        options = self.settings_dict['OPTIONS']
+        try:
+            self.isolation_level = IsolationLevel(
+                options.get('isolation_level', IsolationLevel.READ_COMMITTED)
+            )
+        except ValueError:
+            raise ImproperlyConfigured(
+                f"Invalid transaction isolation level {options['isolation_level']} "
+                f"specified. Use one of the psycopg.IsolationLevel values."
+            )
+
+        pool = get_pool(self.alias, conn_params, self.pool_options())
+        started = time.perf_counter()
+        try:
+            connection = pool.getconn()
+        finally:
+            record_wait(self.alias, time.perf_counter() - started)
+        self.pool = pool
+        if 'isolation_level' in options:
+            connection.isolation_level = self.isolation_level
+        return connection
+
+    def _close(self):
+        if self.connection is None:
+            return
+        pool, self.pool = self.pool, None
+        with self.wrap_database_errors:
+            if pool is not None and owns(self.alias, pool):
+                # Rolls back anything left open; broken connections are discarded.
+                pool.putconn(self.connection)
+            else:
+                self.connection.close()
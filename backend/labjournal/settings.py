@@ -8,10 +8,9 @@ CACHES = {
         }
     }
 }
-# Настройка backend-аутентификации для django-axes
+# ModelBackend behind the Redis login lockout (see users/lockout.py)
 AUTHENTICATION_BACKENDS = [
-    'axes.backends.AxesStandaloneBackend',
-    'django.contrib.auth.backends.ModelBackend',
+    'users.backends.LockoutModelBackend',
 ]
 import os
 from pathlib import Path
@@ -39,6 +38,7 @@ INSTALLED_APPS = [
     
     # Third party apps
     'rest_framework',
+    'rest_framework.authtoken',
     'corsheaders',
     'django_filters',
     'taggit',
@@ -46,8 +46,6 @@ INSTALLED_APPS = [
     'simple_history',
     'auditlog',
     'django_ratelimit',
-    'axes',
-    'defender',
     
     # Local apps
     'users',
@@ -63,15 +61,28 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'users.middleware.SessionActivityMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'simple_history.middleware.HistoryRequestMiddleware',
-    'axes.middleware.AxesMiddleware',
-    'defender.middleware.FailedLoginMiddleware',
 ]
 
 ROOT_URLCONF = 'labjournal.urls'
 
+# Set by labjournal/asgi_prod.py: serve the read-heavy user endpoints with
+# the async views in users/async_views.py
+ASGI_SERVER = config('ASGI_SERVER', default=False, cast=bool)
+
+# Time every WSGI layer and middleware per request (see
+# labjournal/instrumentation.py); settings_prod wires in the timers
+REQUEST_TIMING = config('REQUEST_TIMING', default=False, cast=bool)
+
+# /ready/ probe (see labjournal/health.py): dependency checks are refreshed
+# in the background once older than the TTL; results older than the max
+# age report not ready
+READINESS_CACHE_TTL = 5
+READINESS_MAX_AGE = 30
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -143,7 +154,7 @@ AUTH_USER_MODEL = 'users.User'
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.SessionAuthentication',
-        'rest_framework.authentication.TokenAuthentication',
+        'users.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -191,6 +202,60 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 
+# Buffer ExperimentLog rows in Redis and insert them from the experiments
+# Celery queue (see experiments/logs.py)
+EXPERIMENT_LOG_WRITE_BEHIND = True
+# Cache alias of the Redis that holds write-behind buffers. Buffered records
+# exist nowhere else, so it must run with maxmemory-policy noeviction
+WRITE_BEHIND_CACHE_ALIAS = 'default'
+
+# Keep the active-session registry and session activity in Redis and
+# flush them to UserSession from Celery (see users/sessions.py)
+USER_SESSION_WRITE_BEHIND = True
+# Inactive UserSession rows are kept this long for auditing, then purged
+# by users.tasks.cleanup_expired_sessions
+USER_SESSION_RETENTION_DAYS = 90
+
+# Bulk user import (see users/imports.py); hash threads default to the CPU
+# count. The API takes fewer rows so hashing fits in the request timeout
+USER_IMPORT_MAX_ROWS = 5000
+USER_IMPORT_API_MAX_ROWS = 50
+USER_IMPORT_HASH_WORKERS = None
+
+# Login lockout: this many failures per IP or username within the window
+# lock that IP or username out for the lockout duration (seconds)
+LOGIN_FAILURE_LIMIT = 3
+LOGIN_FAILURE_WINDOW = 300
+LOGIN_LOCKOUT_DURATION = 300
+# Reverse proxies (addresses or CIDR ranges) trusted to name the client in
+# X-Real-IP / X-Forwarded-For; the default covers nginx on the compose
+# network. Requests from anywhere else are counted by REMOTE_ADDR
+LOGIN_TRUSTED_PROXIES = config(
+    'LOGIN_TRUSTED_PROXIES',
+    default='127.0.0.1,::1,172.20.0.0/16',
+    cast=lambda v: [s.strip() for s in v.split(',') if s.strip()]
+)
+
+# Cached token authentication (see users/authentication.py): seconds in
+# the shared cache and in each process's LRU
+TOKEN_AUTH_CACHE_TIMEOUT = 300
+TOKEN_AUTH_LOCAL_TTL = 10
+
+# Resumable attachment uploads (see experiments/uploads.py). Part files are
+# kept under MEDIA_ROOT so finished uploads can be linked into place.
+ATTACHMENT_UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024  # 8MB
+ATTACHMENT_UPLOAD_MAX_CHUNK_SIZE = 16 * 1024 * 1024  # 16MB
+ATTACHMENT_UPLOAD_MAX_SIZE = 50 * 1024 * 1024 * 1024  # 50GB
+ATTACHMENT_UPLOAD_TEMP_DIR = os.path.join(MEDIA_ROOT, 'attachment_uploads')
+ATTACHMENT_UPLOAD_EXPIRY_HOURS = 24
+
+# Set to the internal nginx location that maps to MEDIA_ROOT to hand
+# attachment downloads to nginx via X-Accel-Redirect (see
+# experiments/downloads.py); unset, Django streams them itself.
+ATTACHMENT_DOWNLOAD_ACCEL_PREFIX = (
+    os.environ.get('ATTACHMENT_DOWNLOAD_ACCEL_PREFIX') or None
+)
+
 # Logging
 LOGGING = {
     'version': 1,
@@ -102,6 +102,12 @@ CACHES = {
 # Development session backend
 SESSION_ENGINE = 'django.contrib.sessions.backends.db'
 
+# Development experiment logs (local memory cache, write synchronously)
+EXPERIMENT_LOG_WRITE_BEHIND = False
+
+# Development session registry (database sessions, write synchronously)
+USER_SESSION_WRITE_BEHIND = False
+
 # Development debug toolbar
 if DEBUG:
     INSTALLED_APPS += ['debug_toolbar']
@@ -50,15 +50,25 @@ SESSION_COOKIE_AGE = 3600  # 1 hour
 SESSION_EXPIRE_AT_BROWSER_CLOSE = True
 
 # Production cache settings
+# django_redis, counting reads and hits for /metrics/ (labjournal/metrics.py)
 CACHES = {
     'default': {
-        'BACKEND': 'django_redis.cache.RedisCache',
+        'BACKEND': 'django_prometheus.cache.backends.redis.RedisCache',
         'LOCATION': os.environ.get('REDIS_URL', 'redis://redis:6379/1'),
         'OPTIONS': {
             'CLIENT_CLASS': 'django_redis.client.DefaultClient',
         }
-    }
+    },
+    # Non-evicting Redis for the write-behind buffers, shared with the broker
+    'write_behind': {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': os.environ.get('REDIS_QUEUE_URL', 'redis://redis-queue:6379/0'),
+        'OPTIONS': {
+            'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+        }
+    },
 }
+WRITE_BEHIND_CACHE_ALIAS = 'write_behind'
 
 # Production session backend
 SESSION_ENGINE = 'django.contrib.sessions.backends.cache'
@@ -138,6 +148,10 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Attachment downloads are authorized by Django and served by nginx from
+# this internal location (see experiments/downloads.py)
+ATTACHMENT_DOWNLOAD_ACCEL_PREFIX = '/protected-media/'
+
 # Production email settings
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = os.environ.get('EMAIL_HOST', 'smtp.gmail.com')
@@ -148,7 +162,9 @@ EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD')
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 
 # Production Celery settings
-CELERY_BROKER_URL = os.environ.get('REDIS_URL', 'redis://redis:6379/0')
+# Queued tasks must survive memory pressure, so the broker lives on the
+# non-evicting Redis rather than the LRU cache
+CELERY_BROKER_URL = os.environ.get('REDIS_QUEUE_URL', 'redis://redis-queue:6379/0')
 CELERY_RESULT_BACKEND = os.environ.get('REDIS_URL', 'redis://redis:6379/0')
 CELERY_TASK_ALWAYS_EAGER = False
 CELERY_TASK_EAGER_PROPAGATES = True
@@ -170,6 +186,11 @@ ADMIN_INDEX_TITLE = "Welcome to Lab Journal Administration"
 PROMETHEUS_EXPORT_MIGRATIONS = False
 PROMETHEUS_EXPORT_MIXINS = False
 
+# Prometheus scrapes backend:8000 over plain HTTP on the internal network
+# (monitoring/prometheus.yml); nginx doesn't route the metrics paths.
+ALLOWED_HOSTS += ['backend']
+SECURE_REDIRECT_EXEMPT = [r'^metrics/$', r'^api/metrics/$']
+
 # Production backup settings
 BACKUP_DIR = os.path.join(BASE_DIR, 'backups')
 BACKUP_RETENTION_DAYS = 30
@@ -186,8 +207,20 @@ CSP_IMG_SRC = ("'self'", "data:", "https:")
 CSP_FONT_SRC = ("'self'", "https:", "data:")
 
 # Production database optimization
-DATABASES['default']['CONN_MAX_AGE'] = 600
-DATABASES['default']['OPTIONS']['MAX_CONNS'] = 20
+# Pooled connections (labjournal/pooled_postgresql): a connection goes back
+# to its process's pool when the request or task finishes instead of staying
+# pinned to a thread, so Postgres sees at most DB_POOL_MAX_SIZE connections
+# per process. gunicorn.conf.py sizes it for the worker class.
+if config('DB_POOL', default=True, cast=bool):
+    DATABASES['default']['ENGINE'] = 'labjournal.pooled_postgresql'
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': config('DB_POOL_MIN_SIZE', default=1, cast=int),
+        'max_size': config('DB_POOL_MAX_SIZE', default=4, cast=int),
+        'timeout': config('DB_POOL_TIMEOUT', default=10, cast=float),
+    }
+else:
+    DATABASES['default']['CONN_MAX_AGE'] = 600
 
 # Production Redis optimization
 REDIS_CONNECTION_POOL_KWARGS = {
@@ -207,6 +240,7 @@ SESSION_EXPIRE_AT_BROWSER_CLOSE = True
 
 # Production middleware optimization
 MIDDLEWARE = [
+    'labjournal.metrics.RequestMetrics',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -214,14 +248,32 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'users.middleware.SessionActivityMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'simple_history.middleware.HistoryRequestMiddleware',
-    'axes.middleware.AxesMiddleware',
-    'defender.middleware.FailedLoginMiddleware',
     'django_ratelimit.middleware.RatelimitMiddleware',
 ]
 
+# Sync-only middleware would make every ASGI request wait for asgiref's
+# single sync thread. Under ASGI nginx serves the static files and nothing
+# raises Ratelimited.
+if ASGI_SERVER:
+    MIDDLEWARE = [
+        middleware for middleware in MIDDLEWARE
+        if middleware not in (
+            'whitenoise.middleware.WhiteNoiseMiddleware',
+            'django_ratelimit.middleware.RatelimitMiddleware',
+        )
+    ]
+
+if REQUEST_TIMING:
+    # A timer in front of every middleware and one in front of the view.
+    MIDDLEWARE = [
+        layer for middleware in MIDDLEWARE
+        for layer in ('labjournal.instrumentation.LayerTimer', middleware)
+    ] + ['labjournal.instrumentation.LayerTimer']
+
 # Production apps (remove development apps)
 if 'debug_toolbar' in INSTALLED_APPS:
     INSTALLED_APPS.remove('debug_toolbar')
@@ -64,6 +64,12 @@ EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
 CELERY_TASK_ALWAYS_EAGER = True
 CELERY_TASK_EAGER_PROPAGATES = True
 
+# Test experiment logs (no Redis, write synchronously)
+EXPERIMENT_LOG_WRITE_BEHIND = False
+
+# Test session registry (database sessions, write synchronously)
+USER_SESSION_WRITE_BEHIND = False
+
 # Test rate limiting
 RATELIMIT_ENABLE = False
 
@@ -78,6 +84,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'users.middleware.SessionActivityMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
 ]
 
@@ -92,6 +99,7 @@ INSTALLED_APPS = [
     
     # Third party apps
     'rest_framework',
+    'rest_framework.authtoken',
     'corsheaders',
     'django_filters',
     'taggit',
@@ -149,6 +157,7 @@ ALLOWED_HOSTS = ['testserver', 'localhost', '127.0.0.1']
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.SessionAuthentication',
+        'users.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -261,6 +270,7 @@ ALLOWED_HOSTS = ['testserver', 'localhost', '127.0.0.1']
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.SessionAuthentication',
+        'users.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
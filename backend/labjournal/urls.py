@@ -3,9 +3,18 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from django_prometheus.exports import ExportToDjangoView
+
+from .instrumentation import pool_status
+from .metrics import application_metrics
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('users.urls')),
+    path('api/', include('experiments.urls')),
+    path('api/instrumentation/db-pool/', pool_status, name='db-pool'),
+    path('metrics/', ExportToDjangoView, name='metrics'),
+    path('api/metrics/', application_metrics, name='application-metrics'),
 ]
 
 if settings.DEBUG:
@@ -0,0 +1,132 @@
+"""
+Pre-fork warmup for preloaded gunicorn workers.
+
+With ``preload_app`` the gunicorn master imports the application once and
+forks every worker from it, again each time ``max_requests`` recycles
+one. Much of what Django and DRF need per request is still built lazily,
+by each worker on its first requests: the URL resolver's reverse lookups
+and compiled patterns, model field maps and reverse relations (including
+the taggit and simple_history models), serializer fields and the
+translation catalog. ``warm_up`` builds them in the master, so workers
+inherit them ready and share the pages copy-on-write; ``gunicorn.conf.py``
+then calls ``gc.freeze()`` so the collector in a worker doesn't write to
+those objects and unshare them.
+
+The warmup must not open database, cache or broker connections: every
+worker would inherit the same socket.
+
+``memory_usage`` reads a process's resident and unshared memory, which
+``gunicorn.conf.py`` logs for each worker after start and after its first
+request.
+"""
+import logging
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth.hashers import get_hashers
+from django.contrib.auth.password_validation import (
+    get_default_password_validators
+)
+from django.db import connections
+from django.db.utils import load_backend
+from django.urls import URLPattern, URLResolver, get_resolver
+from django.utils import translation
+
+logger = logging.getLogger(__name__)
+
+
+def warm_models():
+    for model in apps.get_models(include_auto_created=True):
+        opts = model._meta
+        # Builds the relation tree behind every reverse relation.
+        opts.get_fields(include_hidden=True)
+        opts.concrete_fields
+        opts.fields_map
+        opts._forward_fields_map
+
+
+def url_callbacks(resolver):
+    for pattern in resolver.url_patterns:
+        if isinstance(pattern, URLResolver):
+            yield from url_callbacks(pattern)
+        elif isinstance(pattern, URLPattern):
+            yield pattern.callback
+
+
+def warm_urls():
+    """
+    Populate the resolver's lookups and compile every URL pattern; returns
+    the views.
+    """
+    resolver = get_resolver()
+    resolver.reverse_dict
+    resolver.namespace_dict
+    return list(url_callbacks(resolver))
+
+
+def warm_serializers(callbacks):
+    seen = set()
+    for callback in callbacks:
+        view_class = getattr(callback, 'cls', None)
+        serializer_class = getattr(view_class, 'serializer_class', None)
+        if serializer_class is None or serializer_class in seen:
+            continue
+        seen.add(serializer_class)
+        try:
+            serializer_class().fields
+        except Exception as exc:
+            # Serializers that need a request in their context are built on
+            # first use.
+            logger.debug('Not warming %s: %s', serializer_class.__name__, exc)
+
+
+def warm_translations():
+    with translation.override(settings.LANGUAGE_CODE):
+        translation.gettext('Not found.')
+
+
+def warm_backends():
+    """
+    Import the database backends and build the auth helpers, without
+    connecting.
+    """
+    for alias in settings.DATABASES:
+        load_backend(settings.DATABASES[alias]['ENGINE'])
+    get_hashers()
+    get_default_password_validators()
+
+
+def warm_up():
+    started = time.perf_counter()
+    warm_models()
+    callbacks = warm_urls()
+    warm_serializers(callbacks)
+    warm_translations()
+    warm_backends()
+    # In case anything above queried after all.
+    connections.close_all()
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    logger.info('Warmed up %d views in %.0f ms', len(callbacks), elapsed_ms)
+
+
+def memory_usage():
+    """
+    This process's ``rss``, ``pss``, ``shared`` and ``private`` memory in kB;
+    empty where unavailable.
+    """
+    try:
+        with open('/proc/self/smaps_rollup') as smaps:
+            fields = {}
+            for line in smaps:
+                parts = line.split()
+                if len(parts) == 3 and parts[2] == 'kB':
+                    fields[parts[0].rstrip(':')] = int(parts[1])
+    except OSError:
+        return {}
+    return {
+        'rss': fields.get('Rss', 0),
+        'pss': fields.get('Pss', 0),
+        'shared': fields.get('Shared_Clean', 0) + fields.get('Shared_Dirty', 0),
+        'private': fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0),
+    }
@@ -20,41 +20,22 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'labjournal.settings_prod')
 from django.core.wsgi import get_wsgi_application
 
 # Get the WSGI application
-application = get_wsgi_application()
+from labjournal.instrumentation import WSGILayers, report_layers
+
+# Every wrapper below is pushed onto the stack, which times each layer when
+# REQUEST_TIMING is on (see labjournal/instrumentation.py). Django middleware
+# belongs in settings_prod.MIDDLEWARE, not here: wrapped around the WSGI
+# callable it would get (environ, start_response) instead of a request.
+layers = WSGILayers(get_wsgi_application())
 
 # Optional: Add middleware for production
 try:
     from whitenoise import WhiteNoise
-    application = WhiteNoise(application)
-    application.add_files('/app/staticfiles', prefix='static/')
-    application.add_files('/app/media', prefix='media/')
-except ImportError:
-    pass
-
-# Optional: Add security headers middleware
-try:
-    from django.middleware.security import SecurityMiddleware
-    from django.middleware.clickjacking import XFrameOptionsMiddleware
-    from django.middleware.csrf import CsrfViewMiddleware
-    
-    # Add security middleware
-    application = SecurityMiddleware(application)
-    application = XFrameOptionsMiddleware(application)
-    application = CsrfViewMiddleware(application)
-except ImportError:
-    pass
-
-# Optional: Add CORS middleware
-try:
-    from corsheaders.middleware import CorsMiddleware
-    application = CorsMiddleware(application)
-except ImportError:
-    pass
-
-# Optional: Add rate limiting middleware
-try:
-    from django_ratelimit.middleware import RatelimitMiddleware
-    application = RatelimitMiddleware(application)
+    whitenoise = WhiteNoise(layers.application)
+    whitenoise.add_files('/app/staticfiles', prefix='static/')
+    layers.push(whitenoise)
+    # Media is not served from here: attachments go through the download
+    # endpoint and nginx (X-Accel-Redirect), other media straight from nginx.
 except ImportError:
     pass
 
@@ -83,46 +64,35 @@ try:
 except ImportError:
     pass
 
-# Optional: Add performance monitoring
-try:
-    from django_prometheus.metrics import MetricsMiddleware
-    application = MetricsMiddleware(application)
-except ImportError:
-    pass
+# Liveness and readiness probes, answered before any middleware (see
+# labjournal/health.py). The liveness response is built once. The probe
+# handler is not pushed onto ``layers``, so probes are never timed; only
+# requests passed on to ``original_application`` are.
+from labjournal.health import HEALTH_PATH, READY_PATH, readiness
 
-# Optional: Add Silk profiling (development only)
-try:
-    if os.environ.get('DJANGO_SETTINGS_MODULE') == 'labjournal.settings_dev':
-        from silk.middleware import SilkyMiddleware
-        application = SilkyMiddleware(application)
-except ImportError:
-    pass
+HEALTH_STATUS = '200 OK'
+HEALTH_HEADERS = [('Content-Type', 'text/plain'), ('Content-Length', '2')]
+HEALTH_BODY = (b'OK',)
+READY_STATUS = {200: '200 OK', 503: '503 Service Unavailable'}
 
-# Optional: Add debug toolbar (development only)
-try:
-    if os.environ.get('DJANGO_SETTINGS_MODULE') == 'labjournal.settings_dev':
-        from debug_toolbar.middleware import DebugToolbarMiddleware
-        application = DebugToolbarMiddleware(application)
-except ImportError:
-    pass
-
-# Optional: Add health check endpoint
-def health_check(environ, start_response):
-    """Simple health check endpoint for load balancers."""
-    if environ.get('PATH_INFO') == '/health/':
-        status = '200 OK'
-        response_headers = [('Content-Type', 'text/plain')]
-        start_response(status, response_headers)
-        return [b'OK']
-    return None
-
-# Wrap the application with health check
-original_application = application
+original_application = layers.application
 
 def application_with_health_check(environ, start_response):
-    health_response = health_check(environ, start_response)
-    if health_response is not None:
-        return health_response
+    path = environ.get('PATH_INFO')
+    if path == HEALTH_PATH:
+        start_response(HEALTH_STATUS, HEALTH_HEADERS)
+        return HEALTH_BODY
+    if path == READY_PATH:
+        readiness.wait_for_first_result()
+        code, body = readiness.response()
+        start_response(READY_STATUS[code], [
+            ('Content-Type', 'application/json'),
+            ('Content-Length', str(len(body))),
+            ('Cache-Control', 'no-store'),
+        ])
+        return [body]
     return original_application(environ, start_response)
 
 application = application_with_health_check
+
+report_layers(layers)
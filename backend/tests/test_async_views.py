@@ -0,0 +1,128 @@
+import asyncio
+
+import pytest
+from django.test import AsyncClient, Client
+from django.urls import include, path
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from users import async_views
+from users.models import User, UserProfile, UserSession
+
+pytestmark = [pytest.mark.django_db, pytest.mark.views]
+
+# The URLs ``users.urls`` routes to the async views when ASGI_SERVER is set.
+urlpatterns = [
+    path('api/users/', async_views.user_list),
+    path('api/users/profile/', async_views.user_profile),
+    path('api/users/sessions/', async_views.user_sessions),
+    path('api/users/stats/', async_views.user_stats),
+    path('api/', include('users.urls')),
+]
+
+READ_URLS = [
+    '/api/users/',
+    '/api/users/?page=2&ordering=-username',
+    '/api/users/?role=mentor&fields=id,username',
+    '/api/users/?search=user1',
+    '/api/users/profile/',
+    '/api/users/profile/?fields=role',
+    '/api/users/stats/',
+    '/api/users/sessions/',
+]
+
+
+@pytest.fixture(autouse=True)
+def async_urls(settings):
+    settings.ROOT_URLCONF = __name__
+    settings.AUTHENTICATION_BACKENDS = ['django.contrib.auth.backends.ModelBackend']
+
+
+@pytest.fixture
+def user():
+    user = User.objects.create_user('researcher', password='secret', role='admin')
+    UserProfile.objects.create(user=user, specialization='Kinetics')
+    UserSession.objects.create(
+        user=user, session_key='key', ip_address='203.0.113.7', user_agent='pytest'
+    )
+    for number in range(25):
+        User.objects.create_user(
+            f'user{number:02d}', password='secret',
+            role='mentor' if number % 2 else 'assistant'
+        )
+    return user
+
+
+@pytest.fixture
+def token(user):
+    return Token.objects.create(user=user).key
+
+
+@pytest.mark.parametrize('url', READ_URLS)
+def test_responses_match_the_sync_views(user, token, settings, url):
+    response = Client(HTTP_AUTHORIZATION=f'Token {token}').get(url)
+    assert response.status_code == 200, response.content
+
+    settings.ROOT_URLCONF = 'labjournal.urls'
+    sync = APIClient()
+    sync.force_authenticate(user)
+    assert response.json() == sync.get(url).json()
+
+
+def test_session_authentication(user):
+    client = Client()
+    client.force_login(user)
+    response = client.get('/api/users/sessions/')
+    assert response.status_code == 200, response.content
+    assert response.json()['count'] == 1
+
+
+@pytest.mark.parametrize('headers, status, detail', [
+    ({}, 403, 'Authentication credentials were not provided.'),
+    ({'HTTP_AUTHORIZATION': 'Token nope'}, 403, 'Invalid token.'),
+    ({'HTTP_AUTHORIZATION': 'Token'}, 403,
+     'Invalid token header. No credentials provided.'),
+])
+def test_authentication_errors(user, headers, status, detail):
+    response = Client(**headers).get('/api/users/')
+    assert response.status_code == status
+    assert response.json() == {'detail': detail}
+
+
+def test_inactive_users_are_rejected(user, token):
+    user.is_active = False
+    user.save()
+    response = Client(HTTP_AUTHORIZATION=f'Token {token}').get('/api/users/stats/')
+    assert response.status_code == 403
+    assert response.json() == {'detail': 'User inactive or deleted.'}
+
+
+def test_invalid_pages_are_not_found(user, token):
+    response = Client(HTTP_AUTHORIZATION=f'Token {token}').get('/api/users/?page=99')
+    assert response.status_code == 404
+
+
+def test_writes_go_to_the_sync_view(user, token):
+    response = Client(HTTP_AUTHORIZATION=f'Token {token}').patch(
+        '/api/users/profile/', {'bio': 'Enzymes'}, content_type='application/json'
+    )
+    assert response.status_code == 200, response.content
+    user.refresh_from_db()
+    assert user.bio == 'Enzymes'
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_requests_under_asgi():
+    user = User.objects.create_user('researcher', password='secret', role='admin')
+    token = Token.objects.create(user=user).key
+    urls = ['/api/users/', '/api/users/profile/', '/api/users/stats/']
+
+    async def fetch():
+        client = AsyncClient()
+        return await asyncio.gather(*[
+            client.get(url, headers={'Authorization': f'Token {token}'})
+            for url in urls
+        ])
+
+    for response in asyncio.run(fetch()):
+        assert response.status_code == 200, response.content
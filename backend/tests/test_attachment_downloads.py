@@ -0,0 +1,147 @@
+import datetime
+import os
+
+import pytest
+from django.core.files.base import ContentFile
+from django.utils.http import http_date
+from rest_framework.test import APIClient
+
+from experiments.downloads import RangeNotSatisfiable, parse_range
+from experiments.models import Experiment, ExperimentAttachment
+from users.models import User
+
+pytestmark = [pytest.mark.django_db, pytest.mark.views]
+
+DATA = os.urandom(1000)
+
+
+@pytest.fixture(autouse=True)
+def media(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+    settings.ATTACHMENT_DOWNLOAD_ACCEL_PREFIX = None
+
+
+@pytest.fixture
+def user():
+    return User.objects.create_user('researcher', password='secret', role='admin')
+
+
+@pytest.fixture
+def client(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+@pytest.fixture
+def attachment(user):
+    experiment = Experiment.objects.create(
+        title='Lysozyme folding',
+        description='<p>Folding kinetics</p>',
+        objective='Measure folding rates',
+        planned_start_date=datetime.date(2024, 1, 1),
+        planned_end_date=datetime.date(2024, 2, 1),
+        created_by=user,
+    )
+    attachment = ExperimentAttachment(
+        experiment=experiment,
+        filename='spectra ä.bin',
+        file_type='application/octet-stream',
+        file_size=len(DATA),
+        uploaded_by=user,
+        checksum='abc-1',
+    )
+    attachment.file.save('spectra.bin', ContentFile(DATA))
+    return attachment
+
+
+def url(attachment):
+    return (
+        f'/api/experiments/{attachment.experiment_id}/attachments/'
+        f'{attachment.pk}/download/'
+    )
+
+
+def body(response):
+    return b''.join(response.streaming_content)
+
+
+def test_whole_file(client, attachment):
+    response = client.get(url(attachment))
+    assert response.status_code == 200
+    assert body(response) == DATA
+    assert response['ETag'] == '"abc-1"'
+    assert response['Accept-Ranges'] == 'bytes'
+    assert "UTF-8''spectra%20%C3%A4.bin" in response['Content-Disposition']
+
+
+@pytest.mark.parametrize('header, start, end', [
+    ('bytes=10-19', 10, 19),
+    ('bytes=990-', 990, 999),
+    ('bytes=-5', 995, 999),
+    ('bytes=900-5000', 900, 999),
+])
+def test_range(client, attachment, header, start, end):
+    response = client.get(url(attachment), HTTP_RANGE=header)
+    assert response.status_code == 206
+    assert body(response) == DATA[start:end + 1]
+    assert response['Content-Range'] == f'bytes {start}-{end}/1000'
+    assert response['Content-Length'] == str(end - start + 1)
+
+
+def test_unsatisfiable_range(client, attachment):
+    response = client.get(url(attachment), HTTP_RANGE='bytes=1000-')
+    assert response.status_code == 416
+    assert response['Content-Range'] == 'bytes */1000'
+
+
+@pytest.mark.parametrize('header', ['bytes=0-1,5-6', 'items=0-1', 'bytes=5-2'])
+def test_unsupported_ranges_get_the_whole_file(client, attachment, header):
+    response = client.get(url(attachment), HTTP_RANGE=header)
+    assert response.status_code == 200
+    assert body(response) == DATA
+
+
+def test_if_range_with_the_current_etag(client, attachment):
+    response = client.get(
+        url(attachment), HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"abc-1"'
+    )
+    assert response.status_code == 206
+    assert body(response) == DATA[:10]
+
+
+def test_if_range_with_a_stale_validator(client, attachment):
+    for validator in ['"other"', http_date(0)]:
+        response = client.get(
+            url(attachment), HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=validator
+        )
+        assert response.status_code == 200
+        assert body(response) == DATA
+
+
+def test_if_range_with_the_upload_date(client, attachment):
+    uploaded = http_date(int(attachment.uploaded_at.timestamp()))
+    response = client.get(
+        url(attachment), HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=uploaded
+    )
+    assert response.status_code == 206
+
+
+def test_if_none_match(client, attachment):
+    response = client.get(url(attachment), HTTP_IF_NONE_MATCH='"abc-1"')
+    assert response.status_code == 304
+
+
+def test_accel_redirect(client, attachment, settings):
+    settings.ATTACHMENT_DOWNLOAD_ACCEL_PREFIX = '/protected-media/'
+    response = client.get(url(attachment), HTTP_RANGE='bytes=0-9')
+    assert response.status_code == 200
+    assert response['X-Accel-Redirect'] == (
+        f'/protected-media/{attachment.file.name}'
+    )
+    assert response.content == b''
+
+
+def test_parse_range_of_an_empty_file():
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range('bytes=0-', 0)
@@ -0,0 +1,179 @@
+import base64
+import datetime
+import hashlib
+import io
+import os
+
+import pytest
+from django.db import connection
+from rest_framework.test import APIClient
+
+from experiments import uploads, views
+from experiments.models import AttachmentUpload, Experiment, ExperimentAttachment
+from users.models import User
+
+pytestmark = [pytest.mark.django_db, pytest.mark.views]
+
+DATA = os.urandom(3000)
+
+
+@pytest.fixture(autouse=True)
+def media(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+    settings.ATTACHMENT_UPLOAD_TEMP_DIR = str(tmp_path / 'parts')
+    return tmp_path
+
+
+@pytest.fixture
+def user():
+    return User.objects.create_user('researcher', password='secret', role='admin')
+
+
+@pytest.fixture
+def client(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+@pytest.fixture
+def experiment(user):
+    return Experiment.objects.create(
+        title='Lysozyme folding',
+        description='<p>Folding kinetics</p>',
+        objective='Measure folding rates',
+        planned_start_date=datetime.date(2024, 1, 1),
+        planned_end_date=datetime.date(2024, 2, 1),
+        created_by=user,
+    )
+
+
+@pytest.fixture
+def url(client, experiment):
+    response = client.post(
+        f'/api/experiments/{experiment.pk}/attachments/uploads/',
+        {'filename': 'spectra.bin', 'file_size': len(DATA)},
+        format='json'
+    )
+    assert response.status_code == 201, response.content
+    return (
+        f'/api/experiments/{experiment.pk}/attachments/uploads/'
+        f'{response.json()["id"]}/'
+    )
+
+
+def put(client, url, data, offset, **extra):
+    return client.put(
+        url, data, content_type='application/octet-stream',
+        HTTP_UPLOAD_OFFSET=str(offset), **extra
+    )
+
+
+def checksum(data):
+    return 'sha256 ' + base64.b64encode(hashlib.sha256(data).digest()).decode()
+
+
+def temp_files(media):
+    return sorted(os.listdir(media / 'parts'))
+
+
+def test_chunks_assemble_into_an_attachment(client, url, media):
+    assert put(client, url, DATA[:1000], 0).json()['offset'] == 1000
+    response = put(client, url, DATA[1000:], 1000)
+    assert response.status_code == 201, response.content
+
+    attachment = ExperimentAttachment.objects.get()
+    with open(attachment.file.path, 'rb') as stored:
+        assert stored.read() == DATA
+    digests = [hashlib.sha256(DATA[:1000]), hashlib.sha256(DATA[1000:])]
+    combined = hashlib.sha256(b''.join(sha.digest() for sha in digests))
+    assert response.json()['checksum'] == f'{combined.hexdigest()}-2'
+    assert not AttachmentUpload.objects.exists()
+    assert temp_files(media) == []
+
+
+class DroppedStream(io.BytesIO):
+    """A request body whose client goes away after the first read."""
+    def read(self, size=-1):
+        if self.tell():
+            raise OSError('connection reset')
+        return super().read(size)
+
+
+def test_interrupted_chunk_resumes_from_what_arrived(client, url, monkeypatch):
+    monkeypatch.setattr(uploads, 'READ_SIZE', 400)
+    upload = AttachmentUpload.objects.get()
+    chunk = uploads.receive_chunk(upload, DroppedStream(DATA[:1000]), 1000)
+    uploads.append_chunk(upload, chunk)
+    uploads.discard_chunk(chunk)
+    assert client.get(url).json()['offset'] == 400
+
+    assert put(client, url, DATA[400:], 400).status_code == 201
+    with open(ExperimentAttachment.objects.get().file.path, 'rb') as stored:
+        assert stored.read() == DATA
+
+
+def test_wrong_offset_is_a_conflict(client, url):
+    put(client, url, DATA[:1000], 0)
+    response = put(client, url, DATA[:1000], 0)
+    assert response.status_code == 409
+    assert response.json()['offset'] == 1000
+
+
+def test_checksum_mismatch_keeps_the_offset(client, url, media):
+    put(client, url, DATA[:1000], 0)
+    response = put(
+        client, url, DATA[1000:2000], 1000,
+        HTTP_UPLOAD_CHECKSUM=checksum(b'something else')
+    )
+    assert response.status_code == 400
+    assert response.json()['offset'] == 1000
+    assert client.get(url).json()['offset'] == 1000
+    assert len(temp_files(media)) == 1
+
+    response = put(
+        client, url, DATA[1000:], 1000, HTTP_UPLOAD_CHECKSUM=checksum(DATA[1000:])
+    )
+    assert response.status_code == 201, response.content
+
+
+def test_negative_content_length_is_rejected(client, url):
+    response = put(client, url, b'', 0, CONTENT_LENGTH='-1')
+    assert response.status_code == 400
+    assert client.get(url).json()['offset'] == 0
+
+
+def test_chunk_is_received_outside_a_transaction(client, url, monkeypatch):
+    # The test itself runs in a transaction; the view must not open another.
+    depth = len(connection.atomic_blocks)
+    received = []
+
+    def receive_chunk(*args, **kwargs):
+        received.append(len(connection.atomic_blocks))
+        return uploads.receive_chunk(*args, **kwargs)
+
+    monkeypatch.setattr(views, 'receive_chunk', receive_chunk)
+    assert put(client, url, DATA[:1000], 0).status_code == 200
+    assert received == [depth]
+
+
+def test_offset_is_checked_again_under_the_lock(client, url, media, monkeypatch):
+    def receive_chunk(upload, *args, **kwargs):
+        chunk = uploads.receive_chunk(upload, *args, **kwargs)
+        # A parallel request for the same offset finished first.
+        AttachmentUpload.objects.filter(pk=upload.pk).update(offset=1000)
+        return chunk
+
+    monkeypatch.setattr(views, 'receive_chunk', receive_chunk)
+    response = put(client, url, DATA[:1000], 0)
+    assert response.status_code == 409
+    assert response.json()['offset'] == 1000
+    assert AttachmentUpload.objects.get().part_digests == []
+    assert len(temp_files(media)) == 1
+
+
+def test_discarding_removes_leftover_chunks(client, url, media):
+    upload = AttachmentUpload.objects.get()
+    open(media / 'parts' / f'{upload.pk.hex}.abc.chunk', 'wb').close()
+    assert client.delete(url).status_code == 204
+    assert temp_files(media) == []
@@ -0,0 +1,114 @@
+import datetime
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.db.models import F
+from rest_framework.test import APIClient
+
+from experiments.history import attach_text, snapshot
+from experiments.models import Experiment, ExperimentTextRevision
+from users.models import User
+
+pytestmark = [pytest.mark.django_db, pytest.mark.models]
+
+HistoricalExperiment = Experiment.history.model
+
+
+@pytest.fixture
+def experiment():
+    user = User.objects.create_user('researcher', password='secret', role='admin')
+    experiment = Experiment.objects.create(
+        title='Lysozyme folding',
+        description='<p>v1</p>',
+        objective='Measure folding rates',
+        planned_start_date=datetime.date(2024, 1, 1),
+        planned_end_date=datetime.date(2024, 2, 1),
+        created_by=user,
+    )
+    experiment.title = 'Renamed'
+    experiment.save()
+    experiment.description = '<p>v2</p>'
+    experiment.save()
+    experiment.results = '<p>done</p>'
+    experiment.save()
+    return experiment
+
+
+def records(experiment):
+    return list(experiment.history.order_by('history_date', 'history_id'))
+
+
+def revisions(experiment):
+    return ExperimentTextRevision.objects.filter(experiment_id=experiment.pk)
+
+
+def test_text_is_stored_only_when_it_changes(experiment):
+    # description v1 and v2, results '' and '<p>done</p>'.
+    assert revisions(experiment).count() == 4
+    assert len(records(experiment)) == 4
+
+
+def test_attach_text_sets_the_historical_values(experiment, django_assert_num_queries):
+    history = records(experiment)
+    # Two queries per field for the one experiment.
+    with django_assert_num_queries(4):
+        attach_text(history)
+    assert [record.description for record in history] == [
+        '<p>v1</p>', '<p>v1</p>', '<p>v2</p>', '<p>v2</p>'
+    ]
+    assert [record.results for record in history] == ['', '', '', '<p>done</p>']
+
+
+def test_snapshot_rebuilds_the_experiment(experiment):
+    second = records(experiment)[1]
+    rebuilt = snapshot(second)
+    assert isinstance(rebuilt, Experiment)
+    assert (rebuilt.title, rebuilt.description, rebuilt.results) == (
+        'Renamed', '<p>v1</p>', ''
+    )
+
+
+def test_history_endpoint_shows_the_text_of_the_record(experiment):
+    client = APIClient()
+    client.force_authenticate(experiment.created_by)
+    third = records(experiment)[2]
+    response = client.get(
+        f'/api/experiments/{experiment.pk}/history/{third.history_id}/'
+    )
+    assert response.status_code == 200, response.content
+    assert response.json()['description'] == '<p>v2</p>'
+    assert response.json()['results'] == ''
+
+
+def age(experiment, days):
+    """Move the experiment's history ``days`` into the past."""
+    shift = timedelta(days=days)
+    HistoricalExperiment.objects.filter(id=experiment.pk).update(
+        history_date=F('history_date') - shift
+    )
+    revisions(experiment).update(valid_from=F('valid_from') - shift)
+
+
+def test_thinning_keeps_the_last_record_per_bucket(experiment):
+    age(experiment, 200)
+    call_command('thin_experiment_history', keep_days=90)
+
+    kept = HistoricalExperiment.objects.get(id=experiment.pk)
+    rebuilt = snapshot(kept)
+    assert (rebuilt.description, rebuilt.results) == ('<p>v2</p>', '<p>done</p>')
+    # Only the revisions the kept record resolves to are left.
+    assert revisions(experiment).count() == 2
+
+
+def test_thinning_leaves_recent_history_alone(experiment):
+    call_command('thin_experiment_history', keep_days=90)
+    assert len(records(experiment)) == 4
+    assert revisions(experiment).count() == 4
+
+
+def test_dry_run_deletes_nothing(experiment):
+    age(experiment, 200)
+    call_command('thin_experiment_history', keep_days=90, dry_run=True)
+    assert len(records(experiment)) == 4
+    assert revisions(experiment).count() == 4
@@ -0,0 +1,189 @@
+import datetime
+import json
+
+import fakeredis
+import pytest
+from django.db import IntegrityError, transaction
+from django.test import override_settings
+from kombu.exceptions import OperationalError
+from rest_framework.test import APIClient
+
+from experiments import logs, tasks
+from experiments.models import Experiment, ExperimentLog
+from users.models import User
+
+pytestmark = [pytest.mark.django_db, pytest.mark.cache]
+
+
+@pytest.fixture
+def user():
+    return User.objects.create_user('researcher', password='secret', role='admin')
+
+
+@pytest.fixture
+def experiment(user):
+    return Experiment.objects.create(
+        title='Lysozyme folding',
+        description='<p>Folding kinetics</p>',
+        objective='Measure folding rates',
+        planned_start_date=datetime.date(2024, 1, 1),
+        planned_end_date=datetime.date(2024, 2, 1),
+        created_by=user,
+    )
+
+
+@pytest.fixture
+def buffer(settings, monkeypatch):
+    """Write-behind on, against an in-memory Redis, with flushes recorded."""
+    redis = fakeredis.FakeStrictRedis()
+    monkeypatch.setattr(logs, 'get_buffer_connection', lambda: redis)
+    settings.EXPERIMENT_LOG_WRITE_BEHIND = True
+    redis.scheduled = []
+    monkeypatch.setattr(
+        tasks.flush_experiment_logs, 'apply_async',
+        lambda **kwargs: redis.scheduled.append(kwargs)
+    )
+    return redis
+
+
+def actions():
+    return list(ExperimentLog.objects.order_by('id').values_list('action', flat=True))
+
+
+def test_sync_writes_roll_back_with_the_transaction(experiment, user):
+    with pytest.raises(RuntimeError):
+        with transaction.atomic():
+            logs.log_experiment_action(experiment.pk, user.pk, 'updated')
+            raise RuntimeError
+
+    logs.log_experiment_action(experiment.pk, user.pk, 'viewed')
+
+    assert actions() == ['viewed']
+
+
+def test_records_are_buffered_on_commit_and_flushed_in_order(
+    buffer, experiment, user, django_capture_on_commit_callbacks
+):
+    with django_capture_on_commit_callbacks(execute=True):
+        with transaction.atomic():
+            for number in range(5):
+                logs.log_experiment_action(experiment.pk, user.pk, f'step {number}')
+            assert buffer.llen(logs.BUFFER_KEY) == 0
+        logs.log_experiment_action(999999, user.pk, 'orphan')
+
+    assert buffer.llen(logs.BUFFER_KEY) == 6
+    assert len(buffer.scheduled) == 1
+    assert ExperimentLog.objects.count() == 0
+
+    assert logs.flush_buffer(batch_size=2) == 5
+    assert actions() == [f'step {number}' for number in range(5)]
+    assert buffer.llen(logs.BUFFER_KEY) == 0
+
+
+def test_rolled_back_changes_are_not_buffered(
+    buffer, experiment, user, django_capture_on_commit_callbacks
+):
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                logs.log_experiment_action(experiment.pk, user.pk, 'step_added')
+                raise RuntimeError
+
+    assert callbacks == []
+    assert buffer.llen(logs.BUFFER_KEY) == 0
+
+
+def test_without_a_broker_the_flush_waits_for_the_commit(
+    buffer, experiment, user, monkeypatch, django_capture_on_commit_callbacks
+):
+    def broker_down(**kwargs):
+        raise OperationalError('broker down')
+
+    monkeypatch.setattr(tasks.flush_experiment_logs, 'apply_async', broker_down)
+    # Logged by another request.
+    buffer.rpush(logs.BUFFER_KEY, json.dumps({
+        'e': experiment.pk, 'u': user.pk, 'a': 'earlier', 'd': '', 'ip': None,
+        't': '2024-01-01T00:00:00+00:00',
+    }))
+
+    with django_capture_on_commit_callbacks(execute=True):
+        with transaction.atomic():
+            logs.log_experiment_action(experiment.pk, user.pk, 'later')
+            logs.schedule_flush(buffer)
+            assert buffer.llen(logs.BUFFER_KEY) == 1
+            assert actions() == []
+
+    assert actions() == ['earlier', 'later']
+    assert buffer.llen(logs.BUFFER_KEY) == 0
+
+
+def test_without_redis_records_are_written_synchronously(
+    settings, monkeypatch, experiment, user, django_capture_on_commit_callbacks
+):
+    def redis_down():
+        raise NotImplementedError('no redis')
+
+    monkeypatch.setattr(logs, 'get_buffer_connection', redis_down)
+    settings.EXPERIMENT_LOG_WRITE_BEHIND = True
+
+    with django_capture_on_commit_callbacks(execute=True):
+        logs.log_experiment_action(experiment.pk, user.pk, 'updated')
+
+    assert actions() == ['updated']
+
+
+def test_malformed_records_go_to_the_dead_letter_list(buffer, experiment, user):
+    good = {'e': experiment.pk, 'u': user.pk, 'd': '', 'ip': None,
+            't': '2024-01-01T00:00:00+00:00'}
+    buffer.rpush(
+        logs.BUFFER_KEY,
+        json.dumps({**good, 'a': 'first'}),
+        b'{not json',
+        json.dumps({**good, 'a': 'bad time', 't': 'yesterday'}),
+        json.dumps({'a': 'no fields'}),
+        json.dumps({**good, 'a': 'last'}),
+    )
+
+    assert logs.flush_buffer() == 2
+    assert actions() == ['first', 'last']
+    assert buffer.llen(logs.BUFFER_KEY) == 0
+    assert buffer.llen(logs.DEAD_LETTER_KEY) == 3
+    # The next flush is not stuck on them.
+    assert logs.flush_buffer() == 0
+
+
+def test_records_the_database_rejects_go_to_the_dead_letter_list(
+    buffer, experiment, user, monkeypatch
+):
+    write_records = logs.write_records
+
+    def reject_poison(records):
+        if any(record['a'] == 'poison' for record in records):
+            raise IntegrityError('rejected')
+        return write_records(records)
+
+    monkeypatch.setattr(logs, 'write_records', reject_poison)
+    good = {'e': experiment.pk, 'u': user.pk, 'd': '', 'ip': None,
+            't': '2024-01-01T00:00:00+00:00'}
+    for action in ['first', 'poison', 'last']:
+        buffer.rpush(logs.BUFFER_KEY, json.dumps({**good, 'a': action}))
+
+    assert logs.flush_buffer() == 2
+    assert actions() == ['first', 'last']
+    dead = buffer.lrange(logs.DEAD_LETTER_KEY, 0, -1)
+    assert [json.loads(item)['a'] for item in dead] == ['poison']
+    assert buffer.llen(logs.BUFFER_KEY) == 0
+
+
+@override_settings(LOGIN_TRUSTED_PROXIES=['172.20.0.0/16'])
+def test_views_log_the_client_address_behind_the_proxy(experiment, user):
+    client = APIClient(REMOTE_ADDR='172.20.0.5', HTTP_X_REAL_IP='203.0.113.7')
+    client.force_authenticate(user)
+
+    response = client.patch(
+        f'/api/experiments/{experiment.pk}/', {'title': 'Renamed'}, format='json'
+    )
+
+    assert response.status_code == 200, response.content
+    log = ExperimentLog.objects.get(action='updated')
+    assert log.ip_address == '203.0.113.7'
@@ -0,0 +1,57 @@
+import datetime
+
+import pytest
+
+from experiments.models import Experiment, ExperimentStatus
+from users.models import User
+
+pytestmark = [pytest.mark.django_db, pytest.mark.models]
+
+PAST = datetime.date(2024, 1, 1)
+FUTURE = datetime.date(2100, 1, 1)
+
+
+@pytest.fixture
+def experiments():
+    user = User.objects.create_user('researcher', password='secret', role='admin')
+    cases = [
+        ('late', ExperimentStatus.IN_PROGRESS, PAST, False),
+        ('late archived', ExperimentStatus.IN_PROGRESS, PAST, True),
+        ('on time', ExperimentStatus.IN_PROGRESS, FUTURE, False),
+        ('planned late', ExperimentStatus.PLANNED, PAST, False),
+        ('completed late', ExperimentStatus.COMPLETED, PAST, False),
+    ]
+    for title, status, planned_end_date, is_archived in cases:
+        Experiment.objects.create(
+            title=title,
+            description='d',
+            objective='o',
+            status=status,
+            planned_start_date=datetime.date(2023, 1, 1),
+            planned_end_date=planned_end_date,
+            is_archived=is_archived,
+            created_by=user,
+        )
+
+
+def test_overdue_leaves_out_archived_experiments(experiments):
+    overdue = Experiment.objects.overdue()
+    assert list(overdue.values_list('title', flat=True)) == ['late']
+
+
+def test_annotation_matches_property(experiments):
+    annotated = {
+        experiment.title: experiment.is_overdue
+        for experiment in Experiment.objects.with_overdue()
+    }
+    plain = {
+        experiment.title: experiment.is_overdue
+        for experiment in Experiment.objects.all()
+    }
+    assert annotated == plain
+    assert [title for title, overdue in plain.items() if overdue] == ['late']
+
+
+def test_annotation_matches_overdue(experiments):
+    annotated = Experiment.objects.with_overdue().filter(annotated_is_overdue=True)
+    assert set(annotated) == set(Experiment.objects.overdue())
@@ -0,0 +1,110 @@
+import datetime
+
+import pytest
+from rest_framework.test import APIClient
+
+from experiments.models import Experiment
+from users.models import User
+
+pytestmark = [pytest.mark.django_db, pytest.mark.permissions]
+
+
+@pytest.fixture
+def creator():
+    return User.objects.create_user(
+        'creator', password='secret', role='junior_scientist'
+    )
+
+
+@pytest.fixture
+def experiment(creator):
+    return Experiment.objects.create(
+        title='Lysozyme folding',
+        description='<p>Folding kinetics</p>',
+        objective='Measure folding rates',
+        planned_start_date=datetime.date(2024, 1, 1),
+        planned_end_date=datetime.date(2024, 2, 1),
+        created_by=creator,
+    )
+
+
+def client_for(username, role):
+    user = User.objects.create_user(username, password='secret', role=role)
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+def url(experiment):
+    return f'/api/experiments/{experiment.pk}/'
+
+
+def rename(client, experiment, title):
+    return client.patch(url(experiment), {'title': title}, format='json')
+
+
+@pytest.mark.parametrize('role', ['assistant', 'mentor', 'leader'])
+def test_users_who_cannot_create_experiments_cannot_change_them(experiment, role):
+    client = client_for('other', role)
+    # Even as a collaborator.
+    experiment.collaborators.add(User.objects.get(username='other'))
+
+    assert client.get(url(experiment)).status_code == 200
+    assert rename(client, experiment, 'x').status_code == 403
+    assert client.put(url(experiment), {'title': 'x'}, format='json').status_code == 403
+    assert client.delete(url(experiment)).status_code == 403
+    assert Experiment.objects.get(pk=experiment.pk).title == 'Lysozyme folding'
+
+
+def test_scientists_outside_the_experiment_cannot_change_it(experiment):
+    client = client_for('outsider', 'senior_scientist')
+
+    assert rename(client, experiment, 'x').status_code == 403
+    assert client.delete(url(experiment)).status_code == 403
+    assert Experiment.objects.get(pk=experiment.pk).title == 'Lysozyme folding'
+
+
+def test_creator_can_change_the_experiment(experiment, creator):
+    client = APIClient()
+    client.force_authenticate(creator)
+
+    response = rename(client, experiment, 'Renamed')
+
+    assert response.status_code == 200, response.content
+    assert Experiment.objects.get(pk=experiment.pk).title == 'Renamed'
+
+
+def test_assignee_and_collaborators_can_change_the_experiment(experiment):
+    assignee = client_for('assignee', 'junior_scientist')
+    collaborator = client_for('collaborator', 'senior_scientist')
+    experiment.assigned_to = User.objects.get(username='assignee')
+    experiment.save()
+    experiment.collaborators.add(User.objects.get(username='collaborator'))
+
+    response = rename(assignee, experiment, 'By assignee')
+    assert response.status_code == 200, response.content
+    response = rename(collaborator, experiment, 'By collaborator')
+    assert response.status_code == 200, response.content
+
+
+def test_moderators_can_change_and_delete_any_experiment(experiment):
+    client = client_for('moderator', 'moderator')
+
+    response = rename(client, experiment, 'Moderated')
+    assert response.status_code == 200, response.content
+    assert client.delete(url(experiment)).status_code == 204
+    assert not Experiment.objects.filter(pk=experiment.pk).exists()
+
+
+def test_users_who_cannot_create_experiments_cannot_create_them():
+    client = client_for('assistant', 'assistant')
+
+    response = client.post('/api/experiments/', {
+        'title': 'New',
+        'description': 'd',
+        'objective': 'o',
+        'planned_start_date': '2024-01-01',
+        'planned_end_date': '2024-01-05',
+    }, format='json')
+
+    assert response.status_code == 403
@@ -0,0 +1,123 @@
+import datetime
+import importlib
+
+import pytest
+from rest_framework.test import APIClient
+
+from experiments import search
+from experiments.models import Experiment
+from users.models import User
+
+pytestmark = [pytest.mark.django_db, pytest.mark.views]
+
+SEARCH_URL = '/api/experiments/search/'
+
+
+@pytest.fixture
+def user():
+    return User.objects.create_user('researcher', password='secret', role='admin')
+
+
+@pytest.fixture
+def client(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+@pytest.fixture
+def create(user):
+    def create(title, description='<p>d</p>', objective='o', **fields):
+        return Experiment.objects.create(
+            title=title,
+            description=description,
+            objective=objective,
+            planned_start_date=datetime.date(2024, 1, 1),
+            planned_end_date=datetime.date(2024, 2, 1),
+            created_by=user,
+            **fields
+        )
+    return create
+
+
+def hits(client, query):
+    response = client.get(SEARCH_URL, {'q': query})
+    assert response.status_code == 200, response.content
+    return response.json()['results']
+
+
+def titles(client, query):
+    return [hit['title'] for hit in hits(client, query)]
+
+
+def test_search_requires_a_query(client):
+    response = client.get(SEARCH_URL)
+    assert response.status_code == 400
+
+
+def test_title_matches_rank_above_body_matches(client, create):
+    create('Buffer prep', description='<p>Lysozyme in the buffer</p>')
+    create('Lysozyme folding')
+    create('Buffer exchange', objective='Concentrate lysozyme')
+    assert titles(client, 'lysozyme') == [
+        'Lysozyme folding', 'Buffer exchange', 'Buffer prep'
+    ]
+
+
+def test_html_is_stripped_before_indexing(client, create):
+    create('Folding', description='<p><b>lyso</b>zyme</p>')
+    assert titles(client, 'b') == []
+    assert titles(client, 'lysozyme') == ['Folding']
+
+
+def test_headline_escapes_the_document(client, create):
+    create(
+        'Folding',
+        description='<p>lysozyme &lt;script&gt;alert(1)&lt;/script&gt;</p>',
+    )
+    headline = hits(client, 'lysozyme')[0]['headline']
+    assert '<mark>lysozyme</mark>' in headline
+    assert '&lt;script&gt;' in headline
+    assert '<script>' not in headline
+
+
+def test_query_syntax_is_taken_literally(client, create):
+    create('Folding', description='<p>lysozyme OR</p>')
+    assert titles(client, '"lysozyme OR') == ['Folding']
+    assert titles(client, 'lysozyme NOT') == []
+
+
+def test_saving_reindexes_the_experiment(client, create):
+    experiment = create('Folding', description='<p>lysozyme</p>')
+    experiment.description = '<p>myoglobin</p>'
+    experiment.save()
+    assert titles(client, 'lysozyme') == []
+    assert titles(client, 'myoglobin') == ['Folding']
+
+
+def test_saving_other_fields_keeps_the_document(client, create):
+    experiment = create('Folding', description='<p>lysozyme</p>')
+    experiment.description = '<p>myoglobin</p>'
+    experiment.save(update_fields=['description'])
+    experiment.status = 'in_progress'
+    experiment.save(update_fields=['status'])
+    assert titles(client, 'myoglobin') == ['Folding']
+
+
+def test_deleting_removes_the_document(client, create):
+    experiment = create('Folding')
+    experiment.delete()
+    assert titles(client, 'folding') == []
+
+
+def test_migration_indexes_the_same_document(create):
+    migration = importlib.import_module(
+        'experiments.migrations.0003_experiment_search_vector'
+    )
+    experiment = create(
+        'Folding',
+        description='<p>lysozyme &amp;  myoglobin</p>',
+        results='<ul><li>done</li></ul>',
+    )
+    assert migration.SEARCH_CONFIG == search.SEARCH_CONFIG
+    assert migration.document_parts(experiment) == search.document_parts(experiment)
@@ -0,0 +1,77 @@
+import io
+
+import pytest
+from django.core.wsgi import get_wsgi_application
+from django.middleware.security import SecurityMiddleware
+from django.test import RequestFactory
+from prometheus_client import REGISTRY
+from rest_framework.test import APIClient
+
+from labjournal import instrumentation
+from users.models import User
+
+pytestmark = [pytest.mark.django_db, pytest.mark.performance]
+
+TIMER = 'labjournal.instrumentation.LayerTimer'
+
+
+def observed(layer):
+    count = REGISTRY.get_sample_value(
+        'labjournal_request_layer_seconds_count', {'layer': layer}
+    )
+    return count or 0
+
+
+@pytest.fixture
+def client():
+    client = APIClient()
+    client.force_authenticate(
+        User.objects.create_user('researcher', password='secret', role='admin')
+    )
+    return client
+
+
+def test_middleware_layers_are_exported(client, settings):
+    settings.REQUEST_TIMING = True
+    settings.MIDDLEWARE = [
+        layer for middleware in settings.MIDDLEWARE for layer in (TIMER, middleware)
+    ] + [TIMER]
+    session_layer = 'django.contrib.sessions.middleware.SessionMiddleware'
+    before = observed('view'), observed(session_layer)
+
+    for _ in range(3):
+        assert client.get('/api/users/stats/').status_code == 200
+
+    assert (observed('view'), observed(session_layer)) == (
+        before[0] + 3, before[1] + 3
+    )
+
+
+def test_wsgi_layers_are_exported(settings):
+    settings.REQUEST_TIMING = True
+    layers = instrumentation.WSGILayers(get_wsgi_application())
+    inner = layers.application
+
+    def passthrough(environ, start_response):
+        return inner(environ, start_response)
+
+    application = layers.push(passthrough)
+    handler = 'django.core.handlers.wsgi.WSGIHandler'
+    wrapper = instrumentation.layer_name(passthrough)
+    before = observed(handler), observed(wrapper)
+
+    environ = RequestFactory().get('/api/users/stats/').environ
+    environ['wsgi.input'] = io.BytesIO(b'')
+    application(environ, lambda status, headers: None)
+
+    assert (observed(handler), observed(wrapper)) == (before[0] + 1, before[1] + 1)
+
+
+def test_django_middleware_around_the_wsgi_callable_is_reported():
+    layers = instrumentation.WSGILayers(get_wsgi_application())
+    assert instrumentation.report_layers(layers) == []
+
+    layers.push(SecurityMiddleware(layers.application))
+    problems = instrumentation.report_layers(layers)
+    assert len(problems) == 2
+    assert any('wrapped around the WSGI application' in p for p in problems)
@@ -0,0 +1,102 @@
+import base64
+import datetime
+import json
+
+import pytest
+from rest_framework.test import APIClient
+
+from experiments.models import Experiment, ExperimentLog
+from users.models import User
+
+pytestmark = [pytest.mark.django_db, pytest.mark.api]
+
+
+@pytest.fixture
+def user():
+    return User.objects.create_user('researcher', password='secret', role='admin')
+
+
+@pytest.fixture
+def client(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+@pytest.fixture
+def experiment(user):
+    experiment = Experiment.objects.create(
+        title='Lysozyme folding',
+        description='<p>Folding kinetics</p>',
+        objective='Measure folding rates',
+        planned_start_date=datetime.date(2024, 1, 1),
+        planned_end_date=datetime.date(2024, 2, 1),
+        created_by=user,
+    )
+    ExperimentLog.objects.bulk_create(
+        ExperimentLog(experiment=experiment, user=user, action=f'action {number}')
+        for number in range(45)
+    )
+    # Every row shares a timestamp, so only the primary key orders them.
+    ExperimentLog.objects.update(timestamp=ExperimentLog.objects.first().timestamp)
+    return experiment
+
+
+def logs_url(experiment):
+    return f'/api/experiments/{experiment.pk}/logs/'
+
+
+def cursor(*payload):
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def ids(response):
+    return [row['id'] for row in response.json()['results']]
+
+
+def test_next_links_walk_every_row_once(client, experiment):
+    seen = []
+    url = f'{logs_url(experiment)}?pagination=cursor'
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200, response.content
+        assert 'count' not in response.json()
+        seen += ids(response)
+        url = response.json()['next']
+
+    expected = ExperimentLog.objects.order_by('-timestamp', '-pk')
+    assert seen == list(expected.values_list('pk', flat=True))
+
+
+def test_previous_link_returns_the_page_before(client, experiment):
+    first = client.get(f'{logs_url(experiment)}?pagination=cursor')
+    second = client.get(first.json()['next'])
+    third = client.get(second.json()['next'])
+
+    assert ids(client.get(third.json()['previous'])) == ids(second)
+    assert ids(client.get(second.json()['previous'])) == ids(first)
+    assert first.json()['previous'] is None
+
+
+def test_page_numbers_stay_the_default(client, experiment):
+    response = client.get(logs_url(experiment))
+    assert response.json()['count'] == 45
+
+
+@pytest.mark.parametrize('token', [
+    'zzz',
+    cursor('not a date', 1, 0),
+    cursor('2024-01-01T00:00:00+00:00', 'not a pk', 0),
+    cursor(None, 1, 0),
+    cursor('2024-01-01T00:00:00+00:00'),
+])
+def test_tampered_cursors_are_rejected(client, experiment, token):
+    response = client.get(logs_url(experiment), {'cursor': token})
+    assert response.status_code == 404
+
+
+def test_ordering_cannot_be_changed(client, experiment):
+    response = client.get(
+        logs_url(experiment), {'pagination': 'cursor', 'ordering': 'timestamp'}
+    )
+    assert response.status_code == 400
@@ -0,0 +1,68 @@
+import pytest
+from django.test import RequestFactory, override_settings
+
+from users.lockout import attempt_keys, client_ip, counter_key
+
+pytestmark = [pytest.mark.unit, pytest.mark.security]
+
+PROXY = '172.20.0.5'
+
+
+@pytest.fixture
+def factory():
+    return RequestFactory()
+
+
+@override_settings(LOGIN_TRUSTED_PROXIES=['172.20.0.0/16'])
+def test_clients_behind_the_proxy_get_separate_counters(factory):
+    first = factory.post(
+        '/api/auth/login/',
+        REMOTE_ADDR=PROXY,
+        HTTP_X_REAL_IP='203.0.113.7',
+        HTTP_X_FORWARDED_FOR='203.0.113.7',
+    )
+    second = factory.post(
+        '/api/auth/login/',
+        REMOTE_ADDR=PROXY,
+        HTTP_X_REAL_IP='198.51.100.23',
+        HTTP_X_FORWARDED_FOR='198.51.100.23',
+    )
+
+    first_keys = attempt_keys(first, None)
+    second_keys = attempt_keys(second, None)
+
+    assert first_keys == ['ip:203.0.113.7']
+    assert second_keys == ['ip:198.51.100.23']
+    assert counter_key(first_keys[0]) != counter_key(second_keys[0])
+
+
+@override_settings(LOGIN_TRUSTED_PROXIES=['172.20.0.0/16'])
+def test_forwarded_for_skips_trusted_hops_and_ignores_forged_entries(factory):
+    request = factory.post(
+        '/api/auth/login/',
+        REMOTE_ADDR=PROXY,
+        HTTP_X_FORWARDED_FOR='10.9.9.9, 203.0.113.7, 172.20.0.9',
+    )
+
+    assert client_ip(request) == '203.0.113.7'
+
+
+@override_settings(LOGIN_TRUSTED_PROXIES=['172.20.0.0/16'])
+def test_headers_from_untrusted_addresses_are_ignored(factory):
+    request = factory.post(
+        '/api/auth/login/',
+        REMOTE_ADDR='198.51.100.23',
+        HTTP_X_REAL_IP='203.0.113.7',
+        HTTP_X_FORWARDED_FOR='203.0.113.7',
+    )
+
+    assert attempt_keys(request, 'Alice') == ['ip:198.51.100.23', 'user:alice']
+
+
+@override_settings(LOGIN_TRUSTED_PROXIES=['172.20.0.0/16'])
+def test_falls_back_to_remote_addr_without_a_valid_header(factory):
+    request = factory.post(
+        '/api/auth/login/', REMOTE_ADDR=PROXY, HTTP_X_REAL_IP='unknown'
+    )
+
+    assert client_ip(request) == PROXY
@@ -0,0 +1,191 @@
+import asyncio
+import datetime
+
+import pytest
+from django.test import AsyncClient, Client
+from django.urls import include, path
+from kombu import Connection
+from prometheus_client import REGISTRY
+from prometheus_client.parser import text_string_to_metric_families
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from experiments.models import Experiment, ExperimentStatus
+from labjournal import metrics
+from labjournal.celery import app
+from users import async_views
+from users.models import User, UserSession
+
+pytestmark = [pytest.mark.django_db, pytest.mark.performance]
+
+# For the ASGI test: the stats endpoint served by its async view.
+urlpatterns = [
+    path('api/users/stats/', async_views.user_stats),
+    path('', include('labjournal.urls')),
+]
+
+
+@pytest.fixture
+def user():
+    return User.objects.create_user('researcher', password='secret', role='admin')
+
+
+@pytest.fixture
+def broker_down(monkeypatch):
+    def collect_celery():
+        raise OSError('Connection refused')
+
+    monkeypatch.setitem(metrics.ApplicationCollector.sources, 'broker', collect_celery)
+
+
+@pytest.fixture
+def memory_broker(monkeypatch):
+    monkeypatch.setattr(app, 'connection_for_read', lambda: Connection('memory://'))
+    with Connection('memory://') as connection:
+        yield connection
+        # The in-memory queues live as long as the process.
+        for queue in metrics.celery_queues(app):
+            connection.default_channel.queue_purge(queue)
+
+
+def samples(url):
+    """``{(name, labels): value}`` from a text-format scrape of ``url``."""
+    response = Client().get(url)
+    assert response.status_code == 200, response.content
+    assert response['Content-Type'].startswith('text/plain')
+    return {
+        (sample.name, tuple(sorted(sample.labels.items()))): sample.value
+        for family in text_string_to_metric_families(response.content.decode())
+        for sample in family.samples
+    }
+
+
+def experiment(user, **fields):
+    return Experiment.objects.create(
+        title='Lysozyme folding',
+        description='<p>Folding kinetics</p>',
+        objective='Measure folding rates',
+        planned_start_date=datetime.date(2024, 1, 1),
+        planned_end_date=datetime.date(2024, 2, 1),
+        created_by=user,
+        **fields
+    )
+
+
+def test_domain_gauges(user, broker_down):
+    User.objects.create_user('mentor', password='secret', role='mentor')
+    User.objects.create_user('left', password='secret', role='mentor', is_active=False)
+    experiment(user, status=ExperimentStatus.IN_PROGRESS)
+    experiment(user, status=ExperimentStatus.IN_PROGRESS, is_archived=True)
+    experiment(user)
+    UserSession.objects.create(
+        user=user, session_key='key', ip_address='203.0.113.7', user_agent='pytest'
+    )
+
+    scraped = samples('/api/metrics/')
+    assert scraped['labjournal_users', (('role', 'admin'),)] == 1
+    assert scraped['labjournal_users', (('role', 'mentor'),)] == 1
+    assert scraped['labjournal_users', (('role', 'assistant'),)] == 0
+    assert scraped['labjournal_experiments', (('status', 'in_progress'),)] == 1
+    assert scraped['labjournal_experiments', (('status', 'planned'),)] == 1
+    assert scraped['labjournal_experiments', (('status', 'completed'),)] == 0
+    assert scraped['labjournal_experiments_overdue', ()] == 1
+    assert scraped['labjournal_user_sessions_active', ()] == 1
+
+
+def test_unreachable_sources_are_reported(user, broker_down):
+    scraped = samples('/api/metrics/')
+    assert scraped['labjournal_metrics_source_up', (('source', 'broker'),)] == 0
+    assert scraped['labjournal_metrics_source_up', (('source', 'database'),)] == 1
+    assert not any(name == 'labjournal_celery_queue_length' for name, _ in scraped)
+
+
+def test_celery_queue_depth(memory_broker):
+    queue = memory_broker.SimpleQueue('experiments')
+    queue.put({'task': 'first'})
+    queue.put({'task': 'second'})
+
+    [depth] = metrics.collect_celery()
+    queues = {sample.labels['queue']: sample.value for sample in depth.samples}
+    assert queues['experiments'] == 2
+    # Never declared, so empty rather than an error.
+    assert queues[app.conf.task_default_queue] == 0
+    assert set(queues) == set(metrics.celery_queues(app))
+
+
+def test_queue_depth_in_the_scrape(memory_broker):
+    scraped = samples('/api/metrics/')
+    assert scraped['labjournal_metrics_source_up', (('source', 'broker'),)] == 1
+    assert ('labjournal_celery_queue_length', (('queue', 'celery'),)) in scraped
+
+
+@pytest.fixture
+def request_metrics(settings):
+    settings.MIDDLEWARE = ['labjournal.metrics.RequestMetrics', *settings.MIDDLEWARE]
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_requests_are_recorded_by_view(user, request_metrics):
+    client = APIClient()
+    client.force_authenticate(user)
+    view = 'users:user-list'
+    before = (
+        sample('labjournal_request_db_queries_count', view=view),
+        sample('labjournal_request_db_queries_sum', view=view),
+        sample(
+            'labjournal_request_latency_seconds_count',
+            view=view, method='GET', status='200'
+        ),
+    )
+
+    assert client.get('/api/users/').status_code == 200
+
+    assert sample('labjournal_request_db_queries_count', view=view) == before[0] + 1
+    # The count and the page.
+    assert sample('labjournal_request_db_queries_sum', view=view) == before[1] + 2
+    assert sample(
+        'labjournal_request_latency_seconds_count',
+        view=view, method='GET', status='200'
+    ) == before[2] + 1
+
+
+def test_unresolved_requests_are_recorded(request_metrics):
+    labels = {'view': '<unresolved>', 'method': 'GET', 'status': '404'}
+    before = sample('labjournal_request_latency_seconds_count', **labels)
+    assert Client().get('/no-such-page/').status_code == 404
+    assert sample('labjournal_request_latency_seconds_count', **labels) == before + 1
+
+
+def test_process_metrics_are_served(request_metrics):
+    Client().get('/no-such-page/')
+    body = Client().get('/metrics/').content.decode()
+    for name in [
+        'labjournal_request_latency_seconds_bucket',
+        'labjournal_request_db_queries_bucket',
+        'labjournal_request_db_query_seconds_bucket',
+        'labjournal_request_layer_seconds',
+        'labjournal_db_pool_wait_seconds',
+    ]:
+        assert name in body
+
+
+@pytest.mark.django_db(transaction=True)
+def test_async_requests_record_latency(settings, request_metrics):
+    settings.ROOT_URLCONF = __name__
+    user = User.objects.create_user('researcher', password='secret', role='admin')
+    token = Token.objects.create(user=user).key
+    labels = {
+        'view': 'users.async_views.user_stats', 'method': 'GET', 'status': '200'
+    }
+    before = sample('labjournal_request_latency_seconds_count', **labels)
+
+    async def fetch():
+        return await AsyncClient().get(
+            '/api/users/stats/', headers={'Authorization': f'Token {token}'}
+        )
+
+    assert asyncio.run(fetch()).status_code == 200
+    assert sample('labjournal_request_latency_seconds_count', **labels) == before + 1
@@ -0,0 +1,55 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from users import authentication
+from users.models import User, UserProfile
+
+pytestmark = [pytest.mark.django_db, pytest.mark.views, pytest.mark.performance]
+
+
+@pytest.fixture
+def user():
+    user = User.objects.create_user(
+        'researcher', password='secret', role='junior_scientist',
+        department='Biochemistry', bio='Protein folding',
+    )
+    UserProfile.objects.create(user=user, specialization='Kinetics')
+    return user
+
+
+@pytest.fixture
+def client(user):
+    authentication.local_cache.entries.clear()
+    token = Token.objects.create(user=user)
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+    return client
+
+
+def test_profile_is_read_in_one_query_with_a_cached_token(client):
+    # Puts the token's user in the cache.
+    assert client.get('/api/users/profile/').status_code == 200
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get('/api/users/profile/')
+
+    assert response.status_code == 200, response.content
+    assert len(queries) == 1, [query['sql'] for query in queries]
+    data = response.json()
+    assert data['department'] == 'Biochemistry' and data['bio'] == 'Protein folding'
+    assert data['profile']['specialization'] == 'Kinetics'
+
+
+def test_profile_update_does_not_write_stale_cached_fields(client, user):
+    assert client.get('/api/users/profile/').status_code == 200
+    # Bypasses the signals, so the cached copy is now out of date.
+    User.objects.filter(pk=user.pk).update(role='moderator', is_staff=True)
+
+    response = client.patch('/api/users/profile/', {'first_name': 'Ann'}, format='json')
+
+    assert response.status_code == 200, response.content
+    user.refresh_from_db()
+    assert user.role == 'moderator' and user.is_staff and user.first_name == 'Ann'
@@ -0,0 +1,107 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from users.models import User, UserSession
+from users.sessions import cleanup_expired
+from users.tasks import cleanup_expired_sessions
+
+pytestmark = [pytest.mark.django_db, pytest.mark.tasks]
+
+# Days since the last activity; the fixture has 4 active and 4 inactive
+# sessions of each age.
+AGES = [0, 20, 200]
+
+
+@pytest.fixture
+def user():
+    return User.objects.create_user('researcher', password='secret', role='admin')
+
+
+@pytest.fixture
+def sessions(user, settings):
+    settings.SESSION_COOKIE_AGE = 14 * 24 * 3600
+    settings.USER_SESSION_RETENTION_DAYS = 90
+    now = timezone.now()
+    UserSession.objects.bulk_create(
+        UserSession(
+            user=user,
+            session_key=f'key{number}',
+            ip_address='203.0.113.7',
+            user_agent='pytest',
+            is_active=number % 2 == 0,
+            last_activity=now - timedelta(days=AGES[number % 3]),
+        )
+        for number in range(24)
+    )
+
+
+def active_ages():
+    now = timezone.now()
+    return sorted(
+        (now - session.last_activity).days
+        for session in UserSession.objects.filter(is_active=True)
+    )
+
+
+def test_expired_sessions_are_deactivated_and_old_ones_deleted(sessions):
+    counts = cleanup_expired(batch_size=5)
+
+    # 24 rows in batches of 5.
+    assert counts == {
+        'deactivated': 8, 'deleted': 8, 'batches': 5, 'complete': True
+    }
+    # Only the sessions active within the cookie age stay active.
+    assert active_ages() == [0] * 4
+    # Deactivated rows are deleted once past the retention period, in the
+    # same batch; the 20-day-old ones wait.
+    assert UserSession.objects.filter(is_active=False).count() == 12
+    assert not UserSession.objects.filter(
+        last_activity__lt=timezone.now() - timedelta(days=90)
+    ).exists()
+
+
+def test_a_second_run_finds_nothing(sessions):
+    cleanup_expired()
+    counts = cleanup_expired()
+    assert (counts['deactivated'], counts['deleted']) == (0, 0)
+
+
+def test_each_batch_is_one_update_and_one_delete(
+    sessions, django_assert_num_queries
+):
+    # The bounds, then an update and a delete per batch.
+    with django_assert_num_queries(1 + 2 * 3):
+        counts = cleanup_expired(batch_size=10)
+    assert counts['batches'] == 3
+
+
+def test_batches_start_at_the_lowest_key(sessions):
+    UserSession.objects.filter(pk__in=list(
+        UserSession.objects.order_by('pk').values_list('pk', flat=True)[:20]
+    )).delete()
+    assert cleanup_expired(batch_size=5)['batches'] == 1
+
+
+def test_retention_comes_from_the_settings(sessions, settings):
+    settings.USER_SESSION_RETENTION_DAYS = 10
+    assert cleanup_expired()['deleted'] == 16
+
+
+def test_time_budget_stops_between_batches(sessions):
+    counts = cleanup_expired(batch_size=5, time_budget=0)
+    assert counts == {
+        'deactivated': 0, 'deleted': 0, 'batches': 0, 'complete': False
+    }
+    assert UserSession.objects.count() == 24
+
+
+def test_empty_table():
+    assert cleanup_expired() == {
+        'deactivated': 0, 'deleted': 0, 'batches': 0, 'complete': True
+    }
+
+
+def test_task_returns_the_counts(sessions):
+    assert cleanup_expired_sessions()['deleted'] == 8
@@ -0,0 +1,129 @@
+import datetime
+
+import pytest
+from rest_framework.test import APIRequestFactory
+
+from experiments.models import Experiment, ExperimentStep
+from experiments.serializers import ExperimentStepSerializer
+from experiments.views import ExperimentStepDetailView
+from users.models import User
+
+pytestmark = [pytest.mark.django_db, pytest.mark.models]
+
+
+@pytest.fixture
+def user():
+    return User.objects.create_user('researcher', password='secret', role='admin')
+
+
+@pytest.fixture
+def experiment(user):
+    experiment = Experiment.objects.create(
+        title='Lysozyme folding',
+        description='<p>Folding kinetics</p>',
+        objective='Measure folding rates',
+        planned_start_date=datetime.date(2024, 1, 1),
+        planned_end_date=datetime.date(2024, 2, 1),
+        created_by=user,
+    )
+    for number in range(1, 6):
+        ExperimentStep.objects.create(
+            experiment=experiment,
+            step_number=number,
+            title=f's{number}',
+            description='d',
+        )
+    return experiment
+
+
+def titles(experiment):
+    steps = experiment.steps.order_by('step_number')
+    return list(steps.values_list('title', flat=True))
+
+
+def numbers(experiment):
+    steps = experiment.steps.order_by('step_number')
+    return list(steps.values_list('step_number', flat=True))
+
+
+def test_move_up_slides_the_steps_in_between_down(experiment):
+    step = experiment.steps.get(title='s4')
+    ExperimentStep.objects.move(step, 2)
+
+    assert step.step_number == 2
+    assert titles(experiment) == ['s1', 's4', 's2', 's3', 's5']
+    assert numbers(experiment) == [1, 2, 3, 4, 5]
+
+
+def test_move_down_slides_the_steps_in_between_up(experiment):
+    step = experiment.steps.get(title='s1')
+    ExperimentStep.objects.move(step, 5)
+
+    assert titles(experiment) == ['s2', 's3', 's4', 's5', 's1']
+    assert numbers(experiment) == [1, 2, 3, 4, 5]
+
+
+def test_move_to_the_same_position_changes_nothing(experiment):
+    step = experiment.steps.get(title='s3')
+    ExperimentStep.objects.move(step, 3)
+
+    assert titles(experiment) == ['s1', 's2', 's3', 's4', 's5']
+
+
+def test_shift_opens_a_gap(experiment):
+    assert ExperimentStep.objects.shift(experiment, 3, 1) == 3
+    assert numbers(experiment) == [1, 2, 4, 5, 6]
+
+
+def test_delete_and_shift_closes_the_gap(experiment):
+    step = experiment.steps.get(title='s2')
+    step.delete()
+    ExperimentStep.objects.shift(experiment, step.step_number + 1, -1)
+
+    assert titles(experiment) == ['s1', 's3', 's4', 's5']
+    assert numbers(experiment) == [1, 2, 3, 4]
+
+
+def test_replace_all_reorders_updates_creates_and_deletes(experiment):
+    ids = dict(experiment.steps.values_list('title', 'id'))
+    items = [
+        {'id': ids['s3'], 'title': 's3 renamed', 'description': 'd'},
+        {'title': 'new', 'description': 'd'},
+        {'id': ids['s1'], 'title': 's1', 'description': 'd'},
+    ]
+    steps = ExperimentStep.objects.replace_all(
+        experiment, items, ['title', 'description']
+    )
+
+    assert [step.title for step in steps] == ['s3 renamed', 'new', 's1']
+    assert titles(experiment) == ['s3 renamed', 'new', 's1']
+    assert numbers(experiment) == [1, 2, 3]
+    assert experiment.steps.get(title='s3 renamed').pk == ids['s3']
+    removed = [ids['s2'], ids['s4'], ids['s5']]
+    assert not experiment.steps.filter(pk__in=removed).exists()
+
+
+def test_replace_all_with_an_empty_list_deletes_every_step(experiment):
+    assert ExperimentStep.objects.replace_all(experiment, [], ['title']) == []
+    assert not experiment.steps.exists()
+
+
+def test_update_does_not_write_back_a_stale_step_number(experiment, user):
+    step = experiment.steps.get(title='s3')
+    # Another request inserts a step in front while this one holds step 3.
+    ExperimentStep.objects.shift(experiment, 1, 1)
+    ExperimentStep.objects.create(
+        experiment=experiment, step_number=1, title='s0', description='d'
+    )
+
+    request = APIRequestFactory().patch('/')
+    request.user = user
+    view = ExperimentStepDetailView(request=request, kwargs={'pk': experiment.pk})
+    serializer = ExperimentStepSerializer(
+        step, data={'title': 's3 renamed'}, partial=True
+    )
+    serializer.is_valid(raise_exception=True)
+    view.perform_update(serializer)
+
+    assert titles(experiment) == ['s0', 's1', 's2', 's3 renamed', 's4', 's5']
+    assert numbers(experiment) == [1, 2, 3, 4, 5, 6]
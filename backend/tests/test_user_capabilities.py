@@ -0,0 +1,104 @@
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.db.models import F
+from rest_framework.test import APIRequestFactory
+
+from users import permissions
+from users.models import ROLE_CAPABILITIES, Capability, User, UserRole
+
+pytestmark = [pytest.mark.django_db, pytest.mark.permissions]
+
+# The role lists the permission classes checked before the bitmasks.
+EXPECTED_ROLES = {
+    permissions.IsAdminUser: {'admin'},
+    permissions.IsModeratorUser: {'admin', 'moderator'},
+    permissions.IsMentorUser: {'admin', 'moderator', 'mentor'},
+    permissions.IsLeaderUser: {'admin', 'leader'},
+    permissions.IsSeniorScientistUser: {'admin', 'moderator', 'senior_scientist'},
+    permissions.IsJuniorScientistUser: {
+        'admin', 'moderator', 'senior_scientist', 'junior_scientist'
+    },
+    permissions.CanCreateExperiments: {
+        'admin', 'moderator', 'senior_scientist', 'junior_scientist'
+    },
+    permissions.CanEditProtocols: {'admin', 'moderator', 'senior_scientist'},
+    permissions.CanModerateContent: {'admin', 'moderator'},
+    permissions.CanViewAnalytics: {'admin', 'leader', 'mentor'},
+}
+
+EXPECTED_PROPERTIES = {
+    'can_create_experiments': {
+        'admin', 'moderator', 'senior_scientist', 'junior_scientist'
+    },
+    'can_edit_protocols': {'admin', 'moderator', 'senior_scientist'},
+    'can_moderate_content': {'admin', 'moderator'},
+    'can_view_analytics': {'admin', 'leader', 'mentor'},
+}
+
+
+def request_as(user):
+    request = APIRequestFactory().get('/')
+    request.user = user
+    return request
+
+
+@pytest.mark.parametrize('permission, roles', EXPECTED_ROLES.items())
+def test_permission_classes_allow_the_same_roles(permission, roles):
+    allowed = {
+        role for role in UserRole.values
+        if permission().has_permission(request_as(User(role=role)), None)
+    }
+    assert allowed == roles
+
+
+@pytest.mark.parametrize('name, roles', EXPECTED_PROPERTIES.items())
+def test_user_properties_match_the_roles(name, roles):
+    assert {role for role in UserRole.values if getattr(User(role=role), name)} == roles
+
+
+def test_anonymous_users_hold_nothing():
+    request = request_as(AnonymousUser())
+    assert not any(
+        permission().has_permission(request, None) for permission in EXPECTED_ROLES
+    )
+
+
+def test_capabilities_are_computed_once_per_request(monkeypatch):
+    request = request_as(User(role='admin'))
+    assert permissions.IsAdminUser().has_permission(request, None)
+    monkeypatch.setitem(ROLE_CAPABILITIES, 'admin', 0)
+    assert permissions.IsModeratorUser().has_permission(request, None)
+
+
+def test_has_capability_needs_every_bit():
+    mentor = User(role='mentor')
+    assert mentor.has_capability(Capability.MENTOR | Capability.VIEW_ANALYTICS)
+    assert not mentor.has_capability(Capability.MENTOR | Capability.MODERATE)
+    assert User(role='unknown').capabilities == 0
+
+
+@pytest.fixture
+def users():
+    for role in UserRole.values:
+        User.objects.create_user(role, password='secret', role=role)
+
+
+def test_with_capability_filters_by_role(users):
+    creators = User.objects.with_capability(Capability.CREATE_EXPERIMENTS)
+    assert set(creators.values_list('role', flat=True)) == (
+        EXPECTED_ROLES[permissions.CanCreateExperiments]
+    )
+    both = User.objects.with_capability(Capability.MENTOR | Capability.VIEW_ANALYTICS)
+    assert set(both.values_list('role', flat=True)) == {'admin', 'mentor'}
+
+
+def test_with_capabilities_annotates_the_mask(users):
+    masks = User.objects.with_capabilities().values_list('role', 'capability_mask')
+    assert dict(masks) == ROLE_CAPABILITIES
+
+    mentors = User.objects.with_capabilities().annotate(
+        mentoring=F('capability_mask').bitand(Capability.MENTOR)
+    ).filter(mentoring__gt=0)
+    assert set(mentors.values_list('role', flat=True)) == (
+        EXPECTED_ROLES[permissions.IsMentorUser]
+    )
@@ -0,0 +1,96 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from users.models import User, UserProfile
+from users.serializers import UserSerializer
+
+pytestmark = [pytest.mark.django_db, pytest.mark.serializers]
+
+# The five users of the ``users`` fixture, without the client's own.
+USERS = '/api/users/?department=Biochemistry'
+
+
+@pytest.fixture
+def user():
+    return User.objects.create_user('researcher', password='secret', role='admin')
+
+
+@pytest.fixture
+def client(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+@pytest.fixture
+def users():
+    for number in range(5):
+        user = User.objects.create_user(
+            f'user{number}', password='secret', first_name='Ada',
+            last_name=str(number), email=f'user{number}@example.com',
+            department='Biochemistry'
+        )
+        UserProfile.objects.create(user=user, specialization='Kinetics')
+
+
+def get(client, url):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    assert response.status_code == 200, response.content
+    return response, [query['sql'] for query in queries.captured_queries]
+
+
+def test_fields_trim_the_response_and_the_query(client, users):
+    response, queries = get(client, f'{USERS}&fields=id,full_name')
+    first = response.json()['results'][0]
+    assert set(first) == {'id', 'full_name'}
+    assert first['full_name'] == 'Ada 0'
+    # The count and one narrow page query.
+    assert len(queries) == 2
+    assert '"first_name"' in queries[1]
+    assert '"email"' not in queries[1]
+    assert 'users_userprofile' not in queries[1]
+
+
+def test_omit_keeps_the_rest(client, users):
+    response, queries = get(client, f'{USERS}&omit=avatar,bio')
+    first = response.json()['results'][0]
+    assert 'avatar' not in first and 'bio' not in first
+    assert first['profile']['specialization'] == 'Kinetics'
+    # The profile is joined in, not fetched per row.
+    assert len(queries) == 2
+    assert 'users_userprofile' in queries[1]
+
+
+def test_no_parameters_return_every_field(client, users):
+    response, queries = get(client, '/api/users/')
+    assert set(response.json()['results'][0]) == set(UserSerializer.Meta.fields)
+    assert len(queries) == 2
+
+
+def test_fields_and_omit_combine(client, users):
+    response, _ = get(client, '/api/users/?fields=id,username,email&omit=email')
+    assert set(response.json()['results'][0]) == {'id', 'username'}
+
+
+def test_unknown_names_are_ignored(client, users):
+    response, _ = get(client, '/api/users/?fields=id,password, username ')
+    assert set(response.json()['results'][0]) == {'id', 'username'}
+
+
+def test_detail_view_takes_the_same_parameters(client, user):
+    response, queries = get(client, f'/api/users/{user.pk}/?fields=username')
+    assert response.json() == {'username': 'researcher'}
+    assert len(queries) == 1
+    assert '"email"' not in queries[0]
+
+
+def test_writes_ignore_the_parameters(client, user):
+    response = client.patch(
+        f'/api/users/{user.pk}/?fields=id', {'bio': 'Enzymes'}, format='json'
+    )
+    assert response.status_code == 200, response.content
+    user.refresh_from_db()
+    assert user.bio == 'Enzymes'
@@ -0,0 +1,172 @@
+import pytest
+from django.contrib.auth.hashers import check_password
+from django.core.management import CommandError, call_command
+from rest_framework.test import APIClient
+
+from users import imports
+from users.imports import ImportFailed, hash_passwords, import_users, read_rows
+from users.models import User, UserProfile
+
+pytestmark = [pytest.mark.django_db, pytest.mark.api]
+
+IMPORT_URL = '/api/users/import/'
+
+
+@pytest.fixture
+def user():
+    return User.objects.create_user('researcher', password='secret', role='admin')
+
+
+@pytest.fixture
+def client(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+def rows(count, prefix='student'):
+    return [
+        {
+            'username': f'{prefix}{number}',
+            'email': f'{prefix}{number}@EXAMPLE.org',
+            'password': 'pipette',
+            'role': 'assistant',
+        }
+        for number in range(count)
+    ]
+
+
+def imported():
+    return User.objects.exclude(username='researcher')
+
+
+def test_valid_rows_create_users_and_profiles(client):
+    response = client.post(IMPORT_URL, rows(3), format='json')
+    assert response.status_code == 201, response.content
+    assert response.json()['imported'] == 3
+
+    student = User.objects.get(username='student1')
+    assert student.check_password('pipette')
+    assert student.email == 'student1@example.org'
+    assert UserProfile.objects.filter(user__in=imported()).count() == 3
+
+
+def test_rows_may_be_wrapped_in_users(client):
+    response = client.post(IMPORT_URL, {'users': rows(2)}, format='json')
+    assert response.status_code == 201, response.content
+
+
+def test_every_invalid_row_is_reported_and_nothing_imported(client):
+    data = rows(3) + [
+        {'username': 'student1', 'password': 'pipette'},
+        {'username': 'researcher', 'password': 'pipette'},
+        {'username': 'nopassword'},
+        {'username': 'lab tech', 'password': 'pipette', 'role': 'janitor'},
+    ]
+    response = client.post(IMPORT_URL, data, format='json')
+    assert response.status_code == 400, response.content
+
+    errors = {row['row']: row['errors'] for row in response.json()['rows']}
+    assert list(errors) == [4, 5, 6, 7]
+    assert errors[4] == {'username': ['Same username as row 2.']}
+    assert errors[5] == {'username': ['A user with that username already exists.']}
+    assert 'password' in errors[6]
+    assert set(errors[7]) == {'username', 'role'}
+    assert not imported().exists()
+
+
+def test_a_race_on_a_username_rolls_everything_back(client, monkeypatch):
+    original = User.objects.bulk_create
+
+    def bulk_create(objs, **kwargs):
+        User.objects.create_user('student2', password='pipette')
+        return original(objs, **kwargs)
+
+    monkeypatch.setattr(User.objects, 'bulk_create', bulk_create)
+    response = client.post(IMPORT_URL, rows(3), format='json')
+    assert response.status_code == 409, response.content
+    assert not imported().exists()
+
+
+def test_api_row_limit(client, settings):
+    settings.USER_IMPORT_API_MAX_ROWS = 2
+    response = client.post(IMPORT_URL, rows(3), format='json')
+    assert response.status_code == 400
+    assert 'manage.py import_users' in response.json()['error']
+
+
+@pytest.mark.parametrize('data', [[], {'users': 'student'}, ['student']])
+def test_malformed_payloads(client, data):
+    response = client.post(IMPORT_URL, data, format='json')
+    assert response.status_code == 400
+    assert 'error' in response.json()
+
+
+def test_csv_upload(client, tmp_path):
+    path = tmp_path / 'users.csv'
+    path.write_text(
+        'username,email,password,role\n'
+        'alice,alice@lab.org,pipette,\n'
+        'bob,,pipette,mentor\n'
+    )
+    with open(path, 'rb') as upload:
+        response = client.post(IMPORT_URL, {'file': upload}, format='multipart')
+    assert response.status_code == 201, response.content
+    # Empty cells take the model defaults.
+    assert User.objects.get(username='alice').role == 'assistant'
+    assert User.objects.get(username='bob').role == 'mentor'
+
+
+def test_only_admins_may_import(client, user):
+    user.role = 'mentor'
+    user.save()
+    assert client.post(IMPORT_URL, rows(1), format='json').status_code == 403
+
+
+def test_command_imports_a_json_file(tmp_path):
+    path = tmp_path / 'users.json'
+    path.write_text('[{"username": "alice", "password": "pipette"}]')
+    call_command('import_users', str(path))
+    assert User.objects.get(username='alice').check_password('pipette')
+
+
+def test_command_fails_without_importing(tmp_path, capsys):
+    path = tmp_path / 'users.csv'
+    path.write_text('username,password\nalice,pipette\nalice,pipette\n')
+    with pytest.raises(CommandError, match='1 invalid rows'):
+        call_command('import_users', str(path))
+    assert 'Row 2:' in capsys.readouterr().err
+    assert not User.objects.filter(username='alice').exists()
+
+
+def test_import_users_raises_with_the_errors():
+    with pytest.raises(ImportFailed) as excinfo:
+        import_users([{'username': 'alice'}])
+    assert excinfo.value.errors[0]['row'] == 1
+
+
+def test_row_limit(settings):
+    settings.USER_IMPORT_MAX_ROWS = 2
+    with pytest.raises(ValueError):
+        import_users(rows(3))
+
+
+def test_read_rows_rejects_broken_csv():
+    # Longer than the csv module's field size limit.
+    with pytest.raises(ValueError, match='Invalid CSV'):
+        read_rows('username\n' + 'a' * 200000, 'csv')
+
+
+def test_passwords_are_hashed_in_threads(settings, monkeypatch):
+    settings.USER_IMPORT_HASH_WORKERS = 2
+    pools = []
+    original = imports.ThreadPoolExecutor
+
+    def executor(**kwargs):
+        pools.append(kwargs['max_workers'])
+        return original(**kwargs)
+
+    monkeypatch.setattr(imports, 'ThreadPoolExecutor', executor)
+    hashed = hash_passwords(['a', 'b', 'c'])
+    assert pools == [2]
+    assert [check_password(p, h) for p, h in zip('abc', hashed)] == [True] * 3
@@ -0,0 +1,78 @@
+from types import SimpleNamespace
+
+import pytest
+from rest_framework.test import APIClient
+
+from users import search
+from users.models import User
+
+pytestmark = [pytest.mark.django_db, pytest.mark.api]
+
+
+@pytest.fixture
+def client():
+    user = User.objects.create_user('researcher', password='secret', role='admin')
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+@pytest.fixture(autouse=True)
+def users():
+    User.objects.create_user(
+        'jsmith', password='secret', first_name='John', last_name='Smith',
+        email='js@lab.org'
+    )
+    User.objects.create_user(
+        'bjohnson', password='secret', first_name='Bob', last_name='Xjohnson'
+    )
+    User.objects.create_user(
+        'mjones', password='secret', first_name='Mary', last_name='Jones',
+        email='mary_50%@lab.org'
+    )
+
+
+def usernames(client, **params):
+    response = client.get('/api/users/', {'fields': 'username', **params})
+    assert response.status_code == 200, response.content
+    return [row['username'] for row in response.json()['results']]
+
+
+def test_sqlite_falls_back_to_substring_search():
+    assert isinstance(search.get_search_backend(), search.SQLiteUserSearch)
+
+
+def test_postgres_gets_the_trigram_backend(monkeypatch):
+    monkeypatch.setattr(search, 'connection', SimpleNamespace(vendor='postgresql'))
+    assert isinstance(search.get_search_backend(), search.PostgresUserSearch)
+
+
+def test_word_prefix_matches_rank_first(client):
+    # "John" starts a word for jsmith and sits mid-word for bjohnson.
+    assert usernames(client, search='JOHN') == ['jsmith', 'bjohnson']
+
+
+def test_every_term_must_match(client):
+    assert usernames(client, search='john smi') == ['jsmith']
+
+
+def test_matches_any_name_field(client):
+    assert usernames(client, search='lab.org') == ['jsmith', 'mjones']
+    assert usernames(client, search='mjon') == ['mjones']
+
+
+def test_explicit_ordering_wins(client):
+    assert usernames(client, search='john', ordering='username') == [
+        'bjohnson', 'jsmith'
+    ]
+
+
+def test_like_wildcards_are_literal(client):
+    assert usernames(client, search='50%') == ['mjones']
+    assert usernames(client, search='_50') == ['mjones']
+    assert usernames(client, search='y%') == []
+
+
+@pytest.mark.parametrize('query', ['', '   ', '\x00'])
+def test_blank_queries_leave_the_list_alone(client, query):
+    assert len(usernames(client, search=query)) == 4
@@ -0,0 +1,166 @@
+import json
+
+import fakeredis
+import pytest
+from django.db import IntegrityError
+from django.test import Client, override_settings
+from django.utils import timezone
+from redis.exceptions import ConnectionError
+from rest_framework.test import APIClient
+
+from users import sessions
+from users.models import User, UserSession
+
+pytestmark = [pytest.mark.django_db, pytest.mark.cache]
+
+LOGIN_URL = '/api/auth/login/'
+SESSIONS_URL = '/api/users/sessions/'
+
+
+@pytest.fixture(autouse=True)
+def plain_backend(settings):
+    # The lockout backend's counters are covered in test_lockout.
+    settings.AUTHENTICATION_BACKENDS = ['django.contrib.auth.backends.ModelBackend']
+    sessions._last_touch.clear()
+
+
+@pytest.fixture
+def user():
+    return User.objects.create_user('researcher', password='secret', role='admin')
+
+
+@pytest.fixture
+def registry(settings, monkeypatch):
+    """Write-behind on, against an in-memory Redis."""
+    redis = fakeredis.FakeStrictRedis()
+    monkeypatch.setattr(sessions, 'get_registry_connection', lambda: redis)
+    settings.USER_SESSION_WRITE_BEHIND = True
+    return redis
+
+
+def log_in(**extra):
+    client = Client(**extra)
+    response = client.post(
+        LOGIN_URL, {'username': 'researcher', 'password': 'secret'},
+        content_type='application/json'
+    )
+    assert response.status_code == 200, response.content
+    return client
+
+
+def record(session_key, user, **fields):
+    now = timezone.now().isoformat()
+    return json.dumps({
+        'session_key': session_key,
+        'user_id': str(user.pk),
+        'ip_address': '203.0.113.7',
+        'user_agent': 'pytest',
+        'created_at': now,
+        'last_activity': now,
+        **fields
+    })
+
+
+def test_login_is_registered_in_redis_only(registry, user):
+    client = log_in()
+    assert not UserSession.objects.exists()
+
+    listed = client.get(SESSIONS_URL).json()
+    assert listed['count'] == 1
+    session_key = listed['results'][0]['session_key']
+    assert registry.sismember(sessions.USER_SESSIONS_PREFIX + str(user.pk), session_key)
+    assert registry.llen(sessions.NEW_SESSIONS_KEY) == 1
+
+
+@override_settings(LOGIN_TRUSTED_PROXIES=['172.20.0.0/16'])
+def test_sessions_record_the_client_address_behind_the_proxy(registry, user):
+    client = log_in(REMOTE_ADDR='172.20.0.5', HTTP_X_REAL_IP='203.0.113.7')
+    listed = client.get(SESSIONS_URL).json()
+    assert listed['results'][0]['ip_address'] == '203.0.113.7'
+
+
+def test_flush_writes_sessions_and_activity(registry, user):
+    client = log_in()
+    session_key = client.get(SESSIONS_URL).json()['results'][0]['session_key']
+    assert registry.zscore(sessions.ACTIVITY_KEY, session_key) is not None
+
+    assert sessions.flush_registry() == (1, 1)
+    session = UserSession.objects.get()
+    assert session.session_key == session_key and session.is_active
+    assert registry.llen(sessions.NEW_SESSIONS_KEY) == 0
+    assert sessions.flush_registry() == (0, 0)
+
+
+def test_malformed_records_go_to_the_dead_letter_list(registry, user):
+    registry.rpush(
+        sessions.NEW_SESSIONS_KEY,
+        record('first', user),
+        b'{not json',
+        record('bad time', user, created_at='yesterday'),
+        json.dumps({'session_key': 'no fields'}),
+        record('last', user),
+    )
+
+    assert sessions.flush_registry() == (2, 0)
+    keys = UserSession.objects.order_by('pk').values_list('session_key', flat=True)
+    assert list(keys) == ['first', 'last']
+    assert registry.llen(sessions.NEW_SESSIONS_KEY) == 0
+    assert registry.llen(sessions.DEAD_LETTER_KEY) == 3
+    # The next flush is not stuck on them.
+    assert sessions.flush_registry() == (0, 0)
+
+
+def test_records_the_database_rejects_go_to_the_dead_letter_list(
+    registry, user, monkeypatch
+):
+    bulk_create = UserSession.objects.bulk_create
+
+    def reject_poison(objs, **kwargs):
+        if any(session.session_key == 'poison' for session in objs):
+            raise IntegrityError('rejected')
+        return bulk_create(objs, **kwargs)
+
+    monkeypatch.setattr(UserSession.objects, 'bulk_create', reject_poison)
+    for session_key in ['first', 'poison', 'last']:
+        registry.rpush(sessions.NEW_SESSIONS_KEY, record(session_key, user))
+
+    assert sessions.flush_registry() == (2, 0)
+    keys = UserSession.objects.order_by('pk').values_list('session_key', flat=True)
+    assert list(keys) == ['first', 'last']
+    dead = registry.lrange(sessions.DEAD_LETTER_KEY, 0, -1)
+    assert [json.loads(item)['session_key'] for item in dead] == ['poison']
+
+
+def test_ending_a_session_removes_it_from_the_registry(registry, user):
+    session_key = log_in().get(SESSIONS_URL).json()['results'][0]['session_key']
+    other = APIClient()
+    other.force_authenticate(user)
+
+    response = other.delete(f'{SESSIONS_URL}{session_key}/')
+    assert response.status_code == 200, response.content
+    assert not registry.exists(sessions.SESSION_PREFIX + session_key)
+    # The session was never flushed; ending it writes the row.
+    assert not UserSession.objects.get(session_key=session_key).is_active
+    assert other.delete(f'{SESSIONS_URL}{session_key}/').status_code == 200
+    assert other.delete(f'{SESSIONS_URL}missing/').status_code == 404
+
+
+def test_sessions_of_other_users_cannot_be_ended(registry, user):
+    session_key = log_in().get(SESSIONS_URL).json()['results'][0]['session_key']
+    intruder = APIClient()
+    intruder.force_authenticate(User.objects.create_user('intruder', password='x'))
+
+    assert intruder.delete(f'{SESSIONS_URL}{session_key}/').status_code == 404
+    assert registry.exists(sessions.SESSION_PREFIX + session_key)
+
+
+def test_without_redis_sessions_go_to_the_database(settings, monkeypatch, user):
+    def redis_down():
+        raise ConnectionError('no redis')
+
+    monkeypatch.setattr(sessions, 'get_registry_connection', redis_down)
+    settings.USER_SESSION_WRITE_BEHIND = True
+
+    client = log_in()
+    assert UserSession.objects.count() == 1
+    assert client.get(SESSIONS_URL).json()['count'] == 1
@@ -0,0 +1,99 @@
+import pytest
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.test import APIClient
+
+from users.models import User
+from users.stats import USER_STATS_CACHE_KEY
+
+pytestmark = [pytest.mark.django_db, pytest.mark.cache]
+
+STATS_URL = '/api/users/stats/'
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def user():
+    return User.objects.create_user('researcher', password='secret', role='admin')
+
+
+@pytest.fixture
+def client(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+@pytest.fixture
+def cached(client):
+    assert client.get(STATS_URL).status_code == 200
+    assert cache.get(USER_STATS_CACHE_KEY) is not None
+
+
+def test_stats_come_from_one_query_then_the_cache(
+    client, user, django_assert_num_queries
+):
+    with django_assert_num_queries(1):
+        stats = client.get(STATS_URL).json()
+    assert stats['total_users'] == 1
+    assert stats['role_distribution']['admin'] == 1
+
+    with django_assert_num_queries(0):
+        assert client.get(STATS_URL).json() == stats
+
+
+def test_new_users_invalidate_on_commit(
+    client, cached, django_capture_on_commit_callbacks
+):
+    with django_capture_on_commit_callbacks(execute=True):
+        with transaction.atomic():
+            User.objects.create_user('mentor', password='secret', role='mentor')
+            # Until the commit a reader could still cache the old counts.
+            assert cache.get(USER_STATS_CACHE_KEY) is not None
+
+    assert cache.get(USER_STATS_CACHE_KEY) is None
+    stats = client.get(STATS_URL).json()
+    assert stats['total_users'] == 2
+    assert stats['role_distribution']['mentor'] == 1
+
+
+@pytest.mark.parametrize('field, value', [
+    ('role', 'mentor'), ('is_active', False), ('is_verified', True),
+])
+def test_counted_fields_invalidate(
+    user, cached, django_capture_on_commit_callbacks, field, value
+):
+    setattr(user, field, value)
+    with django_capture_on_commit_callbacks(execute=True):
+        user.save(update_fields=[field])
+    assert cache.get(USER_STATS_CACHE_KEY) is None
+
+
+def test_other_fields_keep_the_cache(user, cached, django_capture_on_commit_callbacks):
+    user.last_login = None
+    with django_capture_on_commit_callbacks(execute=True):
+        user.save(update_fields=['last_login'])
+    assert cache.get(USER_STATS_CACHE_KEY) is not None
+
+
+def test_full_saves_invalidate(user, cached, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        user.save()
+    assert cache.get(USER_STATS_CACHE_KEY) is None
+
+
+def test_deletes_invalidate(client, cached, django_capture_on_commit_callbacks):
+    other = User.objects.create_user('assistant', password='secret')
+    cache.clear()
+    client.get(STATS_URL)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        other.delete()
+    assert cache.get(USER_STATS_CACHE_KEY) is None
+    assert client.get(STATS_URL).json()['total_users'] == 1
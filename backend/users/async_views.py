@@ -0,0 +1,182 @@
+"""
+Async versions of the read-heavy user endpoints, for the ASGI application
+(``labjournal/asgi_prod.py``).
+
+DRF 3.14 views are sync-only, so these are plain Django views. Each one
+borrows the permissions, queryset, filters, pagination and serializer of
+the DRF view it stands in for and does only the I/O itself, through the
+async ORM and cache APIs. URLs, query parameters and response bodies are
+the same; methods other than GET and HEAD are passed to the sync view.
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user
+from django.contrib.auth.models import AnonymousUser
+from django.core.paginator import InvalidPage
+from django.db.models import QuerySet
+from django.http import JsonResponse
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import get_authorization_header
+from rest_framework.request import Request
+
+from . import views
+from .authentication import CachedTokenAuthentication
+from .models import User
+from .sessions import alist_sessions
+from .stats import aget_user_stats
+
+READ_METHODS = ('GET', 'HEAD')
+
+
+async def authenticate(request):
+    """``(user, auth)`` as DRF's session, then token authentication would find them."""
+    if settings.SESSION_COOKIE_NAME in request.COOKIES:
+        # Sessions and the user lookup behind them are sync in Django 4.2.
+        user = await sync_to_async(get_user)(request)
+        if user.is_active:
+            return user, None
+
+    auth = get_authorization_header(request).split()
+    keyword = CachedTokenAuthentication.keyword.lower().encode()
+    if not auth or auth[0].lower() != keyword:
+        return AnonymousUser(), None
+    if len(auth) == 1:
+        raise exceptions.AuthenticationFailed(
+            _('Invalid token header. No credentials provided.')
+        )
+    if len(auth) > 2:
+        raise exceptions.AuthenticationFailed(
+            _('Invalid token header. Token string should not contain spaces.')
+        )
+    try:
+        key = auth[1].decode()
+    except UnicodeError:
+        raise exceptions.AuthenticationFailed(_(
+            'Invalid token header. '
+            'Token string should not contain invalid characters.'
+        ))
+    return await CachedTokenAuthentication().aauthenticate_credentials(key)
+
+
+async def initial(view, request):
+    """Authenticate and check permissions the way ``APIView.initial`` does."""
+    user, auth = await authenticate(request)
+    # Also replaces the lazy request.user, so middleware won't look it up again.
+    view.request.user = user
+    view.request.auth = auth
+    for permission in view.get_permissions():
+        if not permission.has_permission(view.request, view):
+            if not user.is_authenticated:
+                raise exceptions.NotAuthenticated()
+            raise exceptions.PermissionDenied(
+                detail=getattr(permission, 'message', None),
+                code=getattr(permission, 'code', None)
+            )
+
+
+async def paginate(view, objects):
+    """
+    ``paginator.paginate_queryset`` with the count and page fetched
+    asynchronously.
+    """
+    paginator = view.paginator
+    request = view.request
+    page_size = paginator.get_page_size(request) if paginator is not None else None
+    if not page_size:
+        return None
+
+    django_paginator = paginator.django_paginator_class(objects, page_size)
+    if isinstance(objects, QuerySet):
+        django_paginator.count = await objects.acount()
+    else:
+        django_paginator.count = len(objects)
+    page_number = paginator.get_page_number(request, django_paginator)
+    try:
+        page = django_paginator.page(page_number)
+    except InvalidPage as exc:
+        raise exceptions.NotFound(paginator.invalid_page_message.format(
+            page_number=page_number, message=str(exc)
+        ))
+    if isinstance(page.object_list, QuerySet):
+        page.object_list = [obj async for obj in page.object_list]
+
+    paginator.page = page
+    paginator.request = request
+    return list(page)
+
+
+async def list_data(view, objects):
+    page = await paginate(view, objects)
+    if page is None:
+        if isinstance(objects, QuerySet):
+            objects = [obj async for obj in objects]
+        return view.get_serializer(objects, many=True).data
+    data = view.get_serializer(page, many=True).data
+    return view.paginator.get_paginated_response(data).data
+
+
+def read_view(sync_view):
+    """
+    Turn ``handler(view)`` into an async view serving GET and HEAD for ``sync_view``.
+
+    ``view`` is an instance of the DRF view class, set up for the request,
+    that the handler uses for everything but I/O.
+    """
+    def decorator(handler):
+        @wraps(handler)
+        async def async_view(request, *args, **kwargs):
+            if request.method not in READ_METHODS:
+                return await sync_to_async(sync_view)(request, *args, **kwargs)
+
+            view = sync_view.cls(**sync_view.initkwargs)
+            view.setup(Request(request), *args, **kwargs)
+            view.format_kwarg = None
+            view.headers = {}
+            try:
+                await initial(view, request)
+                data = await handler(view)
+            except exceptions.APIException as exc:
+                response = view.handle_exception(exc)
+                error = JsonResponse(
+                    response.data, status=response.status_code, safe=False
+                )
+                for header, value in response.items():
+                    if header not in ('Content-Type', 'Vary'):
+                        error[header] = value
+                return error
+            return JsonResponse(data, safe=False)
+
+        # Like the DRF views: reads are safe, and the sync view does the
+        # CSRF check for session-authenticated writes.
+        async_view.csrf_exempt = True
+        return async_view
+    return decorator
+
+
+@read_view(views.UserProfileView.as_view())
+async def user_profile(view):
+    try:
+        user = await User.objects.select_related('profile').aget(
+            pk=view.request.user.pk
+        )
+    except User.DoesNotExist:
+        raise exceptions.NotFound()
+    return view.get_serializer(user).data
+
+
+@read_view(views.UserListView.as_view())
+async def user_list(view):
+    return await list_data(view, view.filter_queryset(view.get_queryset()))
+
+
+@read_view(views.UserSessionListView.as_view())
+async def user_sessions(view):
+    return await list_data(view, await alist_sessions(view.request.user))
+
+
+@read_view(views.user_stats)
+async def user_stats(view):
+    return await aget_user_stats()
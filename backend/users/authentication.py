@@ -0,0 +1,200 @@
+"""
+Token authentication without a database round-trip per request.
+
+``CachedTokenAuthentication`` resolves ``Authorization: Token <key>`` from
+a small in-process LRU first, then from the default (Redis) cache, and only
+then from the database. What is cached is the token owner's
+``CACHED_USER_FIELDS``, which covers the role-based permission checks; the
+user is rebuilt with every other field deferred, so code that reads e.g.
+``password`` loads it on demand and ``save()`` only writes loaded fields.
+
+``users.signals`` drops the entries when a user is saved or deleted and
+when a token is deleted (logout). The shared cache entry goes at once;
+entries in other processes' LRUs live at most ``TOKEN_AUTH_LOCAL_TTL``
+seconds.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils.translation import gettext_lazy as _
+from redis.exceptions import RedisError
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from .models import User
+
+CACHE_PREFIX = 'users:token:'
+
+CACHED_USER_FIELDS = (
+    'id', 'username', 'email', 'first_name', 'last_name', 'role',
+    'is_active', 'is_staff', 'is_superuser', 'is_verified',
+)
+
+DEFAULT_CACHE_TIMEOUT = 300
+DEFAULT_LOCAL_TTL = 10
+DEFAULT_LOCAL_SIZE = 1024
+
+
+class LocalLRU:
+    """Thread-safe, size-bounded mapping whose entries expire after ``ttl`` seconds."""
+
+    def __init__(self, size, ttl):
+        self.size = size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def discard(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+
+local_cache = LocalLRU(
+    getattr(settings, 'TOKEN_AUTH_LOCAL_SIZE', DEFAULT_LOCAL_SIZE),
+    getattr(settings, 'TOKEN_AUTH_LOCAL_TTL', DEFAULT_LOCAL_TTL),
+)
+
+
+def cache_key(token_key):
+    # Never keep raw tokens in Redis.
+    return CACHE_PREFIX + hashlib.sha256(token_key.encode()).hexdigest()
+
+
+def cache_timeout():
+    return getattr(settings, 'TOKEN_AUTH_CACHE_TIMEOUT', DEFAULT_CACHE_TIMEOUT)
+
+
+def invalidate_tokens(token_keys):
+    """
+    Drop cached credentials for ``token_keys`` here now, and from the shared
+    cache after commit.
+    """
+    keys = [cache_key(token_key) for token_key in token_keys]
+    if not keys:
+        return
+    for key in keys:
+        local_cache.discard(key)
+
+    def drop_shared():
+        try:
+            cache.delete_many(keys)
+        except RedisError:
+            pass
+
+    transaction.on_commit(drop_shared)
+
+
+def invalidate_user_tokens(user_id):
+    invalidate_tokens(
+        Token.objects.filter(user_id=user_id).values_list('key', flat=True)
+    )
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    model = Token
+
+    def authenticate_credentials(self, key):
+        shared_key = cache_key(key)
+        data = local_cache.get(shared_key)
+        if data is None:
+            data = self.shared_get(shared_key)
+            if data is None:
+                data = self.load(key)
+                self.shared_set(shared_key, data)
+            local_cache.set(shared_key, data)
+        return self.build(key, data)
+
+    async def aauthenticate_credentials(self, key):
+        """
+        ``authenticate_credentials`` for async views, through the async cache
+        and ORM APIs.
+        """
+        shared_key = cache_key(key)
+        data = local_cache.get(shared_key)
+        if data is None:
+            data = await self.ashared_get(shared_key)
+            if data is None:
+                data = self.user_data(await self.aget_token(key))
+                await self.ashared_set(shared_key, data)
+            local_cache.set(shared_key, data)
+        return self.build(key, data)
+
+    @staticmethod
+    def build(key, data):
+        # from_db() takes the loaded values in model field order.
+        fields = [f.attname for f in User._meta.concrete_fields if f.attname in data]
+        user = User.from_db(DEFAULT_DB_ALIAS, fields, [data[field] for field in fields])
+        return user, Token(key=key, user=user)
+
+    def load(self, key):
+        try:
+            token = Token.objects.select_related('user').get(key=key)
+        except Token.DoesNotExist:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+        return self.user_data(token)
+
+    @staticmethod
+    async def aget_token(key):
+        try:
+            return await Token.objects.select_related('user').aget(key=key)
+        except Token.DoesNotExist:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+
+    @staticmethod
+    def user_data(token):
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+        return {field: getattr(token.user, field) for field in CACHED_USER_FIELDS}
+
+    @staticmethod
+    def shared_get(key):
+        try:
+            return cache.get(key)
+        except RedisError:
+            return None
+
+    @staticmethod
+    def shared_set(key, data):
+        try:
+            cache.set(key, data, cache_timeout())
+        except RedisError:
+            pass
+
+    @staticmethod
+    async def ashared_get(key):
+        try:
+            return await cache.aget(key)
+        except RedisError:
+            return None
+
+    @staticmethod
+    async def ashared_set(key, data):
+        try:
+            await cache.aset(key, data, cache_timeout())
+        except RedisError:
+            pass
@@ -0,0 +1,39 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.exceptions import PermissionDenied
+
+from .lockout import attempt_keys, clear_failures, locked_for, record_failure
+
+UserModel = get_user_model()
+
+
+class LockoutModelBackend(ModelBackend):
+    """
+    ``ModelBackend`` behind the login lockout in ``users.lockout``.
+
+    Locked-out attempts are refused before the password is hashed. The
+    remaining lock time is left on the request as ``login_locked_for``.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        keys = attempt_keys(request, username)
+
+        wait = locked_for(keys)
+        if wait:
+            if request is not None:
+                request.login_locked_for = wait
+            # Stops authenticate() from trying any other backend.
+            raise PermissionDenied
+
+        user = super().authenticate(
+            request, username=username, password=password, **kwargs
+        )
+        if user is None:
+            wait = record_failure(keys)
+            if wait and request is not None:
+                request.login_locked_for = wait
+        else:
+            clear_failures(keys)
+        return user
@@ -0,0 +1,136 @@
+"""
+Bulk user import.
+
+``import_users`` validates every row with ``UserImportSerializer``, hashes
+the passwords in a thread pool (PBKDF2 releases the GIL while it hashes)
+and inserts the users and their profiles with ``bulk_create`` in one
+transaction. Nothing is imported unless every row is valid;
+``ImportFailed.errors`` lists the problems by row number, counting from 1
+for the first user.
+
+Used by ``POST /api/users/import/`` and ``manage.py import_users``. Hashing
+takes a few hundred milliseconds per password, so the API takes at most
+``USER_IMPORT_API_MAX_ROWS`` users, which fit well within the request
+timeout; larger files go through the management command.
+"""
+import csv
+import io
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from .models import User, UserProfile
+from .serializers import UserImportSerializer
+from .stats import invalidate_user_stats
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ROWS = 5000
+DEFAULT_API_MAX_ROWS = 50
+BATCH_SIZE = 500
+
+
+class ImportFailed(Exception):
+    def __init__(self, errors):
+        super().__init__(f'{len(errors)} invalid rows')
+        self.errors = errors
+
+
+def read_rows(content, format='csv'):
+    """Rows from a JSON array of objects or a CSV file with a header line."""
+    if format == 'json':
+        return json.loads(content)
+    try:
+        # Empty cells fall back to the model defaults, e.g. for ``role``.
+        return [
+            {
+                key: value for key, value in row.items()
+                if key is not None and value != ''
+            }
+            for row in csv.DictReader(io.StringIO(content))
+        ]
+    except csv.Error as exc:
+        raise ValueError(f'Invalid CSV: {exc}')
+
+
+def hash_passwords(passwords):
+    """``make_password`` for each of ``passwords``, spread over a thread pool."""
+    workers = getattr(settings, 'USER_IMPORT_HASH_WORKERS', None) or os.cpu_count() or 1
+    workers = min(workers, len(passwords))
+    if workers <= 1:
+        return [make_password(password) for password in passwords]
+    # Threads, not processes: forking a threaded gunicorn worker isn't safe.
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(make_password, passwords))
+
+
+def api_max_rows():
+    return getattr(settings, 'USER_IMPORT_API_MAX_ROWS', DEFAULT_API_MAX_ROWS)
+
+
+def validate_rows(rows):
+    """Validated data for each row; raises ``ImportFailed`` with every problem found."""
+    max_rows = getattr(settings, 'USER_IMPORT_MAX_ROWS', DEFAULT_MAX_ROWS)
+    if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+        raise ValueError('Expected a list of users.')
+    if not rows:
+        raise ValueError('No users to import.')
+    if len(rows) > max_rows:
+        raise ValueError(f'At most {max_rows} users can be imported at once.')
+
+    errors = {}
+    valid = []
+    rows_by_username = {}
+    for number, row in enumerate(rows, start=1):
+        serializer = UserImportSerializer(data=row)
+        if not serializer.is_valid():
+            errors[number] = serializer.errors
+            continue
+        data = serializer.validated_data
+        data['username'] = User.normalize_username(data['username'])
+        if data['username'] in rows_by_username:
+            first = rows_by_username[data['username']]
+            errors[number] = {'username': [f'Same username as row {first}.']}
+            continue
+        rows_by_username[data['username']] = number
+        valid.append(data)
+
+    usernames = list(rows_by_username)
+    for start in range(0, len(usernames), BATCH_SIZE):
+        taken = User.objects.filter(
+            username__in=usernames[start:start + BATCH_SIZE]
+        ).values_list('username', flat=True)
+        for username in taken:
+            errors[rows_by_username[username]] = {
+                'username': ['A user with that username already exists.']
+            }
+
+    if errors:
+        raise ImportFailed([
+            {'row': number, 'errors': errors[number]} for number in sorted(errors)
+        ])
+    return valid
+
+
+def import_users(rows):
+    """Create a user and profile for each row, all or none. Returns the new users."""
+    valid = validate_rows(rows)
+    passwords = hash_passwords([data.pop('password') for data in valid])
+    users = []
+    for data, password in zip(valid, passwords):
+        data['email'] = User.objects.normalize_email(data.get('email', ''))
+        users.append(User(password=password, **data))
+
+    with transaction.atomic():
+        users = User.objects.bulk_create(users, batch_size=BATCH_SIZE)
+        UserProfile.objects.bulk_create(
+            [UserProfile(user=user) for user in users], batch_size=BATCH_SIZE
+        )
+        # bulk_create sends no post_save signals.
+        invalidate_user_stats()
+    return users
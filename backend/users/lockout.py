@@ -0,0 +1,175 @@
+"""
+Login attempt tracking and lockout.
+
+Failed logins are counted per client IP and per username in Redis sorted
+sets, one member per failure, so the window slides instead of resetting on
+a fixed schedule. Recording a failure and, on reaching
+``LOGIN_FAILURE_LIMIT`` within ``LOGIN_FAILURE_WINDOW`` seconds, locking
+the IP or username for ``LOGIN_LOCKOUT_DURATION`` seconds is one atomic
+Lua script call. A login therefore costs one round-trip to check the locks
+and one to record the outcome.
+
+Behind nginx ``REMOTE_ADDR`` is the proxy's address, so requests coming
+from one of ``LOGIN_TRUSTED_PROXIES`` are counted by the client address the
+proxy passes on in ``X-Real-IP`` or ``X-Forwarded-For``. Those headers are
+ignored on requests from anywhere else, where a client could forge them.
+
+If Redis is unreachable, logins are let through unthrottled rather than
+locking everyone out.
+"""
+import ipaddress
+import logging
+import time
+import uuid
+from functools import lru_cache
+
+from django.conf import settings
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'users:login'
+
+DEFAULT_FAILURE_LIMIT = 3
+DEFAULT_FAILURE_WINDOW = 300  # seconds
+DEFAULT_LOCKOUT_DURATION = 300  # seconds
+DEFAULT_TRUSTED_PROXIES = ('127.0.0.1', '::1')
+
+# KEYS: the failure counters, then their lock keys in the same order.
+# ARGV: now, window, limit, lockout duration, unique member for this failure.
+# Returns the lockout duration if any key got locked, else 0.
+RECORD_FAILURE_SCRIPT = """
+local count = #KEYS / 2
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local locked = 0
+for i = 1, count do
+    local counter = KEYS[i]
+    redis.call('ZREMRANGEBYSCORE', counter, '-inf', now - window)
+    redis.call('ZADD', counter, now, ARGV[5])
+    redis.call('EXPIRE', counter, window)
+    if redis.call('ZCARD', counter) >= tonumber(ARGV[3]) then
+        redis.call('SET', KEYS[count + i], 1, 'EX', ARGV[4])
+        redis.call('DEL', counter)
+        locked = tonumber(ARGV[4])
+    end
+end
+return locked
+"""
+
+
+def get_lockout_connection():
+    from django_redis import get_redis_connection
+    return get_redis_connection('default')
+
+
+@lru_cache(maxsize=8)
+def trusted_networks(proxies):
+    return tuple(ipaddress.ip_network(proxy, strict=False) for proxy in proxies)
+
+
+def parse_ip(value):
+    try:
+        return ipaddress.ip_address(value.strip())
+    except ValueError:
+        return None
+
+
+def is_trusted_proxy(address):
+    proxies = getattr(settings, 'LOGIN_TRUSTED_PROXIES', DEFAULT_TRUSTED_PROXIES)
+    return any(address in network for network in trusted_networks(tuple(proxies)))
+
+
+def client_ip(request):
+    """
+    The address a request came from, e.g. a login attempt.
+
+    For requests relayed by a trusted proxy that is ``X-Real-IP``, or else the
+    nearest ``X-Forwarded-For`` entry not added by a trusted proxy; otherwise,
+    or if the headers hold no valid address, ``REMOTE_ADDR``.
+    """
+    remote_addr = request.META.get('REMOTE_ADDR')
+    remote = parse_ip(remote_addr or '')
+    if remote is None or not is_trusted_proxy(remote):
+        return remote_addr
+
+    real_ip = parse_ip(request.META.get('HTTP_X_REAL_IP', ''))
+    if real_ip is not None:
+        return str(real_ip)
+    # Entries further left than the first untrusted one were sent by the client.
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR', '').split(',')
+    for value in reversed(forwarded):
+        address = parse_ip(value)
+        if address is None:
+            break
+        if not is_trusted_proxy(address):
+            return str(address)
+    return remote_addr
+
+
+def attempt_keys(request, username):
+    """Identities a login attempt counts against: the client IP and the username."""
+    keys = []
+    ip_address = client_ip(request) if request is not None else None
+    if ip_address:
+        keys.append(f'ip:{ip_address}')
+    if username:
+        keys.append(f'user:{username.lower()}')
+    return keys
+
+
+def counter_key(key):
+    return f'{KEY_PREFIX}:failures:{key}'
+
+
+def lock_key(key):
+    return f'{KEY_PREFIX}:locked:{key}'
+
+
+def locked_for(keys):
+    """Seconds until the longest lock on ``keys`` expires; 0 if none is locked."""
+    if not keys:
+        return 0
+    try:
+        pipe = get_lockout_connection().pipeline()
+        for key in keys:
+            pipe.ttl(lock_key(key))
+        return max(0, *pipe.execute())
+    except (RedisError, NotImplementedError) as exc:
+        logger.warning('Login lockout store unavailable, not checking locks: %s', exc)
+        return 0
+
+
+def record_failure(keys):
+    """
+    Count a failed attempt against ``keys``. Returns the lockout duration if
+    this locked one.
+    """
+    if not keys:
+        return 0
+    try:
+        connection = get_lockout_connection()
+        # Runs as EVALSHA, falling back to EVAL if the script isn't loaded yet.
+        script = connection.register_script(RECORD_FAILURE_SCRIPT)
+        return script(
+            keys=[counter_key(key) for key in keys] + [lock_key(key) for key in keys],
+            args=[
+                time.time(),
+                getattr(settings, 'LOGIN_FAILURE_WINDOW', DEFAULT_FAILURE_WINDOW),
+                getattr(settings, 'LOGIN_FAILURE_LIMIT', DEFAULT_FAILURE_LIMIT),
+                getattr(settings, 'LOGIN_LOCKOUT_DURATION', DEFAULT_LOCKOUT_DURATION),
+                uuid.uuid4().hex,
+            ]
+        )
+    except (RedisError, NotImplementedError) as exc:
+        logger.warning('Login lockout store unavailable, failure not recorded: %s', exc)
+        return 0
+
+
+def clear_failures(keys):
+    if not keys:
+        return
+    try:
+        get_lockout_connection().delete(*[counter_key(key) for key in keys])
+    except (RedisError, NotImplementedError) as exc:
+        logger.warning('Login lockout store unavailable, failures not cleared: %s', exc)
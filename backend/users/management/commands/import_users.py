@@ -0,0 +1,37 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from users.imports import ImportFailed, import_users, read_rows
+
+
+class Command(BaseCommand):
+    help = (
+        'Create users from a CSV file with a header line or a JSON array. '
+        'Columns: username, email, password, first_name, last_name, role, '
+        'department, position. Nothing is imported if any row is invalid.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument(
+            '--format', choices=['csv', 'json'], help='Defaults to the file extension'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        default_format = 'json' if path.lower().endswith('.json') else 'csv'
+        format = options['format'] or default_format
+        with open(path, encoding='utf-8-sig') as f:
+            content = f.read()
+
+        try:
+            users = import_users(read_rows(content, format))
+        except ImportFailed as exc:
+            for error in exc.errors:
+                self.stderr.write(f'Row {error["row"]}: {json.dumps(error["errors"])}')
+            raise CommandError(f'{len(exc.errors)} invalid rows, no users imported.')
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        self.stdout.write(self.style.SUCCESS(f'Imported {len(users)} users'))
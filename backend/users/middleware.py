@@ -0,0 +1,43 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+
+from .sessions import touch_due, touch_session
+
+
+class SessionActivityMiddleware:
+    """
+    Keep ``UserSession.last_activity`` current for session-authenticated requests.
+
+    Goes after ``AuthenticationMiddleware``. Touches are throttled and
+    buffered by ``users.sessions``, so most requests cost nothing here.
+    Under ASGI only requests due a touch leave the event loop.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        session = getattr(request, 'session', None)
+        if session is not None and session.session_key:
+            self.touch(request, session.session_key)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        session = getattr(request, 'session', None)
+        session_key = session.session_key if session is not None else None
+        if session_key and touch_due(session_key):
+            # request.user and the registry client are sync.
+            await sync_to_async(self.touch)(request, session.session_key)
+        return response
+
+    @staticmethod
+    def touch(request, session_key):
+        if request.user.is_authenticated:
+            touch_session(session_key)
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.7 on 2026-10-18 13:39
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='usersession',
+            name='created_at',
+            field=models.DateTimeField(
+                default=django.utils.timezone.now, editable=False
+            ),
+        ),
+        migrations.AlterField(
+            model_name='usersession',
+            name='last_activity',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.7 on 2026-10-18 13:41
+
+from django.db import migrations
+import users.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_usersession_explicit_timestamps'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='user',
+            managers=[
+                ('objects', users.models.UserManager()),
+            ],
+        ),
+    ]
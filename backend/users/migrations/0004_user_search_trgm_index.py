@@ -0,0 +1,40 @@
+# Generated by Django 4.2.7 on 2026-10-18 13:44
+
+from django.db import migrations
+
+# Must stay identical to users.search.SearchName as rendered on PostgreSQL.
+SEARCH_NAME_SQL = (
+    "lower((username)::text || ' ' || (first_name)::text || ' ' || "
+    "(last_name)::text || ' ' || (email)::text)"
+)
+
+
+def create_search_index(apps, schema_editor):
+    # pg_trgm is PostgreSQL-only; SQLite searches with plain substring matching.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    # CONCURRENTLY keeps users_user writable while the index builds.
+    schema_editor.execute(
+        'CREATE INDEX CONCURRENTLY IF NOT EXISTS user_search_name_trgm '
+        f'ON users_user USING gin (({SEARCH_NAME_SQL}) gin_trgm_ops)'
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX CONCURRENTLY IF EXISTS user_search_name_trgm')
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ('users', '0003_user_capability_manager'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
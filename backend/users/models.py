@@ -1,5 +1,6 @@
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager as AuthUserManager
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 
@@ -13,6 +14,78 @@ class UserRole(models.TextChoices):
     ASSISTANT = 'assistant', _('Assistant')
 
 
+class Capability:
+    """
+    Bits of ``User.capabilities``.
+
+    Test with ``user.capabilities & Capability.X``; combine with ``|``.
+    """
+    ADMINISTER = 1 << 0
+    MODERATE = 1 << 1
+    MENTOR = 1 << 2
+    LEAD = 1 << 3
+    EDIT_PROTOCOLS = 1 << 4
+    CREATE_EXPERIMENTS = 1 << 5
+    VIEW_ANALYTICS = 1 << 6
+
+
+# The capability matrix: which roles hold each capability.
+CAPABILITY_ROLES = {
+    Capability.ADMINISTER: [UserRole.ADMIN],
+    Capability.MODERATE: [UserRole.ADMIN, UserRole.MODERATOR],
+    Capability.MENTOR: [UserRole.ADMIN, UserRole.MODERATOR, UserRole.MENTOR],
+    Capability.LEAD: [UserRole.ADMIN, UserRole.LEADER],
+    Capability.EDIT_PROTOCOLS: [
+        UserRole.ADMIN, UserRole.MODERATOR, UserRole.SENIOR_SCIENTIST
+    ],
+    Capability.CREATE_EXPERIMENTS: [
+        UserRole.ADMIN, UserRole.MODERATOR, UserRole.SENIOR_SCIENTIST,
+        UserRole.JUNIOR_SCIENTIST
+    ],
+    Capability.VIEW_ANALYTICS: [UserRole.ADMIN, UserRole.LEADER, UserRole.MENTOR],
+}
+
+# Compiled once at import: role -> capability bitmask.
+ROLE_CAPABILITIES = {
+    role: sum(
+        capability for capability, roles in CAPABILITY_ROLES.items() if role in roles
+    )
+    for role in UserRole.values
+}
+
+
+def roles_with(capabilities):
+    """Roles holding all of ``capabilities``."""
+    return [
+        role for role, mask in ROLE_CAPABILITIES.items()
+        if mask & capabilities == capabilities
+    ]
+
+
+class UserQuerySet(models.QuerySet):
+    def with_capability(self, capabilities):
+        """
+        Users holding all of ``capabilities``; a plain ``role IN (...)``, so it
+        can use an index.
+        """
+        return self.filter(role__in=roles_with(capabilities))
+
+    def with_capabilities(self):
+        """Annotate ``capability_mask``, the role's bitmask as an SQL expression."""
+        return self.annotate(capability_mask=models.Case(
+            *[
+                models.When(role=role, then=models.Value(mask))
+                for role, mask in ROLE_CAPABILITIES.items()
+            ],
+            default=models.Value(0),
+            output_field=models.IntegerField()
+        ))
+
+
+class UserManager(AuthUserManager.from_queryset(UserQuerySet)):
+    pass
+
+
 class User(AbstractUser):
     role = models.CharField(
         max_length=20,
@@ -27,6 +100,8 @@ class User(AbstractUser):
     is_verified = models.BooleanField(default=False)
     two_factor_enabled = models.BooleanField(default=False)
     
+    objects = UserManager()
+    
     class Meta:
         verbose_name = _('User')
         verbose_name_plural = _('Users')
@@ -34,37 +109,28 @@ class User(AbstractUser):
     def __str__(self):
         return f"{self.get_full_name()} ({self.username})"
     
+    @property
+    def capabilities(self):
+        return ROLE_CAPABILITIES.get(self.role, 0)
+    
+    def has_capability(self, capabilities):
+        return self.capabilities & capabilities == capabilities
+    
     @property
     def can_create_experiments(self):
-        return self.role in [
-            UserRole.ADMIN,
-            UserRole.MODERATOR,
-            UserRole.SENIOR_SCIENTIST,
-            UserRole.JUNIOR_SCIENTIST
-        ]
+        return bool(self.capabilities & Capability.CREATE_EXPERIMENTS)
     
     @property
     def can_edit_protocols(self):
-        return self.role in [
-            UserRole.ADMIN,
-            UserRole.MODERATOR,
-            UserRole.SENIOR_SCIENTIST
-        ]
+        return bool(self.capabilities & Capability.EDIT_PROTOCOLS)
     
     @property
     def can_moderate_content(self):
-        return self.role in [
-            UserRole.ADMIN,
-            UserRole.MODERATOR
-        ]
+        return bool(self.capabilities & Capability.MODERATE)
     
     @property
     def can_view_analytics(self):
-        return self.role in [
-            UserRole.ADMIN,
-            UserRole.LEADER,
-            UserRole.MENTOR
-        ]
+        return bool(self.capabilities & Capability.VIEW_ANALYTICS)
 
 
 class UserProfile(models.Model):
@@ -89,8 +155,10 @@ class UserSession(models.Model):
     session_key = models.CharField(max_length=40, unique=True)
     ip_address = models.GenericIPAddressField()
     user_agent = models.TextField()
-    created_at = models.DateTimeField(auto_now_add=True)
-    last_activity = models.DateTimeField(auto_now=True)
+    # Set explicitly rather than by auto_now/auto_now_add: rows are written
+    # after the fact by the session registry (see users/sessions.py).
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+    last_activity = models.DateTimeField(default=timezone.now)
     is_active = models.BooleanField(default=True)
     
     class Meta:
@@ -1,93 +1,68 @@
 from rest_framework import permissions
-from .models import User
+from .models import Capability
 
 
-class IsAdminUser(permissions.BasePermission):
+def request_capabilities(request):
+    """Capability bitmask of the requesting user, computed once per request."""
+    try:
+        return request._capabilities
+    except AttributeError:
+        user = request.user
+        authenticated = user and user.is_authenticated
+        request._capabilities = user.capabilities if authenticated else 0
+        return request._capabilities
+
+
+class CapabilityPermission(permissions.BasePermission):
     """
-    Allow access only to admin users.
+    Allow access to users whose role holds ``capability``.
     """
+    capability = 0
+
     def has_permission(self, request, view):
-        return bool(
-            request.user and
-            request.user.is_authenticated and
-            request.user.role == User.UserRole.ADMIN
-        )
+        return bool(request_capabilities(request) & self.capability)
+
+
+class IsAdminUser(CapabilityPermission):
+    """
+    Allow access only to admin users.
+    """
+    capability = Capability.ADMINISTER
 
 
-class IsModeratorUser(permissions.BasePermission):
+class IsModeratorUser(CapabilityPermission):
     """
     Allow access only to moderator users.
     """
-    def has_permission(self, request, view):
-        return bool(
-            request.user and
-            request.user.is_authenticated and
-            request.user.role in [User.UserRole.ADMIN, User.UserRole.MODERATOR]
-        )
+    capability = Capability.MODERATE
 
 
-class IsMentorUser(permissions.BasePermission):
+class IsMentorUser(CapabilityPermission):
     """
     Allow access only to mentor users.
     """
-    def has_permission(self, request, view):
-        return bool(
-            request.user and
-            request.user.is_authenticated and
-            request.user.role in [
-                User.UserRole.ADMIN,
-                User.UserRole.MODERATOR,
-                User.UserRole.MENTOR
-            ]
-        )
+    capability = Capability.MENTOR
 
 
-class IsLeaderUser(permissions.BasePermission):
+class IsLeaderUser(CapabilityPermission):
     """
     Allow access only to leader users.
     """
-    def has_permission(self, request, view):
-        return bool(
-            request.user and
-            request.user.is_authenticated and
-            request.user.role in [
-                User.UserRole.ADMIN,
-                User.UserRole.LEADER
-            ]
-        )
+    capability = Capability.LEAD
 
 
-class IsSeniorScientistUser(permissions.BasePermission):
+class IsSeniorScientistUser(CapabilityPermission):
     """
     Allow access only to senior scientist users.
     """
-    def has_permission(self, request, view):
-        return bool(
-            request.user and
-            request.user.is_authenticated and
-            request.user.role in [
-                User.UserRole.ADMIN,
-                User.UserRole.MODERATOR,
-                User.UserRole.SENIOR_SCIENTIST
-            ]
-        )
+    capability = Capability.EDIT_PROTOCOLS
 
 
-class IsJuniorScientistUser(permissions.BasePermission):
+class IsJuniorScientistUser(CapabilityPermission):
     """
     Allow access only to junior scientist users.
     """
-    def has_permission(self, request, view):
-        return bool(
-            request.user and
-            request.user.is_authenticated and
-            request.user.role in [
-                User.UserRole.ADMIN,
-                User.UserRole.MODERATOR,
-                User.UserRole.SENIOR_SCIENTIST,
-                User.UserRole.JUNIOR_SCIENTIST
-            ]
-        )
+    capability = Capability.CREATE_EXPERIMENTS
 
 
 class IsOwnerOrReadOnly(permissions.BasePermission):
@@ -104,49 +79,47 @@ class IsOwnerOrReadOnly(permissions.BasePermission):
         return obj == request.user
 
 
-class CanCreateExperiments(permissions.BasePermission):
+class IsExperimentMemberOrModerator(permissions.BasePermission):
+    """
+    Object-level permission to only allow the creator, assignee or a
+    collaborator of an experiment, or a moderator, to edit it.
+    """
+    def has_object_permission(self, request, view, obj):
+        if request.method in permissions.SAFE_METHODS:
+            return True
+        if request_capabilities(request) & Capability.MODERATE:
+            return True
+
+        user_id = request.user.pk
+        if user_id in (obj.created_by_id, obj.assigned_to_id):
+            return True
+        # Prefetched by ``with_list_related``, so this costs no query there.
+        return any(user.pk == user_id for user in obj.collaborators.all())
+
+
+class CanCreateExperiments(CapabilityPermission):
     """
     Allow experiment creation only to users with appropriate permissions.
     """
-    def has_permission(self, request, view):
-        return bool(
-            request.user and
-            request.user.is_authenticated and
-            request.user.can_create_experiments
-        )
+    capability = Capability.CREATE_EXPERIMENTS
 
 
-class CanEditProtocols(permissions.BasePermission):
+class CanEditProtocols(CapabilityPermission):
     """
     Allow protocol editing only to users with appropriate permissions.
     """
-    def has_permission(self, request, view):
-        return bool(
-            request.user and
-            request.user.is_authenticated and
-            request.user.can_edit_protocols
-        )
+    capability = Capability.EDIT_PROTOCOLS
 
 
-class CanModerateContent(permissions.BasePermission):
+class CanModerateContent(CapabilityPermission):
     """
     Allow content moderation only to users with appropriate permissions.
     """
-    def has_permission(self, request, view):
-        return bool(
-            request.user and
-            request.user.is_authenticated and
-            request.user.can_moderate_content
-        )
+    capability = Capability.MODERATE
 
 
-class CanViewAnalytics(permissions.BasePermission):
+class CanViewAnalytics(CapabilityPermission):
     """
     Allow analytics viewing only to users with appropriate permissions.
     """
-    def has_permission(self, request, view):
-        return bool(
-            request.user and
-            request.user.is_authenticated and
-            request.user.can_view_analytics
-        )
+    capability = Capability.VIEW_ANALYTICS
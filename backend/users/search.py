@@ -0,0 +1,93 @@
+"""
+People search for the users API.
+
+Every user is matched against one lower-cased ``search_name`` expression:
+username, first and last name and email joined by spaces. PostgreSQL keeps
+a pg_trgm GIN index on exactly that expression (see migration 0004), which
+serves both the substring match and the fuzzy word-similarity match, and
+ranks by ``word_similarity``. Other backends, i.e. the SQLite databases
+used by ``settings_test`` and ``settings_dev``, fall back to substring
+matching with word-prefix matches first.
+"""
+from django.contrib.postgres.lookups import TrigramWordSimilar
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db import connection
+from django.db.models import Case, F, FloatField, Func, Q, TextField, Value, When
+from django.db.models.functions import Cast
+from rest_framework.filters import SearchFilter
+
+SEARCH_NAME_FIELDS = ('username', 'first_name', 'last_name', 'email')
+
+
+class SearchName(Func):
+    """``lower(username || ' ' || first_name || ' ' || last_name || ' ' || email)``."""
+    template = 'LOWER(%(expressions)s)'
+    arg_joiner = " || ' ' || "
+    output_field = TextField()
+
+    def __init__(self, **extra):
+        super().__init__(*[F(field) for field in SEARCH_NAME_FIELDS], **extra)
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        # Spelled out with casts so it matches the indexed expression exactly.
+        copy = self.copy()
+        copy.set_source_expressions(
+            [Cast(e, TextField()) for e in copy.get_source_expressions()]
+        )
+        return super(SearchName, copy).as_sql(compiler, connection, **extra_context)
+
+
+class PostgresUserSearch:
+    def search(self, queryset, query):
+        terms = query.lower().split()
+        queryset = queryset.annotate(search_name=SearchName())
+        for term in terms:
+            queryset = queryset.filter(
+                Q(search_name__contains=term)
+                | TrigramWordSimilar(F('search_name'), Value(term))
+            )
+        return queryset.annotate(
+            search_rank=TrigramWordSimilarity(Value(' '.join(terms)), F('search_name'))
+        )
+
+
+class SQLiteUserSearch:
+    def search(self, queryset, query):
+        terms = query.lower().split()
+        queryset = queryset.annotate(search_name=SearchName())
+        for term in terms:
+            queryset = queryset.filter(search_name__contains=term)
+        # Rank names with a word starting with the first term above mid-word matches.
+        return queryset.annotate(search_rank=Case(
+            When(
+                Q(search_name__startswith=terms[0])
+                | Q(search_name__contains=f' {terms[0]}'),
+                then=Value(1.0)
+            ),
+            default=Value(0.0),
+            output_field=FloatField()
+        ))
+
+
+def get_search_backend():
+    if connection.vendor == 'postgresql':
+        return PostgresUserSearch()
+    return SQLiteUserSearch()
+
+
+class UserSearchFilter(SearchFilter):
+    """
+    ``?search=`` through the user search backend, best matches first.
+
+    Goes after ``OrderingFilter``; an explicit ``?ordering=`` still wins.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '')
+        query = query.replace('\x00', '').strip()
+        if not query:
+            return queryset
+        queryset = get_search_backend().search(queryset, query)
+        if not request.query_params.get('ordering'):
+            queryset = queryset.order_by('-search_rank', 'username')
+        return queryset
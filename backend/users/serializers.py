@@ -1,4 +1,5 @@
-from rest_framework import serializers
+from rest_framework import exceptions, serializers
+from rest_framework.validators import UniqueValidator
 from django.contrib.auth import authenticate
 from .models import User, UserProfile, UserSession
 
@@ -9,10 +10,58 @@ class UserProfileSerializer(serializers.ModelSerializer):
         fields = ['specialization', 'experience_years', 'publications', 'certifications']
 
 
-class UserSerializer(serializers.ModelSerializer):
+def requested_fields(query_params, available):
+    """
+    Names from ``available`` kept by the ``?fields=`` and ``?omit=`` query
+    parameters.
+    """
+    names = list(available)
+    if query_params.get('fields'):
+        wanted = {name.strip() for name in query_params['fields'].split(',')}
+        names = [name for name in names if name in wanted]
+    if query_params.get('omit'):
+        unwanted = {name.strip() for name in query_params['omit'].split(',')}
+        names = [name for name in names if name not in unwanted]
+    return names
+
+
+class SparseFieldsetMixin:
+    """
+    Lets ``GET`` requests trim the response with ``?fields=a,b`` and ``?omit=c``.
+
+    ``field_columns`` maps serializer fields to the model columns they read,
+    for ``columns()``; unlisted fields read the column of the same name.
+    """
+    field_columns = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None or request.method != 'GET':
+            return
+        kept = set(requested_fields(request.query_params, self.fields))
+        for name in list(self.fields):
+            if name not in kept:
+                self.fields.pop(name)
+
+    @classmethod
+    def columns(cls, names):
+        """Model columns needed to render the serializer fields ``names``."""
+        columns = []
+        for name in names:
+            columns.extend(cls.field_columns.get(name, [name]))
+        return columns
+
+
+class UserSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     profile = UserProfileSerializer(read_only=True)
     full_name = serializers.SerializerMethodField()
     
+    field_columns = {
+        'full_name': ['first_name', 'last_name'],
+        'profile': [],
+    }
+    
     class Meta:
         model = User
         fields = [
@@ -49,6 +98,31 @@ class UserCreateSerializer(serializers.ModelSerializer):
         return user
 
 
+class UserImportSerializer(serializers.ModelSerializer):
+    """
+    One row of a bulk user import (see ``users.imports``).
+
+    Usernames are checked for uniqueness once for the whole import rather
+    than with a query per row.
+    """
+    password = serializers.CharField(write_only=True)
+    
+    class Meta:
+        model = User
+        fields = [
+            'username', 'email', 'password', 'first_name', 'last_name',
+            'role', 'department', 'position'
+        ]
+    
+    def get_fields(self):
+        fields = super().get_fields()
+        for field in fields.values():
+            field.validators = [
+                v for v in field.validators if not isinstance(v, UniqueValidator)
+            ]
+        return fields
+
+
 class UserUpdateSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
@@ -67,8 +141,14 @@ class LoginSerializer(serializers.Serializer):
         password = attrs.get('password')
         
         if username and password:
-            user = authenticate(username=username, password=password)
+            request = self.context.get('request')
+            user = authenticate(request=request, username=username, password=password)
             if not user:
+                wait = getattr(request, 'login_locked_for', 0)
+                if wait:
+                    raise exceptions.Throttled(
+                        wait=wait, detail='Too many failed login attempts.'
+                    )
                 raise serializers.ValidationError('Invalid credentials')
             if not user.is_active:
                 raise serializers.ValidationError('User account is disabled')
@@ -0,0 +1,433 @@
+"""
+Registry of active login sessions.
+
+With ``USER_SESSION_WRITE_BEHIND`` on, the registry lives in Redis:
+
+- ``users:session:<key>``: hash with the session details, expiring with the session
+- ``users:user_sessions:<user id>``: set of the user's session keys
+- ``users:session_new``: list of sessions not yet written to ``UserSession``
+- ``users:session_activity``: sorted set of session key -> last activity (epoch)
+
+That is the Redis behind ``WRITE_BEHIND_CACHE_ALIAS``, which must not evict
+keys: new sessions and activity times exist nowhere else until flushed.
+
+Activity is coalesced twice: each process touches a session at most once
+per ``ACTIVITY_RESOLUTION`` seconds, and the sorted set keeps only the
+latest time per session. ``users.tasks.flush_user_sessions`` inserts the new
+sessions and copies the activity times to the ``UserSession`` audit table.
+Buffered sessions that cannot be parsed or inserted are moved to
+``users:session_dead_letter`` instead of blocking the ones behind them.
+
+Without write-behind, or when Redis is unreachable, sessions are written to
+the database directly.
+
+``users.tasks.cleanup_expired_sessions`` deactivates rows idle for longer
+than ``SESSION_COOKIE_AGE`` and deletes inactive rows older than
+``USER_SESSION_RETENTION_DAYS``, one primary key range at a time. It runs
+in a Celery worker, which Prometheus doesn't scrape, so the number of rows
+deactivated and deleted is logged and returned as the task result.
+"""
+import json
+import logging
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from importlib import import_module
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DataError, IntegrityError, transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from redis.exceptions import RedisError, ResponseError
+
+from .lockout import client_ip
+from .models import UserSession
+
+logger = logging.getLogger(__name__)
+
+SESSION_PREFIX = 'users:session:'
+USER_SESSIONS_PREFIX = 'users:user_sessions:'
+NEW_SESSIONS_KEY = 'users:session_new'
+DEAD_LETTER_KEY = 'users:session_dead_letter'
+ACTIVITY_KEY = 'users:session_activity'
+ACTIVITY_FLUSHING_KEY = 'users:session_activity:flushing'
+FLUSH_LOCK_KEY = 'users:session_flush_lock'
+
+ACTIVITY_RESOLUTION = 60  # seconds
+BATCH_SIZE = 500
+
+CLEANUP_BATCH_SIZE = 1000
+DEFAULT_RETENTION_DAYS = 90
+# Below the Celery task_soft_time_limit of 300 seconds.
+DEFAULT_CLEANUP_TIME_BUDGET = 240  # seconds
+
+# session key -> time.monotonic() of this process's last touch
+_last_touch = {}
+_LAST_TOUCH_LIMIT = 10000
+
+
+def get_registry_connection():
+    from django_redis import get_redis_connection
+    alias = getattr(settings, 'WRITE_BEHIND_CACHE_ALIAS', 'default')
+    return get_redis_connection(alias)
+
+
+def write_behind():
+    return getattr(settings, 'USER_SESSION_WRITE_BEHIND', False)
+
+
+def build_session(record):
+    return UserSession(
+        session_key=record['session_key'],
+        user_id=int(record['user_id']),
+        ip_address=record['ip_address'] or None,
+        user_agent=record['user_agent'],
+        created_at=parse_datetime(record['created_at']),
+        last_activity=parse_datetime(record['last_activity']),
+    )
+
+
+def decode(data):
+    return {key.decode(): value.decode() for key, value in data.items()}
+
+
+def register_session(request, user):
+    """
+    Record a new login session without writing to the database on the
+    request path.
+    """
+    now = timezone.now().isoformat()
+    record = {
+        'session_key': request.session.session_key,
+        'user_id': str(user.pk),
+        'ip_address': client_ip(request) or '',
+        'user_agent': request.META.get('HTTP_USER_AGENT', ''),
+        'created_at': now,
+        'last_activity': now,
+    }
+
+    if not write_behind():
+        build_session(record).save()
+        return
+
+    session_key = SESSION_PREFIX + record['session_key']
+    user_key = USER_SESSIONS_PREFIX + record['user_id']
+    try:
+        pipe = get_registry_connection().pipeline()
+        pipe.hset(session_key, mapping=record)
+        pipe.expire(session_key, settings.SESSION_COOKIE_AGE)
+        pipe.sadd(user_key, record['session_key'])
+        pipe.expire(user_key, settings.SESSION_COOKIE_AGE)
+        pipe.rpush(NEW_SESSIONS_KEY, json.dumps(record, separators=(',', ':')))
+        pipe.execute()
+    except RedisError as exc:
+        logger.warning(
+            'Session registry unavailable, writing session synchronously: %s', exc
+        )
+        build_session(record).save()
+
+
+def touch_due(session_key):
+    """Whether this process is due to record activity on the session."""
+    last = _last_touch.get(session_key)
+    return last is None or time.monotonic() - last >= ACTIVITY_RESOLUTION
+
+
+def touch_session(session_key):
+    """
+    Note activity on a session; at most one write per session and process
+    per ``ACTIVITY_RESOLUTION``.
+    """
+    if not touch_due(session_key):
+        return
+    if len(_last_touch) >= _LAST_TOUCH_LIMIT:
+        _last_touch.clear()
+    _last_touch[session_key] = time.monotonic()
+
+    now = timezone.now()
+    if write_behind():
+        try:
+            connection = get_registry_connection()
+            connection.zadd(ACTIVITY_KEY, {session_key: now.timestamp()})
+            return
+        except RedisError as exc:
+            logger.warning(
+                'Session registry unavailable, writing activity synchronously: %s',
+                exc
+            )
+    UserSession.objects.filter(session_key=session_key, is_active=True).update(
+        last_activity=now
+    )
+
+
+def active_sessions(user):
+    return UserSession.objects.filter(user=user, is_active=True).order_by('-created_at')
+
+
+def list_sessions(user):
+    """The user's active sessions, newest first."""
+    if write_behind():
+        try:
+            return list_registered_sessions(user)
+        except RedisError as exc:
+            logger.warning(
+                'Session registry unavailable, reading sessions from the database: %s',
+                exc
+            )
+    return list(active_sessions(user))
+
+
+async def alist_sessions(user):
+    """
+    ``list_sessions`` for async views. The Redis client is sync, so the
+    registry is read in a thread.
+    """
+    if write_behind():
+        try:
+            return await sync_to_async(list_registered_sessions)(user)
+        except RedisError as exc:
+            logger.warning(
+                'Session registry unavailable, reading sessions from the database: %s',
+                exc
+            )
+    return [session async for session in active_sessions(user)]
+
+
+def list_registered_sessions(user):
+    connection = get_registry_connection()
+    user_key = USER_SESSIONS_PREFIX + str(user.pk)
+    keys = [key.decode() for key in connection.smembers(user_key)]
+    if not keys:
+        return []
+
+    pipe = connection.pipeline()
+    for key in keys:
+        pipe.hgetall(SESSION_PREFIX + key)
+        pipe.zscore(ACTIVITY_KEY, key)
+        pipe.zscore(ACTIVITY_FLUSHING_KEY, key)
+    results = pipe.execute()
+
+    sessions = []
+    expired = []
+    for index, key in enumerate(keys):
+        data, *scores = results[index * 3:index * 3 + 3]
+        if not data:
+            expired.append(key)
+            continue
+        session = build_session(decode(data))
+        scores = [score for score in scores if score is not None]
+        if scores:
+            session.last_activity = datetime.fromtimestamp(
+                max(scores), tz=dt_timezone.utc
+            )
+        sessions.append(session)
+
+    if expired:
+        connection.srem(user_key, *expired)
+    return sorted(sessions, key=lambda session: session.created_at, reverse=True)
+
+
+def end_session(user, session_key):
+    """
+    Mark a session of ``user`` as ended. Returns False if the user has no
+    such session.
+    """
+    record = None
+    if write_behind():
+        try:
+            connection = get_registry_connection()
+            data = connection.hgetall(SESSION_PREFIX + session_key)
+            record = decode(data) if data else None
+            if record and record['user_id'] == str(user.pk):
+                pipe = connection.pipeline()
+                pipe.delete(SESSION_PREFIX + session_key)
+                pipe.srem(USER_SESSIONS_PREFIX + str(user.pk), session_key)
+                pipe.zrem(ACTIVITY_KEY, session_key)
+                pipe.execute()
+            else:
+                record = None
+        except RedisError as exc:
+            logger.warning('Session registry unavailable: %s', exc)
+
+    if record is not None:
+        # The row may still be waiting in the new-session buffer.
+        UserSession.objects.bulk_create([build_session(record)], ignore_conflicts=True)
+    _last_touch.pop(session_key, None)
+    updated = UserSession.objects.filter(user=user, session_key=session_key).update(
+        is_active=False, last_activity=timezone.now()
+    )
+    return bool(updated)
+
+
+def delete_django_session(session_key):
+    """Log the session out everywhere by deleting it from the session store."""
+    engine = import_module(settings.SESSION_ENGINE)
+    engine.SessionStore(session_key).delete()
+
+
+def flush_registry(batch_size=BATCH_SIZE):
+    """
+    Write buffered sessions and activity to ``UserSession``. Returns
+    (sessions, activity) counts.
+    """
+    try:
+        connection = get_registry_connection()
+        lock = connection.lock(FLUSH_LOCK_KEY, timeout=60)
+        if not lock.acquire(blocking=False):
+            return 0, 0
+    except RedisError as exc:
+        logger.warning('Session registry unavailable, nothing to flush: %s', exc)
+        return 0, 0
+
+    try:
+        return (
+            flush_new_sessions(connection, batch_size),
+            flush_activity(connection, batch_size),
+        )
+    finally:
+        lock.release()
+
+
+def flush_new_sessions(connection, batch_size):
+    written = 0
+    while True:
+        raw = connection.lrange(NEW_SESSIONS_KEY, 0, batch_size - 1)
+        if not raw:
+            return written
+        written += flush_session_batch(connection, raw)
+        # Trim only after the rows are committed.
+        connection.ltrim(NEW_SESSIONS_KEY, len(raw), -1)
+
+
+def parse_session(item):
+    """The session in a buffered item; raises ``ValueError`` if it is malformed."""
+    try:
+        session = build_session(json.loads(item))
+    except (KeyError, TypeError) as exc:
+        raise ValueError(f'Malformed session record: {exc!r}')
+    if session.created_at is None or session.last_activity is None:
+        raise ValueError(f'Invalid session timestamps: {item!r}')
+    return session
+
+
+def flush_session_batch(connection, raw):
+    """
+    Insert one batch of buffered sessions; those that cannot be parsed or
+    inserted go to ``DEAD_LETTER_KEY``. Other database errors, such as a lost
+    connection, propagate and leave the batch in the buffer.
+    """
+    parsed = []
+    rejected = []
+    for item in raw:
+        try:
+            parsed.append((item, parse_session(item)))
+        except ValueError as exc:
+            logger.error('Dropping malformed session record: %s', exc)
+            rejected.append(item)
+
+    try:
+        with transaction.atomic():
+            UserSession.objects.bulk_create(
+                [session for _, session in parsed], ignore_conflicts=True
+            )
+        written = len(parsed)
+    except (DataError, IntegrityError):
+        # One bad row fails the whole insert; find it by writing them one by one.
+        written = 0
+        for item, session in parsed:
+            try:
+                with transaction.atomic():
+                    UserSession.objects.bulk_create([session], ignore_conflicts=True)
+                written += 1
+            except (DataError, IntegrityError) as exc:
+                logger.error('Dropping session record %s: %s', item, exc)
+                rejected.append(item)
+
+    if rejected:
+        connection.rpush(DEAD_LETTER_KEY, *rejected)
+    return written
+
+
+def flush_activity(connection, batch_size):
+    # Swap the set out so touches made during the flush land in a fresh one;
+    # a leftover set from a failed flush is retried first.
+    if not connection.exists(ACTIVITY_FLUSHING_KEY):
+        try:
+            connection.rename(ACTIVITY_KEY, ACTIVITY_FLUSHING_KEY)
+        except ResponseError:
+            return 0
+
+    updated = 0
+    start = 0
+    while True:
+        batch = connection.zrange(
+            ACTIVITY_FLUSHING_KEY, start, start + batch_size - 1, withscores=True
+        )
+        if not batch:
+            break
+        start += len(batch)
+        activity = {
+            key.decode(): datetime.fromtimestamp(score, tz=dt_timezone.utc)
+            for key, score in batch
+        }
+        sessions = list(
+            UserSession.objects.filter(session_key__in=activity, is_active=True)
+            .only('pk', 'session_key', 'last_activity')
+        )
+        for session in sessions:
+            session.last_activity = max(
+                session.last_activity, activity[session.session_key]
+            )
+        UserSession.objects.bulk_update(sessions, ['last_activity'])
+        updated += len(sessions)
+
+    connection.delete(ACTIVITY_FLUSHING_KEY)
+    return updated
+
+
+def cleanup_expired(batch_size=CLEANUP_BATCH_SIZE, time_budget=None):
+    """
+    Deactivate expired sessions and purge old ones in primary key batches.
+    Returns the counts.
+    """
+    if time_budget is None:
+        time_budget = getattr(
+            settings, 'USER_SESSION_CLEANUP_TIME_BUDGET', DEFAULT_CLEANUP_TIME_BUDGET
+        )
+    deadline = time.monotonic() + time_budget
+    now = timezone.now()
+    expired_before = now - timedelta(seconds=settings.SESSION_COOKIE_AGE)
+    retention_days = getattr(
+        settings, 'USER_SESSION_RETENTION_DAYS', DEFAULT_RETENTION_DAYS
+    )
+    purge_before = now - timedelta(days=retention_days)
+
+    counts = {'deactivated': 0, 'deleted': 0, 'batches': 0, 'complete': True}
+    # Both read the primary key index only. Rows from logins made after
+    # this point are above ``high`` and never touched.
+    bounds = UserSession.objects.aggregate(low=Min('pk'), high=Max('pk'))
+    start = bounds['low']
+    while start is not None and start <= bounds['high']:
+        if time.monotonic() >= deadline:
+            # The next run starts over from the lowest remaining row.
+            counts['complete'] = False
+            break
+        # Each statement commits on its own, so row locks are held for
+        # one batch at most.
+        batch = UserSession.objects.filter(pk__gte=start, pk__lt=start + batch_size)
+        counts['deactivated'] += batch.filter(
+            is_active=True, last_activity__lt=expired_before
+        ).update(is_active=False)
+        counts['deleted'] += batch.filter(
+            is_active=False, last_activity__lt=purge_before
+        ).delete()[0]
+        counts['batches'] += 1
+        start += batch_size
+
+    logger.info(
+        'Session cleanup: %(deactivated)d deactivated, %(deleted)d deleted in '
+        '%(batches)d batches, complete=%(complete)s',
+        counts
+    )
+    return counts
@@ -0,0 +1,30 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import invalidate_tokens, invalidate_user_tokens
+from .models import User
+from .stats import STATS_FIELDS, invalidate_user_stats
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    """Drop the cached user statistics and token credentials a change can affect."""
+    if created:
+        invalidate_user_stats()
+        return
+    # Role, activation and password changes all go through here.
+    invalidate_user_tokens(instance.pk)
+    if update_fields is not None and not set(update_fields) & set(STATS_FIELDS):
+        return
+    invalidate_user_stats()
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    invalidate_user_stats()
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    invalidate_tokens([instance.key])
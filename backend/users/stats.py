@@ -0,0 +1,67 @@
+"""
+Cached user statistics.
+
+The counts come from one aggregate query and are kept in the default cache
+until a ``User`` change that affects them invalidates the entry (see
+``users.signals``). The timeout only bounds the damage of a missed
+invalidation, e.g. from a bulk ``update()`` that sends no signals.
+"""
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q
+
+from .models import User, UserRole
+
+USER_STATS_CACHE_KEY = 'users:stats'
+USER_STATS_TIMEOUT = 300
+
+# Saves that touch only other fields (last_login on every login, profile
+# edits) leave the cached counts alone.
+STATS_FIELDS = ('is_active', 'is_verified', 'role')
+
+
+def stats_aggregates():
+    role_aggregates = {
+        f'role_{role}': Count('pk', filter=Q(role=role)) for role in UserRole.values
+    }
+    return dict(
+        total_users=Count('pk'),
+        active_users=Count('pk', filter=Q(is_active=True)),
+        verified_users=Count('pk', filter=Q(is_verified=True)),
+        **role_aggregates
+    )
+
+
+def format_stats(counts):
+    return {
+        'total_users': counts['total_users'],
+        'active_users': counts['active_users'],
+        'verified_users': counts['verified_users'],
+        'role_distribution': {role: counts[f'role_{role}'] for role in UserRole.values},
+    }
+
+
+def compute_user_stats():
+    return format_stats(User.objects.aggregate(**stats_aggregates()))
+
+
+def get_user_stats():
+    stats = cache.get(USER_STATS_CACHE_KEY)
+    if stats is None:
+        stats = compute_user_stats()
+        cache.set(USER_STATS_CACHE_KEY, stats, USER_STATS_TIMEOUT)
+    return stats
+
+
+async def aget_user_stats():
+    """``get_user_stats`` for async views."""
+    stats = await cache.aget(USER_STATS_CACHE_KEY)
+    if stats is None:
+        stats = format_stats(await User.objects.aaggregate(**stats_aggregates()))
+        await cache.aset(USER_STATS_CACHE_KEY, stats, USER_STATS_TIMEOUT)
+    return stats
+
+
+def invalidate_user_stats():
+    # After commit, so a concurrent reader can't cache the pre-change counts.
+    transaction.on_commit(lambda: cache.delete(USER_STATS_CACHE_KEY))
@@ -0,0 +1,21 @@
+from celery import shared_task
+
+from .sessions import cleanup_expired, flush_registry
+
+
+@shared_task(ignore_result=True)
+def flush_user_sessions():
+    """Write buffered logins and session activity to the UserSession table."""
+    return flush_registry()
+
+
+@shared_task
+def cleanup_expired_sessions():
+    """
+    Deactivate expired UserSession rows and delete old inactive ones in bounded batches.
+
+    The result, kept in the result backend for ``result_expires``, is the
+    counts from ``cleanup_expired``: ``deactivated``, ``deleted``, ``batches``
+    and ``complete`` (False if the time budget ran out first).
+    """
+    return cleanup_expired()
@@ -1,6 +1,17 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
+# Under ASGI the read-heavy endpoints are async views; they hand writes to
+# the sync views.
+if settings.ASGI_SERVER:
+    from .async_views import user_list, user_profile, user_sessions, user_stats
+else:
+    user_list = views.UserListView.as_view()
+    user_profile = views.UserProfileView.as_view()
+    user_sessions = views.UserSessionListView.as_view()
+    user_stats = views.user_stats
+
 app_name = 'users'
 
 urlpatterns = [
@@ -9,18 +20,19 @@ urlpatterns = [
     path('auth/logout/', views.LogoutView.as_view(), name='logout'),
     
     # User management
-    path('users/', views.UserListView.as_view(), name='user-list'),
+    path('users/', user_list, name='user-list'),
     path('users/create/', views.UserCreateView.as_view(), name='user-create'),
+    path('users/import/', views.UserImportView.as_view(), name='user-import'),
     path('users/<int:pk>/', views.UserDetailView.as_view(), name='user-detail'),
-    path('users/profile/', views.UserProfileView.as_view(), name='user-profile'),
+    path('users/profile/', user_profile, name='user-profile'),
     path('users/change-password/', views.ChangePasswordView.as_view(), name='change-password'),
     
     # Sessions
-    path('users/sessions/', views.UserSessionListView.as_view(), name='user-sessions'),
+    path('users/sessions/', user_sessions, name='user-sessions'),
     path('users/sessions/<str:session_key>/', views.UserSessionDeleteView.as_view(), name='user-session-delete'),
     
     # Admin functions
-    path('users/stats/', views.user_stats, name='user-stats'),
+    path('users/stats/', user_stats, name='user-stats'),
     path('users/<int:user_id>/toggle-verification/', views.toggle_user_verification, name='toggle-verification'),
     path('users/<int:user_id>/change-role/', views.change_user_role, name='change-role'),
 ]
@@ -2,41 +2,46 @@ from rest_framework import status, generics, permissions
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from rest_framework.authtoken.models import Token
 from django.contrib.auth import login, logout
 from django.contrib.auth.decorators import login_required
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
+from django.db import IntegrityError
 from django.db.models import Q
+from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.filters import SearchFilter, OrderingFilter
+from rest_framework.filters import OrderingFilter
 
-from .models import User, UserProfile, UserSession
+from .models import User, UserProfile, UserRole
 from .serializers import (
     UserSerializer, UserCreateSerializer, UserUpdateSerializer,
-    LoginSerializer, ChangePasswordSerializer, UserSessionSerializer
+    LoginSerializer, ChangePasswordSerializer, UserSessionSerializer,
+    requested_fields
 )
+from .imports import ImportFailed, api_max_rows, import_users, read_rows
 from .permissions import IsAdminUser, IsModeratorUser, IsOwnerOrReadOnly
+from .search import UserSearchFilter
+from .sessions import (
+    delete_django_session, end_session, list_sessions, register_session
+)
+from .stats import get_user_stats
 
 
 class LoginView(APIView):
     permission_classes = [permissions.AllowAny]
     
     def post(self, request):
-        serializer = LoginSerializer(data=request.data)
+        serializer = LoginSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
             user = serializer.validated_data['user']
             login(request, user)
-            
-            # Create session record
-            UserSession.objects.create(
-                user=user,
-                session_key=request.session.session_key,
-                ip_address=request.META.get('REMOTE_ADDR'),
-                user_agent=request.META.get('HTTP_USER_AGENT', '')
-            )
+            register_session(request, user)
+            token, _ = Token.objects.get_or_create(user=user)
             
             return Response({
                 'message': 'Login successful',
+                'token': token.key,
                 'user': UserSerializer(user).data
             })
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -44,6 +49,11 @@ class LoginView(APIView):
 
 class LogoutView(APIView):
     def post(self, request):
+        if request.user.is_authenticated and request.session.session_key:
+            end_session(request.user, request.session.session_key)
+        if isinstance(request.auth, Token):
+            # Revokes the token; the signal drops its cached credentials.
+            Token.objects.filter(key=request.auth.key).delete()
         logout(request)
         return Response({'message': 'Logout successful'})
 
@@ -54,19 +64,83 @@ class UserCreateView(generics.CreateAPIView):
     permission_classes = [permissions.AllowAny]
 
 
-class UserListView(generics.ListAPIView):
-    queryset = User.objects.all()
+class UserImportView(APIView):
+    """
+    Create many users at once from a JSON list or an uploaded CSV/JSON ``file``.
+    
+    All rows are validated first; if any is invalid nothing is imported and
+    the errors are returned by row number. Takes at most
+    ``USER_IMPORT_API_MAX_ROWS`` users; larger imports are run with
+    ``manage.py import_users``.
+    """
+    permission_classes = [IsAdminUser]
+    
+    def post(self, request):
+        upload = request.FILES.get('file')
+        try:
+            if upload is not None:
+                format = 'json' if upload.name.lower().endswith('.json') else 'csv'
+                rows = read_rows(upload.read().decode('utf-8-sig'), format)
+            else:
+                rows = request.data
+                if not isinstance(rows, list):
+                    rows = rows.get('users')
+            max_rows = api_max_rows()
+            if isinstance(rows, list) and len(rows) > max_rows:
+                message = (
+                    f'At most {max_rows} users can be imported through the API; '
+                    'use manage.py import_users for larger imports.'
+                )
+                return Response({'error': message}, status=status.HTTP_400_BAD_REQUEST)
+            users = import_users(rows)
+        except ImportFailed as exc:
+            return Response(
+                {'error': 'No users were imported.', 'rows': exc.errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        except (ValueError, UnicodeDecodeError) as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        except IntegrityError:
+            return Response(
+                {
+                    'error': 'A username was taken while importing; '
+                             'no users were imported.'
+                },
+                status=status.HTTP_409_CONFLICT
+            )
+        
+        return Response({
+            'imported': len(users),
+            'users': [{'id': user.pk, 'username': user.username} for user in users]
+        }, status=status.HTTP_201_CREATED)
+
+
+class UserQuerysetMixin:
+    """
+    Loads only what the requested fields need.
+
+    The profile is joined in only when it is serialized; otherwise only the
+    user columns behind the requested fields are selected.
+    """
+    def get_queryset(self):
+        if self.request.method != 'GET':
+            return User.objects.all()
+        fields = requested_fields(self.request.query_params, UserSerializer.Meta.fields)
+        if 'profile' in fields:
+            return User.objects.select_related('profile')
+        return User.objects.only(*UserSerializer.columns(fields))
+
+
+class UserListView(UserQuerysetMixin, generics.ListAPIView):
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, OrderingFilter, UserSearchFilter]
     filterset_fields = ['role', 'department', 'is_verified']
-    search_fields = ['username', 'first_name', 'last_name', 'email']
     ordering_fields = ['username', 'date_joined', 'role']
     ordering = ['username']
 
 
-class UserDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = User.objects.all()
+class UserDetailView(UserQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated, IsOwnerOrReadOnly]
     
@@ -81,7 +155,13 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get_object(self):
-        return self.request.user
+        # request.user may come from the token cache with most fields deferred
+        # and the rest up to a few seconds old: serializing it would load each
+        # deferred field with its own query, and saving it could write stale
+        # role or is_active values back. One query loads the user and profile.
+        return get_object_or_404(
+            User.objects.select_related('profile'), pk=self.request.user.pk
+        )
 
 
 class ChangePasswordView(APIView):
@@ -90,7 +170,8 @@ class ChangePasswordView(APIView):
     def post(self, request):
         serializer = ChangePasswordSerializer(data=request.data)
         if serializer.is_valid():
-            user = request.user
+            # Fresh row, not the cached request.user (see UserProfileView).
+            user = User.objects.get(pk=request.user.pk)
             if user.check_password(serializer.validated_data['old_password']):
                 user.set_password(serializer.validated_data['new_password'])
                 user.save()
@@ -106,48 +187,31 @@ class ChangePasswordView(APIView):
 class UserSessionListView(generics.ListAPIView):
     serializer_class = UserSessionSerializer
     permission_classes = [permissions.IsAuthenticated]
+    # Sessions come from the registry as a list, not a queryset.
+    filter_backends = []
     
     def get_queryset(self):
-        return UserSession.objects.filter(user=self.request.user, is_active=True)
+        return list_sessions(self.request.user)
 
 
 class UserSessionDeleteView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def delete(self, request, session_key):
-        try:
-            session = UserSession.objects.get(
-                user=request.user,
-                session_key=session_key
-            )
-            session.is_active = False
-            session.save()
-            return Response({'message': 'Session terminated successfully'})
-        except UserSession.DoesNotExist:
+        if not end_session(request.user, session_key):
             return Response(
                 {'error': 'Session not found'},
                 status=status.HTTP_404_NOT_FOUND
             )
+        delete_django_session(session_key)
+        return Response({'message': 'Session terminated successfully'})
 
 
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def user_stats(request):
     """Get user statistics for analytics"""
-    total_users = User.objects.count()
-    active_users = User.objects.filter(is_active=True).count()
-    verified_users = User.objects.filter(is_verified=True).count()
-    
-    role_counts = {}
-    for role, _ in User.UserRole.choices:
-        role_counts[role] = User.objects.filter(role=role).count()
-    
-    return Response({
-        'total_users': total_users,
-        'active_users': active_users,
-        'verified_users': verified_users,
-        'role_distribution': role_counts
-    })
+    return Response(get_user_stats())
 
 
 @api_view(['POST'])
@@ -177,7 +241,7 @@ def change_user_role(request, user_id):
         user = User.objects.get(id=user_id)
         new_role = request.data.get('role')
         
-        if new_role not in dict(User.UserRole.choices):
+        if new_role not in UserRole.values:
             return Response(
                 {'error': 'Invalid role'},
                 status=status.HTTP_400_BAD_REQUEST
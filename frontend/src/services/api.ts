@@ -65,6 +65,107 @@ export const usersAPI = {
   changeRole: (id: number, role: string) => api.post(`/api/users/${id}/change-role/`, { role }),
 };
 
+// Resumable chunked attachment upload (see backend/experiments/uploads.py)
+const UPLOAD_MAX_RETRIES = 5;
+
+interface AttachmentUploadState {
+  id: string;
+  offset: number;
+  chunk_size: number;
+}
+
+export interface AttachmentUploadOptions {
+  description?: string;
+  onProgress?: (loaded: number, total: number) => void;
+}
+
+const sleep = (ms: number) => new Promise((resolve) => setTimeout(resolve, ms));
+
+const toBase64 = (buffer: ArrayBuffer) => {
+  const bytes = new Uint8Array(buffer);
+  let binary = '';
+  for (let i = 0; i < bytes.length; i += 1) {
+    binary += String.fromCharCode(bytes[i]);
+  }
+  return btoa(binary);
+};
+
+const uploadAttachment = async (
+  id: number,
+  file: File,
+  options: AttachmentUploadOptions = {}
+) => {
+  const base = `/api/experiments/${id}/attachments/uploads/`;
+  // Lets a reload or a retry of the same file pick up where it stopped.
+  const resumeKey = `attachmentUpload:${id}:${file.name}:${file.size}:${file.lastModified}`;
+  let upload: AttachmentUploadState | null = null;
+
+  const savedId = localStorage.getItem(resumeKey);
+  if (savedId) {
+    try {
+      upload = (await api.get(`${base}${savedId}/`)).data;
+    } catch {
+      localStorage.removeItem(resumeKey);
+    }
+  }
+  if (!upload) {
+    upload = (await api.post(base, {
+      filename: file.name,
+      file_size: file.size,
+      file_type: file.type,
+      description: options.description || '',
+    })).data as AttachmentUploadState;
+    localStorage.setItem(resumeKey, upload.id);
+  }
+
+  const url = `${base}${upload.id}/`;
+  let { offset } = upload;
+  let retries = 0;
+  options.onProgress?.(offset, file.size);
+
+  for (;;) {
+    const body = await file.slice(offset, offset + upload.chunk_size).arrayBuffer();
+    const digest = await crypto.subtle.digest('SHA-256', body);
+    try {
+      const response = await api.put(url, body, {
+        headers: {
+          'Content-Type': 'application/octet-stream',
+          'Upload-Offset': String(offset),
+          'Upload-Checksum': `sha256 ${toBase64(digest)}`,
+        },
+        timeout: 0,
+      });
+      if (response.status === 201) {
+        localStorage.removeItem(resumeKey);
+        options.onProgress?.(file.size, file.size);
+        return response;
+      }
+      offset = response.data.offset;
+      retries = 0;
+      options.onProgress?.(offset, file.size);
+    } catch (error: any) {
+      const resumeAt = error.response?.data?.offset;
+      if (error.response && typeof resumeAt !== 'number') {
+        throw error;
+      }
+      retries += 1;
+      if (retries > UPLOAD_MAX_RETRIES) {
+        throw error;
+      }
+      if (typeof resumeAt === 'number') {
+        offset = resumeAt;
+      } else {
+        await sleep(1000 * 2 ** retries);
+        try {
+          offset = (await api.get(url)).data.offset;
+        } catch {
+          // Still offline; the next attempt retries from the same offset.
+        }
+      }
+    }
+  }
+};
+
 export const experimentsAPI = {
   getExperiments: (params?: any) => api.get('/api/experiments/', { params }),
   getExperiment: (id: number) => api.get(`/api/experiments/${id}/`),
@@ -81,10 +182,7 @@ export const experimentsAPI = {
   createExperimentComment: (id: number, data: any) =>
     api.post(`/api/experiments/${id}/comments/`, data),
   getExperimentAttachments: (id: number) => api.get(`/api/experiments/${id}/attachments/`),
-  uploadAttachment: (id: number, formData: FormData) =>
-    api.post(`/api/experiments/${id}/attachments/`, formData, {
-      headers: { 'Content-Type': 'multipart/form-data' },
-    }),
+  uploadAttachment,
   deleteAttachment: (id: number, attachmentId: number) =>
     api.delete(`/api/experiments/${id}/attachments/${attachmentId}/`),
 };